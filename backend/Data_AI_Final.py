@@ -1,13 +1,20 @@
 import os
-import json
 import torch
 import math
 import numpy as np
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset
 from sklearn.metrics import confusion_matrix
 
+try:
+    from .train_augment import BatchLoader, augment_keypoints, build_27_features_torch
+    from .train_cache import FeatureCache, build_cache, default_cache_dir, load_manifest
+except ImportError:
+    # backend 폴더에서 python Data_AI_Final.py 로 실행할 때
+    from train_augment import BatchLoader, augment_keypoints, build_27_features_torch
+    from train_cache import FeatureCache, build_cache, default_cache_dir, load_manifest
+
 # [특징 추출] 뼈의 정렬 상태 계산
 def calculate_alignment(p1, p2, p3, p4):
     try:
@@ -29,148 +36,110 @@ def calculate_angle(p1, p2, p3):
 def calculate_distance(p1, p2):
     return math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2)
 
-def print_class_accuracy(all_targets, all_preds):
+def print_class_accuracy(all_targets, all_preds, verbose=True):
+    """기수별 정확도 출력. 반환: {"정상": %, "1기": %, "3기": %} (해당 기수 샘플이 없으면 None)"""
     labels = ["정상", "1기", "3기"]
     cm = confusion_matrix(all_targets, all_preds, labels=[0, 1, 2])
-    print("\n" + "="*35)
-    print("📊 RTX 3060 [정상/1기/3기] 진단 결과")
+    class_acc = {}
+    if verbose:
+        print("\n" + "="*35)
+        print("📊 RTX 3060 [정상/1기/3기] 진단 결과")
     for i, label in enumerate(labels):
         total = cm[i].sum()
+        class_acc[label] = None
         if total > 0:
             acc = 100 * cm[i][i] / total
-            print(f"[{label}] 정확도: {acc:.2f}% ({cm[i][i]}/{total})")
-    print("="*35 + "\n")
+            class_acc[label] = float(acc)
+            if verbose:
+                print(f"[{label}] 정확도: {acc:.2f}% ({cm[i][i]}/{total})")
+    if verbose:
+        print("="*35 + "\n")
+    return class_acc
 
 class DogJointDataset(Dataset):
-    def __init__(self, root_dir, transform=False):
+    """
+    라벨 JSON을 train_cache.py 캐시(메모리 맵 배열)에서 읽음. 처음 한 번만 JSON 파싱, 이후 실행은 추가·변경된 파일만.
+    refresh=False 면 폴더를 다시 훑지 않고 기존 캐시 그대로 사용.
+    """
+    def __init__(self, root_dir, transform=False, cache_dir=None, refresh=True):
         self.root_dir = root_dir 
-        self.data_list = []
-        self.labels = []
         self.target_map = {"정상" : 0, "1기" : 1, "3기" : 2}
         self.transform = transform 
-        self._load_all_json_paths()
+        self.cache_dir = cache_dir or default_cache_dir(root_dir)
+        self._load_cache(refresh)
 
-    def _load_all_json_paths(self):
-        if not os.path.exists(self.root_dir):
+    def _load_cache(self, refresh):
+        if not os.path.exists(self.root_dir) and load_manifest(self.cache_dir) is None:
             print(f"⚠️ 경로를 찾을 수 없습니다: {self.root_dir}")
-            return
-        for severity_folder in os.listdir(self.root_dir):
-            if severity_folder not in self.target_map: continue
-            label = self.target_map[severity_folder]
-            severity_path = os.path.join(self.root_dir, severity_folder)
-            for root, dirs, files in os.walk(severity_path):
-                for file_name in files:
-                    if file_name.endswith('.json'):
-                        self.data_list.append(os.path.join(root, file_name))
-                        self.labels.append(label)
+        manifest = build_cache(self.root_dir, self.cache_dir) if refresh else load_manifest(self.cache_dir)
+        cache = FeatureCache(self.cache_dir, manifest)
+        self.data_list = [os.path.join(self.root_dir, rel) for rel in cache.paths]
+        self.keypoints = cache.array("keypoints")  # (N, 10, 2) 원본 좌표
+        self.present = cache.array("present")      # (N, 10) 관절 존재 여부
+        self.static = cache.array("static")        # (N, 7) 각도 3 + alignment + leg_ratio + side + dog_size
+        self.labels = cache.array("label")
         print(f"✅ 데이터 수집 완료: {len(self.data_list)}개 (증강 적용: {self.transform})")
 
+    def __getstate__(self):
+        # DataLoader 워커로 넘길 때 배열을 복사하지 않고 워커에서 같은 캐시를 다시 mmap
+        state = self.__dict__.copy()
+        for key in ("data_list", "keypoints", "present", "static", "labels"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_cache(refresh=False)
+
     def __len__(self): return len(self.data_list)
         
     def __getitem__(self, idx):
-        json_path = self.data_list[idx]
-        label = self.labels[idx]
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        target_labels = [
-            "Iliac crest", "Femoral greater trochanter", "Femorotibial joint", 
-            "Lateral malleolus of the distal tibia", "Distal lateral aspect of the fifth metatarsus",
-            "T13 Spinous precess", "Dorsal scapular spine", "Acromion/Greater tubercle",
-            "Lateral humeral epicondyle", "Ulnar styloid process"
-        ]
-        annos = data.get('annotation_info', [])
-        joint_dict = {a['label']: (float(a['x']), float(a['y'])) for a in annos}
-        
-        # [데이터 증강 로직]
-        aug_x, aug_y = 0.0, 0.0
+        # 샘플 하나씩 (학습 루프는 train_augment.BatchLoader 로 배치 단위 처리)
+        label = torch.tensor(self.labels[idx], dtype=torch.long)
+
+        # [데이터 증강 로직] BatchLoader(augment=True) 와 같음: Shift + Jitter 후 각도·비율까지 다시 계산
         if self.transform:
-            # 전체 좌표 미세 이동 (Shift)
-            aug_x = np.random.normal(0, 5.0) 
-            aug_y = np.random.normal(0, 5.0)
-
-        raw_keypoints = []
-        for t in target_labels:
-            if t in joint_dict:
-                x, y = joint_dict[t]
-                if self.transform:
-                    # 각 점마다 미세한 떨림 추가 (Jitter)
-                    x += np.random.normal(0, 2.0)
-                    y += np.random.normal(0, 2.0)
-                raw_keypoints.extend([x + aug_x, y + aug_y])
-            else:
-                raw_keypoints.extend([0.0, 0.0])
-        
-        keypoints = [kp / 1000.0 for kp in raw_keypoints]
-        
-        # 각도 계산 (증강된 좌표가 반영된 joint_dict_aug 기반이면 더 좋으나 구조상 기존값 유지)
-        angles = [
-            calculate_angle(joint_dict.get("Femoral greater trochanter", (0,0)), joint_dict.get("Femorotibial joint", (0,0)), joint_dict.get("Lateral malleolus of the distal tibia", (0,0))),
-            calculate_angle(joint_dict.get("Iliac crest", (0,0)), joint_dict.get("Femoral greater trochanter", (0,0)), joint_dict.get("Femorotibial joint", (0,0))),
-            calculate_angle(joint_dict.get("Femorotibial joint", (0,0)), joint_dict.get("Lateral malleolus of the distal tibia", (0,0)), joint_dict.get("Distal lateral aspect of the fifth metatarsus", (0,0)))
-        ]
-        
-        alignment = calculate_alignment(
-            joint_dict.get("Femoral greater trochanter", (0,0)), 
-            joint_dict.get("Femorotibial joint", (0,0)),
-            joint_dict.get("Femorotibial joint", (0,0)), 
-            joint_dict.get("Lateral malleolus of the distal tibia", (0,0))
-        )
-        alignment = min(alignment, 5.0) 
-        
-        thigh = calculate_distance(joint_dict.get("Femoral greater trochanter", (0,0)), joint_dict.get("Femorotibial joint", (0,0)))
-        calf = calculate_distance(joint_dict.get("Femorotibial joint", (0,0)), joint_dict.get("Lateral malleolus of the distal tibia", (0,0)))
-        leg_ratio = min(calf / (thigh + 1e-6), 2.0)
-        
-        side = 0.5
-        for r in data.get('pet_medical_record_info', []):
-            if r.get('value') == 1: side = 0.0 if r.get('foot_position') == 'left' else 1.0
-            
-        size_map = {"소형견": 0.0, "중형견": 0.5, "대형견": 1.0}
-        dog_size = size_map.get(data.get("size", "소형견"), 0.0)
-        
-        features = torch.tensor(keypoints + angles + [alignment, leg_ratio, side, dog_size], dtype=torch.float32)
-        return features, torch.tensor(label, dtype=torch.long)
+            keypoints = torch.from_numpy(np.asarray(self.keypoints[idx:idx + 1], dtype=np.float32))
+            present = torch.from_numpy(np.asarray(self.present[idx:idx + 1], dtype=np.bool_))
+            side, dog_size = torch.from_numpy(np.asarray(self.static[idx:idx + 1, 5:7], dtype=np.float32)).unbind(1)
+            features = build_27_features_torch(augment_keypoints(keypoints, present), side, dog_size)[0]
+            return features, label
+
+        # 증강 없으면 캐시에 미리 계산한 각도·alignment·leg_ratio·side·size 그대로
+        keypoints = self.keypoints[idx].astype(np.float64).reshape(-1) / 1000.0
+        features = torch.from_numpy(np.concatenate([keypoints, self.static[idx]]).astype(np.float32))
+        return features, label
 
 class DogPatellaModel(nn.Module):
-    def __init__(self):
+    def __init__(self, dropout=0.4):
         super(DogPatellaModel, self).__init__()
         self.fc = nn.Sequential(
             nn.Linear(27, 512), 
             nn.BatchNorm1d(512),
             nn.ReLU(),
-            nn.Dropout(0.4), # 증강 적용 시 드롭아웃 살짝 상향
+            nn.Dropout(dropout), # 증강 적용 시 드롭아웃 살짝 상향 (기본 0.4)
             nn.Linear(512, 256),
             nn.ReLU(),
             nn.Linear(256, 3) 
         )
     def forward(self, x): return self.fc(x)
 
-if __name__ == "__main__":
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    print(f"🚀 현재 기기: {device} (RTX 3060)")
-
-    train_path = r".\Training\02.라벨링데이터\TL"
-    val_path = r".\Validation\02.라벨링데이터\VL"
-    
-    # [수정] 훈련용은 증강 ON, 검증용은 증강 OFF
-    train_dataset = DogJointDataset(train_path, transform=True)
-    val_dataset = DogJointDataset(val_path, transform=False)
-    
-    train_loader = DataLoader(train_dataset, batch_size=256, shuffle=True, pin_memory=True, num_workers=2)
-    val_loader = DataLoader(val_dataset, batch_size=512, shuffle=False, pin_memory=True, num_workers=2)
-    
+def train_model(model, train_loader, val_loader, device, epochs=30, lr=0.0001, weight_decay=0.05,
+                class_weights=(1.2, 1.0, 4.0), checkpoint="dog_patella_best.pth", on_epoch=None, verbose=True):
+    """
+    학습 + epoch마다 검증, 최고 정확도일 때 checkpoint 저장.
+    on_epoch(epoch, accuracy) 가 True를 돌려주면 거기서 중단 (train_sweep.py 의 조기 종료용).
+    반환: {"best_acc", "best_epoch", "class_acc"(최고 epoch 기준), "epochs"(실제 돈 epoch 수), "stopped"}
+    """
     # [수정] 가중치 밸런스: 정상과 3기의 비중을 적절히 조율
-    weights = torch.tensor([1.2, 1.0, 4.0]).to(device)
-    
-    model = DogPatellaModel().to(device)
+    weights = torch.tensor(list(class_weights), dtype=torch.float32).to(device)
     criterion = nn.CrossEntropyLoss(weight=weights)
-    optimizer = optim.AdamW(model.parameters(), lr=0.0001, weight_decay=0.05)
+    optimizer = optim.AdamW(model.parameters(), lr=lr, weight_decay=weight_decay)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, 'min', patience=3, factor=0.5)
 
-    best_acc = 0.0
-    print("🚀 데이터 증강 학습 시작...")
-    for epoch in range(30):
+    best_acc, best_epoch, best_class_acc = 0.0, 0, {}
+    stopped = False
+    for epoch in range(epochs):
         model.train()
         r_loss = 0.0
         for i, (feat, tar) in enumerate(train_loader):
@@ -191,17 +160,44 @@ if __name__ == "__main__":
                 all_targets.extend(tar.cpu().numpy())
         
         accuracy = 100 * np.sum(np.array(all_preds) == np.array(all_targets)) / len(all_targets)
-        print(f"⭐ Epoch [{epoch+1}/30] 전체 정확도: {accuracy:.2f}% | Loss: {r_loss/len(train_loader):.4f}")
+        if verbose:
+            print(f"⭐ Epoch [{epoch+1}/{epochs}] 전체 정확도: {accuracy:.2f}% | Loss: {r_loss/len(train_loader):.4f}")
+        class_acc = print_class_accuracy(
+            all_targets, all_preds, verbose=verbose and ((epoch + 1) % 5 == 0 or epoch == epochs - 1)
+        )
         
         # [추가] 최고 성능 모델 저장 로직
         if accuracy > best_acc:
-            best_acc = accuracy
-            torch.save(model.state_dict(), "dog_patella_best.pth")
-            print(f"   🏆 최고 정확도 갱신! ({accuracy:.2f}%) 모델 저장됨.")
+            best_acc, best_epoch, best_class_acc = float(accuracy), epoch + 1, class_acc
+            torch.save(model.state_dict(), checkpoint)
+            if verbose:
+                print(f"   🏆 최고 정확도 갱신! ({accuracy:.2f}%) 모델 저장됨.")
         
         scheduler.step(r_loss)
-        
-        if (epoch + 1) % 5 == 0 or epoch == 29:
-            print_class_accuracy(all_targets, all_preds)
 
-    print(f"✅ 학습 완료! (최고 정확도: {best_acc:.2f}%)")
+        if on_epoch is not None and on_epoch(epoch + 1, float(accuracy)):
+            stopped = True
+            break
+
+    return {"best_acc": best_acc, "best_epoch": best_epoch, "class_acc": best_class_acc,
+            "epochs": epoch + 1, "stopped": stopped}
+
+if __name__ == "__main__":
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"🚀 현재 기기: {device} (RTX 3060)")
+
+    train_path = r".\Training\02.라벨링데이터\TL"
+    val_path = r".\Validation\02.라벨링데이터\VL"
+    
+    # [수정] 훈련용은 증강 ON, 검증용은 증강 OFF
+    train_dataset = DogJointDataset(train_path, transform=True)
+    val_dataset = DogJointDataset(val_path, transform=False)
+    
+    # 배치 단위로 텐서에서 증강 + 특징 재계산 (train_augment.py) → DataLoader 워커 불필요
+    train_loader = BatchLoader(train_dataset, batch_size=256, shuffle=True, device=device)
+    val_loader = BatchLoader(val_dataset, batch_size=512, shuffle=False, device=device)
+    
+    model = DogPatellaModel().to(device)
+    print("🚀 데이터 증강 학습 시작...")
+    result = train_model(model, train_loader, val_loader, device, epochs=30)
+    print(f"✅ 학습 완료! (최고 정확도: {result['best_acc']:.2f}%)")
@@ -0,0 +1,291 @@
+"""
+폴더 단위 오프라인 진단 — 영상·ZIP(프레임 이미지)·사진·JSON 을 HTTP 없이 한꺼번에.
+/predict 와 같은 경로를 그대로 사용:
+    영상·사진 : preprocess_logic → run_predict
+    ZIP       : zip_to_frame_features (포즈 모델에 --pose-batch 장씩) → run_predict_from_features_multi_frame
+    JSON      : parse_json_to_features → run_predict_from_features
+- 파일마다 프로세스 풀에서 처리 (프로세스당 torch·OpenCV 스레드 --threads 개 고정 → 코어 수에 비례해 늘어남)
+- 끝난 파일은 바로 진행 기록(journal, JSONL)에 한 줄씩 추가 → 중단 후 다시 실행하면 (크기·수정 시각이 같은) 끝난 파일은 건너뜀
+- 마지막에 입력 폴더 순서대로 결과를 JSONL 또는 CSV로 저장
+
+사용법 (프로젝트 루트에서):
+    python -m backend.batch_diagnose INPUT_DIR --out results.csv \\
+        [--format jsonl|csv] [--workers N] [--threads 1] [--pose-batch 16] [--journal PATH] [--retry-errors]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+# 확장자 → (종류, content type)
+FILE_KINDS = {
+    ".mp4": ("video", "video/mp4"),
+    ".mov": ("video", "video/quicktime"),
+    ".webm": ("video", "video/webm"),
+    ".avi": ("video", "video/x-msvideo"),
+    ".mkv": ("video", "video/x-matroska"),
+    ".zip": ("zip", "application/zip"),
+    ".jpg": ("image", "image/jpeg"),
+    ".jpeg": ("image", "image/jpeg"),
+    ".png": ("image", "image/png"),
+    ".webp": ("image", "image/webp"),
+    ".bmp": ("image", "image/bmp"),
+    ".json": ("json", "application/json"),
+}
+CSV_COLUMNS = (
+    "path", "kind", "status", "confidence", "prob_정상", "prob_1기", "prob_3기",
+    "frames_analyzed", "seconds", "error",
+)
+# 워커 하나당 미리 넘겨 두는 파일 수 (너무 많이 쌓이지 않게)
+IN_FLIGHT_PER_WORKER = 4
+
+# 워커 프로세스 전역 (initializer 에서 채움)
+_WORKER: dict = {}
+
+
+def scan_inputs(input_dir: str) -> list[dict]:
+    """진단할 파일 목록 (상대 경로 정렬순). {"path", "size", "mtime_ns", "kind", "content_type"}"""
+    entries = []
+    for root, dirs, names in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(names):
+            kind = FILE_KINDS.get(os.path.splitext(name)[1].lower())
+            if kind is None or name.startswith("."):
+                continue
+            path = os.path.join(root, name)
+            st = os.stat(path)
+            entries.append({
+                "path": os.path.relpath(path, input_dir).replace(os.sep, "/"),
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "kind": kind[0],
+                "content_type": kind[1],
+            })
+    return entries
+
+
+def load_journal(journal_path: str) -> dict[str, dict]:
+    """진행 기록 → 경로별 마지막 결과. 중간에 끊긴 마지막 줄은 무시."""
+    done: dict[str, dict] = {}
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                done[record["path"]] = record
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _init_worker(model_path: str | None, threads: int, pose_batch: int) -> None:
+    import cv2
+    import torch
+
+    from .model import load_dog_patella_model
+
+    # Ctrl+C 는 메인 프로세스만 받아서 정리 (워커는 하던 파일을 끝냄)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+    _WORKER["device"] = torch.device("cpu")
+    _WORKER["model"] = load_dog_patella_model("cpu", model_path)
+    _WORKER["pose_batch"] = pose_batch
+
+
+def _pose_model():
+    """포즈 모델은 ZIP을 처음 만났을 때 워커마다 한 번만 로드."""
+    if "pose" not in _WORKER:
+        from .pose_to_features import _get_pose_model
+
+        _WORKER["pose"] = _get_pose_model()
+    return _WORKER["pose"]
+
+
+def diagnose_file(path: str, kind: str, content_type: str):
+    """파일 하나 → PredictResponse (/predict 와 같은 처리)."""
+    from .inference import run_predict, run_predict_from_features, run_predict_from_features_multi_frame
+    from .pose_to_features import zip_to_frame_features
+    from .preprocess import parse_json_to_features
+
+    model, device = _WORKER["model"], _WORKER["device"]
+    body = Path(path).read_bytes()
+    if not body:
+        raise ValueError("empty file")
+    if kind == "json":
+        return run_predict_from_features(parse_json_to_features(json.loads(body.decode("utf-8"))), model, device)
+    if kind == "zip":
+        n_images, features = zip_to_frame_features(body, _pose_model(), _WORKER["pose_batch"])
+        if not n_images:
+            raise ValueError("no .jpg/.png images in ZIP")
+        if not features:
+            raise ValueError("no pose detected in ZIP images")
+        return run_predict_from_features_multi_frame(features, model, device)
+    return run_predict(body, content_type, model, device)
+
+
+def _run_entry(input_dir: str, entry: dict) -> dict:
+    t0 = time.perf_counter()
+    record = {k: entry[k] for k in ("path", "size", "mtime_ns", "kind")}
+    try:
+        response = diagnose_file(os.path.join(input_dir, entry["path"]), entry["kind"], entry["content_type"])
+    except Exception as e:
+        record.update(ok=False, error=f"{type(e).__name__}: {e}")
+    else:
+        record.update(
+            ok=True,
+            status=response.status,
+            confidence=response.confidence,
+            probs={item.name: item.value for item in response.chart_data},
+            frames_analyzed=response.frames_analyzed,
+            metrics=response.metrics,
+        )
+    record["seconds"] = round(time.perf_counter() - t0, 3)
+    return record
+
+
+def _csv_row(record: dict) -> dict:
+    probs = record.get("probs") or {}
+    return {
+        "path": record["path"],
+        "kind": record["kind"],
+        "status": record.get("status", ""),
+        "confidence": record.get("confidence", ""),
+        **{f"prob_{name}": probs.get(name, "") for name in ("정상", "1기", "3기")},
+        "frames_analyzed": record.get("frames_analyzed") or "",
+        "seconds": record["seconds"],
+        "error": record.get("error", ""),
+    }
+
+
+def write_results(out_path: str, fmt: str, records: list[dict]) -> None:
+    tmp = f"{out_path}.tmp"
+    if fmt == "csv":
+        with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(_csv_row(r) for r in records)
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    os.replace(tmp, out_path)
+
+
+def run(
+    input_dir: str,
+    out_path: str,
+    fmt: str,
+    journal_path: str,
+    workers: int,
+    threads: int = 1,
+    pose_batch: int = 16,
+    model_path: str | None = None,
+    retry_errors: bool = False,
+) -> dict:
+    entries = scan_inputs(input_dir)
+    journal = load_journal(journal_path)
+
+    def finished(entry: dict) -> bool:
+        record = journal.get(entry["path"])
+        return (
+            record is not None
+            and (record["size"], record["mtime_ns"]) == (entry["size"], entry["mtime_ns"])
+            and (record["ok"] or not retry_errors)
+        )
+
+    todo = [e for e in entries if not finished(e)]
+    print(f"[batch_diagnose] 파일 {len(entries)}개 중 이미 끝남 {len(entries) - len(todo)}개, 처리 {len(todo)}개 "
+          f"(프로세스 {workers}개 × 스레드 {threads})")
+
+    # 워커가 torch를 읽기 전에 BLAS/OpenMP 스레드 수도 고정
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    t0 = time.perf_counter()
+    failed = 0
+    if todo:
+        ctx = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=_init_worker,
+            initargs=(model_path, threads, pose_batch),
+        )
+        try:
+            with open(journal_path, "a", encoding="utf-8") as jf:
+                pending = set()
+                queue = iter(todo)
+                done_count, next_report = 0, 100
+                while True:
+                    for entry in queue:
+                        pending.add(pool.submit(_run_entry, input_dir, entry))
+                        if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                            break
+                    if not pending:
+                        break
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        record = future.result()
+                        journal[record["path"]] = record
+                        jf.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        failed += not record["ok"]
+                        done_count += 1
+                    jf.flush()
+                    if done_count >= next_report:
+                        next_report += 100
+                        print(f"[batch_diagnose] {done_count}/{len(todo)} ({done_count / (time.perf_counter() - t0):.1f}개/초)")
+        except KeyboardInterrupt:
+            # 끝난 파일은 이미 진행 기록에 있음 → 남은 작업은 버리고 종료
+            pool.shutdown(wait=True, cancel_futures=True)
+            print("[batch_diagnose] 중단됨 — 같은 명령으로 다시 실행하면 끝난 파일은 건너뜀")
+            raise SystemExit(130)
+        pool.shutdown()
+    elapsed = time.perf_counter() - t0
+
+    records = [journal[e["path"]] for e in entries if e["path"] in journal]
+    write_results(out_path, fmt, records)
+    summary = {
+        "files": len(entries),
+        "processed": len(todo),
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "files_per_s": round(len(todo) / elapsed, 2) if todo and elapsed > 0 else None,
+    }
+    print(
+        f"[batch_diagnose] 처리 {len(todo)}개 (실패 {failed}개) {elapsed:.1f}s"
+        + (f" → {summary['files_per_s']}개/초" if summary["files_per_s"] else "")
+        + f", 결과 {len(records)}개 → {out_path}"
+    )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input_dir", help="영상·ZIP·사진·JSON 이 들어 있는 폴더 (하위 폴더 포함)")
+    parser.add_argument("--out", required=True, help="결과 파일 (.jsonl / .csv)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default=None, help="생략 시 --out 확장자로")
+    parser.add_argument("--journal", default=None, help="진행 기록 (기본: {out}.journal.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본 CPU 수 / threads)")
+    parser.add_argument("--threads", type=int, default=1, help="프로세스 하나의 torch·OpenCV 스레드 수")
+    parser.add_argument("--pose-batch", type=int, default=16, help="포즈 모델에 한 번에 넣는 ZIP 프레임 수")
+    parser.add_argument("--model", default=None, help="가중치 파일 (기본: backend/dog_patella_best.pth)")
+    parser.add_argument("--retry-errors", action="store_true", help="지난번 실패한 파일도 다시 처리")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.out.lower().endswith(".csv") else "jsonl")
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads)
+    run(
+        args.input_dir, args.out, fmt, args.journal or f"{args.out}.journal.jsonl", workers,
+        args.threads, args.pose_batch, args.model, args.retry_errors,
+    )
+
+
+if __name__ == "__main__":
+    main()
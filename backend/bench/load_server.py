@@ -0,0 +1,70 @@
+"""
+부하 측정용 서버 진입점 (backend.bench.load_test 가 uvicorn 으로 실행, 워커마다 이 모듈을 읽음).
+LOADTEST_STANDIN_POSE=1 이면 YOLO 포즈 모델 대신 StandInPoseModel 사용 → 가중치·ultralytics 없이 ZIP 경로 측정.
+    LOADTEST_POSE_MS: 가짜 모델이 이미지 한 장마다 CPU를 쓰는 시간(ms, 기본 0) — 실제 모델 비용 흉내
+
+직접 실행 (프로젝트 루트에서):
+    LOADTEST_STANDIN_POSE=1 uvicorn backend.bench.load_server:app --workers 2
+"""
+from __future__ import annotations
+
+import os
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import torch
+
+from backend import pose_to_features
+
+STANDIN_ENV = "LOADTEST_STANDIN_POSE"
+POSE_MS_ENV = "LOADTEST_POSE_MS"
+
+
+class StandInPoseModel:
+    """
+    ultralytics YOLO 와 같은 호출 형식(model(images, verbose=False) → 결과 목록, r.keypoints.data)의 가짜 포즈 모델.
+    이미지를 32x32 회색조로 줄여 가로 띠 17개의 밝기 중심을 COCO 17점으로 반환 (이미지마다 다르고 결정적).
+    """
+
+    def __init__(self, cost_ms: float = 0.0):
+        self.cost_ms = cost_ms
+
+    def _keypoints(self, img: np.ndarray) -> np.ndarray:
+        h, w = img.shape[:2]
+        gray = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img, (32, 34))
+        weights = gray.astype(np.float32) + 1.0
+        cols = np.arange(32, dtype=np.float32)
+        kpts = np.zeros((17, 3), dtype=np.float32)
+        for k in range(17):
+            band = weights[2 * k:2 * k + 2].sum(axis=0)
+            kpts[k] = ((band * cols).sum() / band.sum() / 31.0 * w, (2 * k + 1) / 34.0 * h, 0.9)
+        return kpts
+
+    def __call__(self, images, verbose: bool = False):
+        if not isinstance(images, list):
+            images = [images]
+        results = []
+        for img in images:
+            if self.cost_ms > 0:
+                deadline = time.perf_counter() + self.cost_ms / 1000.0
+                while time.perf_counter() < deadline:
+                    pass
+            kpts = torch.from_numpy(self._keypoints(img)[None])
+            results.append(SimpleNamespace(keypoints=SimpleNamespace(data=kpts)))
+        return results
+
+
+def __getattr__(name: str):
+    """uvicorn 이 app 을 찾을 때 처음 한 번 포즈 모델을 바꾸고 backend.main 을 읽음 (load_test 가 상수만 가져갈 때는 읽지 않음)."""
+    if name != "app":
+        raise AttributeError(name)
+    if os.environ.get(STANDIN_ENV, "").strip() == "1":
+        standin = StandInPoseModel(float(os.environ.get(POSE_MS_ENV) or 0))
+        pose_to_features._get_pose_model = lambda: standin
+        print(f"[load_server] 가짜 포즈 모델 사용 (이미지당 {standin.cost_ms:g}ms)")
+    from backend.main import app
+
+    globals()["app"] = app
+    return app
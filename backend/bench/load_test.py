@@ -0,0 +1,338 @@
+"""
+로컬 부하 측정 — 합성 업로드로 워커 하나(또는 여러 개)의 포화 지점 찾기.
+요청 종류 (--mix 가중치로 섞음):
+    image : POST /predict JPEG 사진 (640x480)
+    video : POST /predict mp4 영상 (2초, 320x240)
+    zip   : POST /predict 프레임 JPEG 16장 ZIP (포즈 모델 경로)
+    json  : POST /predict 27차원 특징 JSON
+    walk  : GET /api/walk-routes 무작위 국내 좌표 (절반은 diagnosis_grade 추천)
+- 동시 접속 수(--concurrency)마다 --duration 초 동안 닫힌 루프(응답을 받으면 바로 다음 요청)로 보내고
+  종류별 p50/p95/p99 지연, 처리량(요청/초), 오류율(2xx 아닌 응답·연결 실패)을 출력
+- --url 이 없으면 uvicorn 을 직접 띄움 (--server-workers, 데이터는 임시 폴더). 포즈 가중치가 없으면(--pose auto)
+  가짜 포즈 모델(load_server.StandInPoseModel) 사용
+
+사용법 (프로젝트 루트에서):
+    python -m backend.bench.load_test --concurrency 1 2 4 8 --duration 20 \\
+        [--mix image=3,video=1,zip=1,json=3,walk=4] [--server-workers 1] [--pose auto|real|standin] [--pose-ms 0] \\
+        [--url http://127.0.0.1:8000] [--json report.json]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import importlib.util
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..pose_to_features import DOG_POSE_MODEL_ENV, POSE_MODEL_ENV
+from .load_server import POSE_MS_ENV, STANDIN_ENV
+from .suite import _jpeg, _korean_point, _synthetic_frame
+from .worker_rss import PROJECT_ROOT, _free_port
+
+KINDS = ("image", "video", "zip", "json", "walk")
+DEFAULT_MIX = "image=3,video=1,zip=1,json=3,walk=4"
+# 종류마다 미리 만들어 두는 업로드 수
+VARIANTS = 4
+BOUNDARY = "----patella-load-test"
+# 이전 단계보다 처리량이 이 비율 미만으로 늘면 포화로 봄
+SATURATION_GAIN = 0.10
+POSE_WEIGHT_FILES = ("yolov8n-pose-dog.pt", "yolo11n-pose-dog.pt", "yolov8n-pose.pt")
+
+
+def _video(rng: random.Random) -> bytes:
+    with tempfile.TemporaryDirectory(prefix="load-video-") as tmp:
+        path = os.path.join(tmp, "clip.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 15, (320, 240))
+        base = _synthetic_frame(rng, 320, 240)
+        for i in range(30):
+            writer.write(np.roll(base, i * 4, axis=1))
+        writer.release()
+        return Path(path).read_bytes()
+
+
+def _frames_zip(rng: random.Random, frames: int = 16) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        base = _synthetic_frame(rng, 640, 480)
+        for i in range(frames):
+            zf.writestr(f"frames/{i:03d}.jpg", _jpeg(np.roll(base, i * 8, axis=1)))
+    return buf.getvalue()
+
+
+def build_uploads(seed: int) -> dict[str, list[tuple[str, bytes, str]]]:
+    """종류별 (파일명, 본문, content type) VARIANTS개."""
+    rng = random.Random(seed)
+    return {
+        "image": [(f"photo{i}.jpg", _jpeg(_synthetic_frame(rng, 640, 480)), "image/jpeg") for i in range(VARIANTS)],
+        "video": [(f"clip{i}.mp4", _video(rng), "video/mp4") for i in range(VARIANTS)],
+        "zip": [(f"frames{i}.zip", _frames_zip(rng), "application/zip") for i in range(VARIANTS)],
+        "json": [
+            (f"features{i}.json", json.dumps([round(rng.random(), 4) for _ in range(27)]).encode(), "application/json")
+            for i in range(VARIANTS)
+        ],
+    }
+
+
+def _multipart(filename: str, body: bytes, content_type: str, fields: dict[str, str]) -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode() for k, v in fields.items()
+    ]
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body + b"\r\n"
+    )
+    parts.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(parts)
+
+
+def make_request(kind: str, uploads: dict, rng: random.Random) -> tuple[str, str, bytes | None, dict]:
+    """종류 → (method, path, body, headers)."""
+    lat, lon = _korean_point(rng)
+    if kind == "walk":
+        query = {"latitude": f"{lat:.5f}", "longitude": f"{lon:.5f}"}
+        if rng.random() < 0.5:
+            query["diagnosis_grade"] = rng.choice(("정상", "1기", "3기"))
+        return "GET", "/api/walk-routes?" + urllib.parse.urlencode(query), None, {"Accept-Encoding": "gzip"}
+    filename, body, content_type = rng.choice(uploads[kind])
+    payload = _multipart(filename, body, content_type, {"latitude": f"{lat:.5f}", "longitude": f"{lon:.5f}"})
+    return "POST", "/predict", payload, {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+def _client(base: str, kinds: list[str], weights: list[float], uploads: dict, deadline: float, seed: int, out: list) -> None:
+    """닫힌 루프 클라이언트 하나 (연결 재사용). out 에 (종류, 초, 상태 코드 또는 None) 추가."""
+    url = urllib.parse.urlsplit(base)
+    rng = random.Random(seed)
+    conn = None
+    records = []
+    while time.monotonic() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        method, path, body, headers = make_request(kind, uploads, rng)
+        if conn is None:
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            status = None
+            conn.close()
+            conn = None
+        records.append((kind, time.perf_counter() - t0, status))
+    if conn is not None:
+        conn.close()
+    out.extend(records)
+
+
+def run_level(base: str, concurrency: int, duration: float, mix: dict[str, float], uploads: dict, seed: int) -> dict:
+    kinds, weights = list(mix), list(mix.values())
+    records: list = []
+    deadline = time.monotonic() + duration
+    t0 = time.perf_counter()
+    threads = [
+        threading.Thread(target=_client, args=(base, kinds, weights, uploads, deadline, seed * 1000 + i, records))
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    by_kind = {kind: [r for r in records if r[0] == kind] for kind in kinds}
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "all": _stats(records, elapsed),
+        "endpoints": {kind: _stats(rows, elapsed) for kind, rows in by_kind.items() if rows},
+    }
+
+
+def _stats(rows: list, elapsed: float) -> dict:
+    if not rows:
+        return {"requests": 0}
+    latency = np.array([r[1] for r in rows]) * 1000.0
+    errors = sum(1 for r in rows if r[2] is None or not 200 <= r[2] < 300)
+    codes: dict[str, int] = {}
+    for r in rows:
+        key = str(r[2]) if r[2] is not None else "conn_error"
+        codes[key] = codes.get(key, 0) + 1
+    p50, p95, p99 = np.percentile(latency, (50, 95, 99))
+    return {
+        "requests": len(rows),
+        "rps": round(len(rows) / elapsed, 2),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "errors": errors,
+        "error_rate": round(errors / len(rows), 4),
+        "status": codes,
+    }
+
+
+def _print_level(level: dict) -> None:
+    print(f"\n[load_test] 동시 {level['concurrency']} — {level['seconds']}s")
+    print(f"{'endpoint':>8} {'reqs':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6}")
+    for name, s in [*level["endpoints"].items(), ("all", level["all"])]:
+        if not s["requests"]:
+            continue
+        print(
+            f"{name:>8} {s['requests']:>6} {s['rps']:>8.2f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+            f"{s['p99_ms']:>8.1f} {s['error_rate'] * 100:>6.1f}"
+        )
+        if s["errors"]:
+            print(f"{'':>8} 상태: {s['status']}")
+
+
+def saturation_point(levels: list[dict]) -> int | None:
+    """처리량이 이전 단계보다 SATURATION_GAIN 미만으로 늘어난 첫 단계의 직전 동시 접속 수."""
+    for prev, cur in zip(levels, levels[1:]):
+        if cur["all"].get("rps", 0) < prev["all"].get("rps", 0) * (1 + SATURATION_GAIN):
+            return prev["concurrency"]
+    return None
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in KINDS:
+            raise argparse.ArgumentTypeError(f"unknown request kind {name!r} (choose from {', '.join(KINDS)})")
+        mix[name] = float(weight or 1)
+    if not any(w > 0 for w in mix.values()):
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return {k: w for k, w in mix.items() if w > 0}
+
+
+def pose_weights_available() -> bool:
+    """ultralytics 가 있고 포즈 가중치를 네트워크 없이 찾을 수 있으면 True (pose_to_features._get_pose_model 과 같은 탐색)."""
+    if importlib.util.find_spec("ultralytics") is None:
+        return False
+    if (os.environ.get(DOG_POSE_MODEL_ENV) or os.environ.get(POSE_MODEL_ENV) or "").strip():
+        return True
+    backend_dir = PROJECT_ROOT / "backend"
+    return any((base / name).is_file() for base in (backend_dir, PROJECT_ROOT, Path.cwd()) for name in POSE_WEIGHT_FILES)
+
+
+def _health(base: str) -> dict:
+    with urllib.request.urlopen(f"{base}/health", timeout=5) as r:
+        return json.loads(r.read().decode("utf-8"))
+
+
+@contextmanager
+def local_server(workers: int, standin_pose: bool, pose_ms: float):
+    """uvicorn 으로 backend.bench.load_server 실행 (데이터 폴더는 임시), 준비되면 base URL."""
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="load-test-data-") as data_dir:
+        env = {
+            **os.environ,
+            "PATELLA_DATA_DIR": data_dir,
+            "COURSE_RELOAD_INTERVAL": "0",
+            STANDIN_ENV: "1" if standin_pose else "0",
+            POSE_MS_ENV: str(pose_ms),
+        }
+        env.pop("PATELLA_DB_PATH", None)
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.bench.load_server:app", "--host", "127.0.0.1",
+             "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL,
+        )
+        base = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 180
+            while time.monotonic() < deadline:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"server exited with code {proc.returncode}")
+                try:
+                    if _health(base).get("courses_loaded"):
+                        break
+                except OSError:
+                    pass
+                time.sleep(0.5)
+            else:
+                raise RuntimeError("server did not become ready")
+            yield base
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+@contextmanager
+def _existing_server(base: str):
+    yield base
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=20.0, help="동시 접속 수마다 측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="측정 전 동시 1로 보내는 시간(초)")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix(DEFAULT_MIX), help=f"종류=가중치 (기본 {DEFAULT_MIX})")
+    parser.add_argument("--url", default=None, help="이미 떠 있는 서버 (생략 시 직접 실행)")
+    parser.add_argument("--server-workers", type=int, default=1, help="직접 실행할 때 uvicorn 워커 수")
+    parser.add_argument("--pose", choices=("auto", "real", "standin"), default="auto",
+                        help="ZIP 포즈 모델: auto = 가중치가 없으면 가짜 모델")
+    parser.add_argument("--pose-ms", type=float, default=0.0, help="가짜 포즈 모델의 이미지당 CPU 시간(ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="결과를 JSON으로도 저장")
+    args = parser.parse_args()
+
+    uploads = build_uploads(args.seed)
+    sizes = {k: f"{sum(len(u[1]) for u in v) // len(v) / 1024:.0f}KB" for k, v in uploads.items()}
+    print(f"[load_test] 합성 업로드 평균 크기 {sizes}, 비율 {args.mix}")
+
+    if args.url:
+        server = _existing_server(args.url.rstrip("/"))
+    else:
+        standin = args.pose == "standin" or (args.pose == "auto" and not pose_weights_available())
+        if "zip" in args.mix:
+            print(f"[load_test] 포즈 모델: {'가짜 (이미지당 %gms)' % args.pose_ms if standin else '실제 가중치'}")
+        server = local_server(args.server_workers, standin, args.pose_ms)
+
+    levels = []
+    with server as base:
+        if args.warmup > 0:
+            run_level(base, 1, args.warmup, args.mix, uploads, args.seed + 999)
+        for concurrency in args.concurrency:
+            level = run_level(base, concurrency, args.duration, args.mix, uploads, args.seed)
+            _print_level(level)
+            levels.append(level)
+
+    print(f"\n{'동시':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6}")
+    for level in levels:
+        s = level["all"]
+        if s["requests"]:
+            print(
+                f"{level['concurrency']:>6} {s['rps']:>8.2f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+                f"{s['p99_ms']:>8.1f} {s['error_rate'] * 100:>6.1f}"
+            )
+    knee = saturation_point(levels)
+    if knee is not None:
+        print(f"[load_test] 포화 추정: 동시 {knee} 이후 처리량이 {SATURATION_GAIN:.0%} 미만으로 늘어남 (지연만 증가)")
+    if args.json:
+        report = {"mix": args.mix, "server_workers": None if args.url else args.server_workers, "levels": levels,
+                  "saturation_concurrency": knee}
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
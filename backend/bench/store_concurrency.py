@@ -0,0 +1,110 @@
+"""
+프로필·진단 기록 저장소(JSON / SQLite) 동시 쓰기·읽기 측정.
+워커 프로세스 여러 개가 동시에 진단 기록을 추가하면서 목록을 읽고, 끝난 뒤 유실·중복 id를 센다.
+(기본 4 × 25 = 100건 = MAX_HISTORY 이므로 잘림 없이 전부 남아 있어야 정상)
+
+사용법 (프로젝트 루트에서):
+    python -m backend.bench.store_concurrency --workers 4 --appends 25
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import tempfile
+import time
+
+BACKENDS = ("json", "sqlite")
+
+
+def _worker(backend: str, data_dir: str, worker: int, appends: int, barrier, out) -> None:
+    os.environ["PATELLA_STORE"] = backend
+    os.environ["PATELLA_DATA_DIR"] = data_dir
+    from backend import store
+
+    result = {"detail": "x" * 1000, "worker": worker}
+    write_ms, read_ms = [], []
+    empty_reads = 0
+    barrier.wait()
+    for i in range(appends):
+        t0 = time.perf_counter()
+        store.append_diagnosis(
+            date="2026-01-01", time=f"{worker:02d}:{i:02d}", grade="정상", score=90.0, result_snapshot=result
+        )
+        t1 = time.perf_counter()
+        if not store.load_diagnosis_history():
+            empty_reads += 1
+        t2 = time.perf_counter()
+        write_ms.append((t1 - t0) * 1e3)
+        read_ms.append((t2 - t1) * 1e3)
+    out.put({"write_ms": write_ms, "read_ms": read_ms, "empty_reads": empty_reads})
+
+
+def _final_history(backend: str, data_dir: str, out) -> None:
+    os.environ["PATELLA_STORE"] = backend
+    os.environ["PATELLA_DATA_DIR"] = data_dir
+    from backend import store
+
+    out.put(store.load_diagnosis_history())
+
+
+def run(backend: str, workers: int, appends: int) -> dict:
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix=f"store-bench-{backend}-") as data_dir:
+        barrier = ctx.Barrier(workers)
+        out = ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(backend, data_dir, w, appends, barrier, out)) for w in range(workers)
+        ]
+        t0 = time.perf_counter()
+        for p in procs:
+            p.start()
+        stats = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - t0
+        final = ctx.Queue()
+        p = ctx.Process(target=_final_history, args=(backend, data_dir, final))
+        p.start()
+        history = final.get()
+        p.join()
+
+    write_ms = sorted(x for s in stats for x in s["write_ms"])
+    read_ms = sorted(x for s in stats for x in s["read_ms"])
+    expected = workers * appends
+    ids = [h["id"] for h in history]
+
+    def p95(values: list[float]) -> float:
+        return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+    return {
+        "backend": backend,
+        "appends": expected,
+        "stored": len(history),
+        "lost": max(0, min(expected, 100) - len(set(ids))),
+        "duplicate_ids": len(ids) - len(set(ids)),
+        "empty_reads": sum(s["empty_reads"] for s in stats),
+        "write_p50_ms": round(statistics.median(write_ms), 2),
+        "write_p95_ms": round(p95(write_ms), 2),
+        "read_p50_ms": round(statistics.median(read_ms), 2),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--appends", type=int, default=25, help="워커당 추가 건수")
+    parser.add_argument("--backend", choices=BACKENDS, nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+    rows = [run(b, args.workers, args.appends) for b in args.backend]
+    cols = ("backend", "appends", "stored", "lost", "duplicate_ids", "empty_reads",
+            "write_p50_ms", "write_p95_ms", "read_p50_ms", "elapsed_s")
+    print(" ".join(f"{c:>13}" for c in cols))
+    for r in rows:
+        print(" ".join(f"{r[c]!s:>13}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+보호자·반려견별 저장소 부하 측정 (JSON / SQLite).
+보호자 수천 명(각 1~3마리)을 스레드 풀에서 섞어 돌리며 진단 기록 추가·목록 조회·프로필 수정을 반복하고,
+끝난 뒤 반려견마다 기록이 빠짐없이 자기 것만 남아 있는지 확인한다.
+
+사용법 (프로젝트 루트에서):
+    python -m backend.bench.store_owners --owners 2000 --ops 5 --threads 16
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKENDS = ("json", "sqlite")
+
+
+def _load_store(backend: str, data_dir: str):
+    """환경 변수를 바꾼 뒤 store를 다시 읽어 DATA_DIR·저장 방식 반영."""
+    os.environ["PATELLA_STORE"] = backend
+    os.environ["PATELLA_DATA_DIR"] = data_dir
+    os.environ.pop("PATELLA_DB_PATH", None)
+    from backend import store, store_sqlite
+
+    importlib.reload(store)
+    importlib.reload(store_sqlite)
+    return store
+
+
+def _owner_task(store, user_id: str, pets: list[str], ops: int, seed: int) -> dict:
+    """한 보호자의 작업 묶음: 반려견마다 ops번 추가하면서 중간중간 조회·프로필 수정."""
+    rng = random.Random(seed)
+    latency: dict[str, list[float]] = {"append": [], "read": [], "profile": []}
+    for i in range(ops):
+        for pet_id in pets:
+            t0 = time.perf_counter()
+            store.append_diagnosis(
+                date="2026-01-01", time=f"{i:02d}:00", grade="정상", score=90.0,
+                result_snapshot={"owner": user_id, "pet": pet_id, "i": i},
+                user_id=user_id, pet_id=pet_id,
+            )
+            latency["append"].append(time.perf_counter() - t0)
+            if rng.random() < 0.5:
+                t0 = time.perf_counter()
+                store.load_diagnosis_history(user_id=user_id, pet_id=pet_id)
+                latency["read"].append(time.perf_counter() - t0)
+            if rng.random() < 0.1:
+                t0 = time.perf_counter()
+                store.save_profile(name=f"{pet_id}-{i}", user_id=user_id, pet_id=pet_id)
+                latency["profile"].append(time.perf_counter() - t0)
+    return latency
+
+
+def _verify(store, owners: dict[str, list[str]], ops: int) -> dict:
+    """반려견마다 ops건이 모두 있고 다른 보호자·반려견 기록이 섞이지 않았는지."""
+    lost = foreign = 0
+    for user_id, pets in owners.items():
+        for pet_id in pets:
+            history = store.load_diagnosis_history(user_id=user_id, pet_id=pet_id)
+            seen = {h["result"]["i"] for h in history if h["result"]["owner"] == user_id and h["result"]["pet"] == pet_id}
+            foreign += sum(1 for h in history if (h["result"]["owner"], h["result"]["pet"]) != (user_id, pet_id))
+            lost += ops - len(seen)
+    return {"lost": lost, "foreign": foreign}
+
+
+def run(backend: str, n_owners: int, ops: int, threads: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    owners = {f"u{u:05d}": [f"p{k}" for k in range(rng.randint(1, 3))] for u in range(n_owners)}
+    with tempfile.TemporaryDirectory(prefix=f"store-owners-{backend}-") as data_dir:
+        store = _load_store(backend, data_dir)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            stats = list(
+                pool.map(lambda item: _owner_task(store, item[1][0], item[1][1], ops, seed + item[0]),
+                         enumerate(owners.items()))
+            )
+        elapsed = time.perf_counter() - t0
+        check = _verify(store, owners, ops)
+
+    def pct(values: list[float], q: float) -> float:
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(len(values) * q))] * 1e3, 2) if values else 0.0
+
+    merged = {k: [x for s in stats for x in s[k]] for k in ("append", "read", "profile")}
+    total_ops = sum(len(v) for v in merged.values())
+    return {
+        "backend": backend,
+        "owners": n_owners,
+        "pets": sum(len(p) for p in owners.values()),
+        "ops": total_ops,
+        "ops_per_s": round(total_ops / elapsed, 1),
+        "append_p50_ms": round(statistics.median(merged["append"]) * 1e3, 2),
+        "append_p95_ms": pct(merged["append"], 0.95),
+        "read_p95_ms": pct(merged["read"], 0.95),
+        "lost": check["lost"],
+        "foreign": check["foreign"],
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owners", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=5, help="반려견당 추가 건수 (MAX_HISTORY 이하)")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=BACKENDS, nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+    rows = [run(b, args.owners, args.ops, args.threads, args.seed) for b in args.backend]
+    cols = ("backend", "owners", "pets", "ops", "ops_per_s", "append_p50_ms", "append_p95_ms",
+            "read_p95_ms", "lost", "foreign", "elapsed_s")
+    print(" ".join(f"{c:>13}" for c in cols))
+    for r in rows:
+        print(" ".join(f"{r[c]!s:>13}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
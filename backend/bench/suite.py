@@ -0,0 +1,419 @@
+"""
+백엔드 주요 경로 벤치마크 모음 + 기준선(JSON) 비교. 입력은 전부 합성 데이터 (네트워크·GPU·가중치 파일 불필요).
+    features.*  : build_27_features
+    frame.*     : preprocess._extract_frame_features (720p 프레임)
+    model.*     : DogPatellaModel forward (배치 1 / 64 / 1024, 무작위 가중치)
+    threshold.* : inference._apply_threshold
+    zip.*       : pose_to_features.zip_to_frame_features (JPEG 32장, 압축 해제·디코딩·특징 — 포즈 모델은 load_server.StandInPoseModel)
+    preprocess.*: preprocess_logic (JPEG 사진 / 2초 mp4 영상)
+    walk.*      : recommend_walkway, get_walk_routes (무작위 국내 좌표, 합성 코스 2만 개)
+    store.*     : 진단 기록 append_diagnosis / load_diagnosis_history (JSON / SQLite, 기록 MAX_HISTORY건 채운 상태)
+- 벤치마크마다 한 번 잴 때 --min-time 초 이상 걸리도록 반복 횟수를 정하고 --repeats 번 재서 호출당 최소 시간을 기록
+- --save: 결과를 기준선 JSON에 저장 (--only 로 일부만 돌리면 해당 항목만 갱신)
+- --compare: 기준선보다 (1 + --tolerance) 배 넘게 느려진 항목이 있으면 종료 코드 1
+  (기준선은 같은 기계·같은 스레드 수에서 만든 것과 비교해야 의미가 있음)
+
+사용법 (프로젝트 루트에서):
+    python -m backend.bench.suite --save                      # 기준선 저장 (기본 backend/bench/baseline.json)
+    python -m backend.bench.suite --compare [--tolerance 0.25]
+    python -m backend.bench.suite --only walk store --compare  # 이름에 포함된 항목만
+    python -m backend.bench.suite --list
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+import torch
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+# 국내 주요 도시 중심 (합성 코스·조회 좌표를 이 주변에 몰아서 생성)
+CITIES = (
+    (37.5665, 126.9780), (35.1796, 129.0756), (35.8714, 128.6014),
+    (37.4563, 126.7052), (35.1595, 126.8526), (36.3504, 127.3845), (33.4996, 126.5312),
+)
+SYNTHETIC_COURSES = 20000
+
+# 이름 → setup(rng, tmp_dir). setup은 입력을 만들고 잴 함수(인자 없음)를 반환
+BENCHMARKS: dict[str, Callable[[random.Random, str], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _cycle(items: list):
+    """호출마다 다음 입력 (같은 입력만 반복해 캐시 효과로 빨라지지 않게)."""
+    it = iter(())
+
+    def next_item():
+        nonlocal it
+        try:
+            return next(it)
+        except StopIteration:
+            it = iter(items)
+            return next(it)
+    return next_item
+
+
+def _random_joints(rng: random.Random) -> dict[str, tuple[float, float]]:
+    from ..preprocess import TARGET_LABELS
+
+    return {label: (rng.uniform(0, 1920), rng.uniform(0, 1080)) for label in TARGET_LABELS if rng.random() > 0.1}
+
+
+def _synthetic_frame(rng: random.Random, w: int = 1280, h: int = 720) -> np.ndarray:
+    """잡음 배경 + 밝은 타원 몇 개 (컨투어 기반 키포인트가 잡히도록)."""
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    frame = np_rng.integers(0, 60, size=(h, w, 3), dtype=np.uint8)
+    for _ in range(6):
+        center = (rng.randrange(w), rng.randrange(h // 2, h))
+        axes = (rng.randrange(20, 120), rng.randrange(20, 80))
+        cv2.ellipse(frame, center, axes, rng.uniform(0, 180), 0, 360, (220, 220, 220), -1)
+    return frame
+
+
+def _jpeg(frame: np.ndarray) -> bytes:
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    assert ok
+    return buf.tobytes()
+
+
+def _korean_point(rng: random.Random) -> tuple[float, float]:
+    lat, lon = rng.choice(CITIES)
+    return lat + rng.gauss(0, 0.08), lon + rng.gauss(0, 0.08)
+
+
+@benchmark("features.build_27_features")
+def _bench_features(rng, tmp):
+    from ..feature_extract import build_27_features
+
+    inputs = _cycle([(_random_joints(rng), rng.random() < 0.5, rng.choice((0.0, 0.5, 1.0))) for _ in range(256)])
+
+    def run():
+        joints, side, size = inputs()
+        return build_27_features(joints, side=float(side), dog_size=size)
+    return run
+
+
+@benchmark("frame.extract_frame_features-720p")
+def _bench_frame(rng, tmp):
+    from ..preprocess import _extract_frame_features
+
+    frames = _cycle([_synthetic_frame(rng) for _ in range(4)])
+    return lambda: _extract_frame_features(frames())
+
+
+def _model_bench(batch: int):
+    def setup(rng, tmp):
+        from ..model import DogPatellaModel
+
+        torch.manual_seed(rng.randrange(2 ** 31))
+        model = DogPatellaModel().eval()
+        x = torch.rand(batch, 27)
+
+        def run():
+            with torch.inference_mode():
+                return model(x)
+        return run
+    return setup
+
+
+for _batch in (1, 64, 1024):
+    benchmark(f"model.forward-b{_batch}")(_model_bench(_batch))
+
+
+@benchmark("threshold.apply_threshold")
+def _bench_threshold(rng, tmp):
+    from ..inference import _apply_threshold
+
+    probs = np.random.default_rng(rng.randrange(2 ** 32)).dirichlet((1.0, 1.0, 1.0), size=256)
+    rows = _cycle(list(probs))
+    return lambda: _apply_threshold(rows())
+
+
+@benchmark("zip.zip_to_frame_features-32")
+def _bench_zip(rng, tmp):
+    from ..pose_to_features import zip_to_frame_features
+    from .load_server import StandInPoseModel
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        for i in range(32):
+            zf.writestr(f"frames/{i:03d}.jpg", _jpeg(_synthetic_frame(rng, 640, 480)))
+    body = buf.getvalue()
+    pose_model = StandInPoseModel()
+    return lambda: zip_to_frame_features(body, pose_model)
+
+
+@benchmark("preprocess.image-jpeg-720p")
+def _bench_preprocess_image(rng, tmp):
+    from ..preprocess import preprocess_logic
+
+    body = _jpeg(_synthetic_frame(rng))
+    return lambda: preprocess_logic(body, "image/jpeg")
+
+
+@benchmark("preprocess.video-mp4-2s")
+def _bench_preprocess_video(rng, tmp):
+    from ..preprocess import preprocess_logic
+
+    path = os.path.join(tmp, "bench.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 15, (640, 360))
+    if not writer.isOpened():
+        raise RuntimeError("OpenCV cannot write mp4v video")
+    base = _synthetic_frame(rng, 640, 360)
+    for i in range(30):
+        writer.write(np.roll(base, i * 4, axis=1))
+    writer.release()
+    body = Path(path).read_bytes()
+    return lambda: preprocess_logic(body, "video/mp4")
+
+
+_courses_ready = False
+
+
+def _publish_synthetic_courses(rng: random.Random) -> None:
+    """합성 코스(공원·걷기길 섞어서)로 walk_routes 현재 데이터를 교체 (CSV·스냅샷 안 씀)."""
+    global _courses_ready
+    if _courses_ready:
+        return
+    from .. import walk_routes
+    from ..course_snapshot import CourseDataset, build_columns
+
+    park_types = ("근린공원", "어린이공원", "수변공원", "체육공원", "")
+    words = ("평지", "경사", "오르막", "하천", "숲길", "둘레길", "잔디", "산책로")
+    courses = []
+    for i in range(SYNTHETIC_COURSES):
+        lat, lon = _korean_point(rng)
+        park = rng.random() < 0.6
+        desc = f"{rng.choice(words)} {rng.choice(words)} 코스 {i}"
+        courses.append({
+            "id": f"bench_{i}",
+            "address": f"합성시 {i % 50}구",
+            "name": f"{'공원' if park else '걷기길'} {i}",
+            "length_km": None if park else round(rng.uniform(0.5, 12.0), 1),
+            "slope": "없음" if park or rng.random() < 0.5 else "있음",
+            "lat": lat,
+            "lon": lon,
+            "description": desc,
+            "description_full": desc,
+            "source": "park" if park else "walk",
+            "difficulty": "쉬움" if park else rng.choice(walk_routes.DIFFICULTY_ORDER),
+            "park_type": rng.choice(park_types) if park else "",
+            "reason_tags": ["산책로"],
+        })
+    columns = build_columns(courses)
+    columns.update(walk_routes._derive_columns(CourseDataset(columns)))
+    walk_routes._publish(CourseDataset(columns, "bench"), "bench", None)
+    _courses_ready = True
+
+
+@benchmark("walk.recommend_walkway")
+def _bench_recommend(rng, tmp):
+    from ..walk_routes import recommend_walkway
+
+    _publish_synthetic_courses(rng)
+    queries = _cycle([(rng.choice(("정상", "1기", "3기")), *_korean_point(rng)) for _ in range(256)])
+
+    def run():
+        grade, lat, lon = queries()
+        return recommend_walkway(grade, lat, lon)
+    return run
+
+
+@benchmark("walk.get_walk_routes")
+def _bench_walk_routes(rng, tmp):
+    from ..walk_routes import get_walk_routes
+
+    _publish_synthetic_courses(rng)
+    queries = _cycle([
+        (rng.choice(("normal", "easy", "rehab")), *_korean_point(rng), rng.choice((None, "flat", "short")))
+        for _ in range(256)
+    ])
+
+    def run():
+        filter_type, lat, lon, category = queries()
+        return get_walk_routes(filter_type, 100, lat, lon, category)
+    return run
+
+
+def _load_store(backend: str, data_dir: str):
+    """환경 변수를 바꾼 뒤 store를 다시 읽어 DATA_DIR·저장 방식 반영 (store_owners.py 와 같은 방식)."""
+    os.environ["PATELLA_STORE"] = backend
+    os.environ["PATELLA_DATA_DIR"] = data_dir
+    os.environ.pop("PATELLA_DB_PATH", None)
+    from .. import store, store_sqlite
+
+    importlib.reload(store)
+    importlib.reload(store_sqlite)
+    return store
+
+
+def _store_bench(backend: str, op: str):
+    def setup(rng, tmp):
+        store = _load_store(backend, os.path.join(tmp, f"store-{backend}-{op}"))
+        result = {"status": "1기", "confidence": 72.5, "detail": "x" * 500}
+        for i in range(store.MAX_HISTORY):
+            store.append_diagnosis("2026-01-01", f"{i % 24:02d}:00", "1기", 72.5, result, "bench", "pet")
+        if op == "append":
+            return lambda: store.append_diagnosis("2026-01-02", "12:00", "정상", 90.0, result, "bench", "pet")
+        return lambda: store.load_diagnosis_history("bench", "pet")
+    return setup
+
+
+for _backend in ("json", "sqlite"):
+    for _op in ("append", "read"):
+        benchmark(f"store.{_backend}-{_op}")(_store_bench(_backend, _op))
+
+
+def measure(run: Callable[[], object], repeats: int, min_time: float) -> dict:
+    """한 번 잴 때 min_time 초 이상이 되도록 반복 횟수를 늘린 뒤 repeats 번. 반환: 호출당 초 (최소·중앙값)."""
+    run()
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed * 1.2) + 1))
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            run()
+        samples.append((time.perf_counter() - t0) / loops)
+    samples.sort()
+    return {"seconds": samples[0], "median": samples[len(samples) // 2], "loops": loops}
+
+
+def machine_info(threads: int) -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "threads": threads,
+        "torch": torch.__version__,
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def run_suite(names: list[str], repeats: int, min_time: float, seed: int) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        for name in names:
+            run = BENCHMARKS[name](random.Random(f"{seed}:{name}"), tmp)
+            results[name] = measure(run, repeats, min_time)
+            r = results[name]
+            print(f"[suite] {name:<36} {_fmt(r['seconds']):>10}  (중앙값 {_fmt(r['median'])}, {r['loops']}회 × {repeats})")
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict, tolerance: float) -> list[str]:
+    """기준선 대비 비율 출력. 반환: tolerance 넘게 느려진 항목 이름."""
+    base = baseline.get("results", {})
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, r in results.items():
+        if name not in base:
+            print(f"{name:<36} {'-':>10} {_fmt(r['seconds']):>10} {'new':>7}")
+            continue
+        ratio = r["seconds"] / base[name]["seconds"]
+        slow = ratio > 1.0 + tolerance
+        if slow:
+            regressions.append(name)
+        print(
+            f"{name:<36} {_fmt(base[name]['seconds']):>10} {_fmt(r['seconds']):>10} {ratio:>6.2f}x"
+            + ("  ← 느려짐" if slow else "")
+        )
+    return regressions
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1.0:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f}ms"
+    return f"{seconds * 1e6:.2f}us"
+
+
+def _select(patterns: list[str] | None) -> list[str]:
+    if not patterns:
+        return list(BENCHMARKS)
+    names = [n for n in BENCHMARKS if any(p in n for p in patterns)]
+    if not names:
+        raise SystemExit(f"[suite] no benchmark matches {patterns}")
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", default=None, help="이름에 이 문자열이 들어간 벤치마크만")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="결과를 기준선에 저장")
+    parser.add_argument("--compare", action="store_true", help="기준선과 비교해 느려지면 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="허용 비율 (0.25 = 25%% 느려짐까지)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="한 번 잴 때 최소 시간(초)")
+    parser.add_argument("--threads", type=int, default=1, help="torch·OpenCV 스레드 수 (기준선과 같게)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--list", action="store_true", help="벤치마크 이름만 출력")
+    args = parser.parse_args()
+
+    names = _select(args.only)
+    if args.list:
+        print("\n".join(names))
+        return
+    torch.set_num_threads(args.threads)
+    cv2.setNumThreads(args.threads)
+
+    baseline = None
+    if args.compare:
+        if not args.baseline.is_file():
+            raise SystemExit(f"[suite] baseline not found: {args.baseline} (먼저 --save)")
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        machine = machine_info(args.threads)
+        differs = [k for k in ("machine", "cpu_count", "threads", "torch") if baseline.get("machine", {}).get(k) != machine[k]]
+        if differs:
+            print(f"[suite] 경고: 기준선과 실행 환경이 다름 ({', '.join(differs)}) — 비교 결과가 부정확할 수 있음")
+
+    results = run_suite(names, args.repeats, args.min_time, args.seed)
+
+    regressions = compare(results, baseline, args.tolerance) if baseline is not None else []
+    if args.save:
+        saved = {"results": {}}
+        if args.baseline.is_file():
+            saved = json.loads(args.baseline.read_text(encoding="utf-8"))
+        saved["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        saved["machine"] = machine_info(args.threads)
+        saved.setdefault("results", {}).update(results)
+        args.baseline.write_text(json.dumps(saved, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[suite] 기준선 저장 ({len(results)}개) → {args.baseline}")
+    if regressions:
+        print(f"[suite] {len(regressions)}개 항목이 기준선보다 {args.tolerance:.0%} 넘게 느려짐: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+학습 데이터 로더 처리량 측정 (샘플/초).
+가짜 라벨 JSON을 만들어 캐시(train_cache.py)를 만든 뒤, 증강 켠 상태로 한 epoch씩 돌려 비교한다.
+    dataloader-wN : 기존 방식, DataLoader(DogJointDataset, num_workers=N) — 샘플마다 __getitem__ 증강
+    batch         : train_augment.BatchLoader — 배치 단위 텐서 증강 + 27차원 특징 재계산
+증강 없이 BatchLoader 특징이 DogJointDataset.__getitem__ 과 같은지도 확인한다.
+
+사용법 (프로젝트 루트에서):
+    python -m backend.bench.train_loader [--samples 20000] [--batch-size 256] [--workers 0 2] [--device cpu]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import torch
+from torch.utils.data import DataLoader
+
+from backend.Data_AI_Final import DogJointDataset
+from backend.train_augment import BatchLoader
+from backend.train_cache import SIZE_MAP, TARGET_LABELS, TARGET_MAP
+
+
+def _write_samples(root_dir: str, n: int, seed: int) -> None:
+    """정상/1기/3기 폴더에 annotation_info JSON n개 (관절은 10% 확률로 누락)."""
+    rng = random.Random(seed)
+    folders = list(TARGET_MAP)
+    for folder in folders:
+        os.makedirs(os.path.join(root_dir, folder), exist_ok=True)
+    for i in range(n):
+        data = {
+            "annotation_info": [
+                {"label": t, "x": rng.uniform(0, 1920), "y": rng.uniform(0, 1080)}
+                for t in TARGET_LABELS if rng.random() > 0.1
+            ],
+            "pet_medical_record_info": [{"value": 1, "foot_position": rng.choice(["left", "right"])}],
+            "size": rng.choice(list(SIZE_MAP)),
+        }
+        with open(os.path.join(root_dir, folders[i % 3], f"{i:06d}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def _epoch(loader, device: torch.device) -> tuple[int, float]:
+    """한 epoch 동안 배치를 device 로 옮기기까지. 반환: (샘플 수, 초)."""
+    t0 = time.perf_counter()
+    n = 0
+    for feat, tar in loader:
+        feat, tar = feat.to(device), tar.to(device)
+        n += len(tar)
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return n, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2], help="비교할 DataLoader num_workers")
+    parser.add_argument("--epochs", type=int, default=3, help="방식마다 반복 (첫 epoch는 워밍업으로 제외)")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    device = torch.device(args.device)
+
+    with tempfile.TemporaryDirectory(prefix="train-loader-") as tmp:
+        root_dir = os.path.join(tmp, "TL")
+        _write_samples(root_dir, args.samples, args.seed)
+        train = DogJointDataset(root_dir, transform=True)
+        plain = DogJointDataset(root_dir, transform=False, refresh=False)
+
+        check = BatchLoader(plain, batch_size=len(plain), augment=False)
+        expected = torch.stack([plain[i][0] for i in range(len(plain))])
+        diff = (next(iter(check))[0] - expected).abs().max().item()
+
+        loaders = {
+            f"dataloader-w{w}": DataLoader(
+                train, batch_size=args.batch_size, shuffle=True, num_workers=w,
+                pin_memory=device.type == "cuda", persistent_workers=w > 0,
+            )
+            for w in args.workers
+        }
+        loaders["batch"] = BatchLoader(train, batch_size=args.batch_size, shuffle=True, augment=True, device=device)
+
+        rows = []
+        for name, loader in loaders.items():
+            times = []
+            for _ in range(args.epochs):
+                n, elapsed = _epoch(loader, device)
+                times.append(elapsed)
+            best = min(times[1:] or times)
+            rows.append((name, n, best, n / best))
+
+    print(f"[train_loader] 증강 없는 특징 차이 (BatchLoader vs __getitem__): max |Δ| = {diff:.2e}")
+    base = rows[0][3]
+    print(f"{'loader':>16} {'samples':>8} {'epoch_s':>8} {'samples_per_s':>14} {'speedup':>8}")
+    for name, n, best, rate in rows:
+        print(f"{name:>16} {n:>8} {best:>8.3f} {rate:>14.0f} {rate / base:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
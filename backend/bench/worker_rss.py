@@ -0,0 +1,142 @@
+"""
+uvicorn 워커 수별 워커당 메모리(RSS/PSS) 측정.
+코스 스냅샷을 mmap으로 공유하므로 워커를 늘려도 워커당 코스 데이터 PSS는 거의 늘지 않아야 한다.
+
+사용법 (프로젝트 루트에서, Linux /proc 필요):
+    python -m backend.bench.worker_rss --workers 1 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+from ..course_snapshot import SNAPSHOT_ROOT
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int) -> list[int]:
+    out = []
+    for p in Path("/proc").iterdir():
+        if not p.name.isdigit():
+            continue
+        try:
+            stat = (p / "stat").read_text()
+        except OSError:
+            continue
+        # pid (comm) state ppid ...
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid:
+            out.append(int(p.name))
+    return out
+
+
+def _memory_kb(pid: int) -> dict[str, int]:
+    """
+    VmRSS, PSS(공유 페이지를 공유 프로세스 수로 나눈 값), 그리고 코스 스냅샷 mmap 영역의 RSS/PSS (kB).
+    """
+    mem = {"rss_kb": 0, "pss_kb": 0, "snapshot_rss_kb": 0, "snapshot_pss_kb": 0}
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            mem["rss_kb"] = int(line.split()[1])
+    snapshot_root = str(SNAPSHOT_ROOT.resolve())
+    in_snapshot = False
+    for line in Path(f"/proc/{pid}/smaps").read_text().splitlines():
+        parts = line.split()
+        if len(parts) >= 5 and "-" in parts[0]:
+            in_snapshot = len(parts) >= 6 and parts[5].startswith(snapshot_root)
+        elif parts and parts[0] in ("Rss:", "Pss:"):
+            kb = int(parts[1])
+            key = "rss_kb" if parts[0] == "Rss:" else "pss_kb"
+            if key == "pss_kb":
+                mem["pss_kb"] += kb
+            if in_snapshot:
+                mem["snapshot_" + key] += kb
+    return mem
+
+
+def _get(url: str) -> dict | list:
+    with urllib.request.urlopen(url, timeout=10) as r:
+        return json.loads(r.read().decode("utf-8"))
+
+
+def measure(workers: int, warmup_requests: int = 50) -> dict:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 180
+        while time.monotonic() < deadline:
+            try:
+                if _get(f"{base}/health").get("courses_loaded"):
+                    break
+            except OSError:
+                pass
+            time.sleep(0.5)
+        else:
+            raise RuntimeError("server did not become ready")
+        # 모든 워커가 코스 경로를 한 번 이상 타도록 요청 분산
+        for i in range(warmup_requests * workers):
+            query = urllib.parse.urlencode(
+                {"latitude": 37.4 + (i % 10) * 0.02, "longitude": 127.0, "diagnosis_grade": "정상"}
+            )
+            _get(f"{base}/api/walk-routes?{query}")
+        time.sleep(1.0)
+        # --workers 1이면 uvicorn 프로세스가 곧 워커, N>1이면 마스터의 자식(워커) 프로세스
+        pids = [proc.pid] if workers == 1 else _children(proc.pid)
+        per_worker = [_memory_kb(p) for p in pids]
+        per_worker = [m for m in per_worker if m["snapshot_rss_kb"] > 0] or per_worker
+
+        def avg_mb(key: str) -> float:
+            return round(sum(m[key] for m in per_worker) / len(per_worker) / 1024, 1)
+
+        return {
+            "workers": workers,
+            "processes": len(per_worker),
+            "avg_rss_mb": avg_mb("rss_kb"),
+            "avg_pss_mb": avg_mb("pss_kb"),
+            "avg_snapshot_rss_mb": avg_mb("snapshot_rss_kb"),
+            "avg_snapshot_pss_mb": avg_mb("snapshot_pss_kb"),
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+    if not Path("/proc/self/status").is_file():
+        sys.exit("Linux /proc 가 필요합니다.")
+    rows = [measure(n) for n in args.workers]
+    print(f"{'workers':>7} {'procs':>5} {'RSS MB':>8} {'PSS MB':>8} {'snap RSS MB':>11} {'snap PSS MB':>11}  (워커당 평균)")
+    for r in rows:
+        print(
+            f"{r['workers']:>7} {r['processes']:>5} {r['avg_rss_mb']:>8} {r['avg_pss_mb']:>8}"
+            f" {r['avg_snapshot_rss_mb']:>11} {r['avg_snapshot_pss_mb']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+산책로 코스 데이터 바이너리 스냅샷.
+- CSV 두 개의 내용 해시(fingerprint)로 유효성 판단 → 바뀌면 재생성
+- 숫자 컬럼은 .npy, 문자열은 UTF-8 string table(바이트 + 오프셋)로 저장
+- 걷기길 구간 목록(segment_*)은 코스별 오프셋 + 구간 컬럼(CSR)으로 저장
+- 위경도 격자 공간 인덱스(grid_*), 키워드 역색인(kw_*)도 같은 디렉터리에 저장
+- 로드 시 np.load(mmap_mode="r")로 매핑 → 여러 uvicorn 워커가 같은 페이지 캐시를 읽기 전용으로 공유
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent
+SNAPSHOT_ROOT = Path(os.environ.get("COURSE_SNAPSHOT_DIR") or BACKEND_DIR / "data" / "course_snapshot")
+
+# 스냅샷 포맷·파싱 규칙이 바뀌면 올려서 기존 스냅샷 무효화
+SNAPSHOT_FORMAT = 5
+
+# 코스 dict의 문자열 필드 → string table 인덱스(int32) 컬럼
+STRING_FIELDS = (
+    "id", "address", "name", "description", "description_full",
+    "source", "difficulty", "slope", "park_type",
+)
+TAG_SEPARATOR = "\x1f"
+# 걷기길 구간(segments) 문자열 필드. 구간은 segment_offsets(코스별 시작 위치) CSR로 저장
+SEGMENT_STRING_FIELDS = ("name", "difficulty", "description")
+
+# 키워드 역색인 대상 문자열 필드. 소문자로 바꾼 뒤 1·2글자 n-gram(코드포인트) → 코스 인덱스 posting (CSR)
+KEYWORD_FIELDS = ("name", "park_type", "description_full")
+# bigram 코드 = 앞 글자 << 21 | 뒷 글자 (유니코드 코드포인트 < 2**21 이므로 unigram 코드와 겹치지 않음)
+_GRAM_SHIFT = 21
+
+# 공간 인덱스 격자 크기(도). 0.05° ≈ 위도 5.5km
+GRID_DEG = 0.05
+_GRID_STRIDE = 1 << 16
+_GRID_OFFSET = 1 << 14
+# Haversine R=6371km 기준 위도 1도 길이(km)
+KM_PER_DEG = 6371.0 * math.pi / 180.0
+
+# 다른 워커가 스냅샷을 만드는 중일 때 기다리는 최대 시간(초). 넘으면 lock을 무시하고 직접 생성
+BUILD_LOCK_TIMEOUT = 120.0
+
+
+def csv_fingerprint(*paths: Path) -> str:
+    """CSV 파일 내용 + 포맷 버전 sha256. 파일이 없으면 'missing'으로 반영."""
+    h = hashlib.sha256(f"format={SNAPSHOT_FORMAT}".encode())
+    for path in paths:
+        h.update(str(Path(path).name).encode())
+        if not Path(path).is_file():
+            h.update(b"missing")
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def snapshot_dir(fingerprint: str) -> Path:
+    return SNAPSHOT_ROOT / fingerprint[:16]
+
+
+class _StringTable:
+    """중복 제거된 문자열 → 인덱스. 저장 시 UTF-8 바이트 연결 + 오프셋."""
+
+    def __init__(self):
+        self._index: dict[str, int] = {}
+        self._items: list[bytes] = []
+
+    def add(self, s: str) -> int:
+        idx = self._index.get(s)
+        if idx is None:
+            idx = len(self._items)
+            self._index[s] = idx
+            self._items.append(s.encode("utf-8"))
+        return idx
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        offsets = np.zeros(len(self._items) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in self._items], out=offsets[1:])
+        blob = np.frombuffer(b"".join(self._items), dtype=np.uint8)
+        return blob, offsets
+
+
+def _cell_rows_cols(lat: np.ndarray, lon: np.ndarray, deg: float = GRID_DEG) -> tuple[np.ndarray, np.ndarray]:
+    rows = np.floor(np.asarray(lat, dtype=np.float64) / deg).astype(np.int64) + _GRID_OFFSET
+    cols = np.floor(np.asarray(lon, dtype=np.float64) / deg).astype(np.int64) + _GRID_OFFSET
+    return rows, cols
+
+
+def cell_keys(lat: np.ndarray, lon: np.ndarray, deg: float = GRID_DEG) -> np.ndarray:
+    """위경도 → deg 크기 격자 셀 키(int64)."""
+    rows, cols = _cell_rows_cols(lat, lon, deg)
+    return rows * _GRID_STRIDE + cols
+
+
+def cell_bounds(key: int, deg: float = GRID_DEG) -> tuple[float, float, float, float]:
+    """셀 키 → (lat_min, lat_max, lon_min, lon_max)."""
+    row, col = divmod(int(key), _GRID_STRIDE)
+    lat_min = (row - _GRID_OFFSET) * deg
+    lon_min = (col - _GRID_OFFSET) * deg
+    return lat_min, lat_min + deg, lon_min, lon_min + deg
+
+
+def _build_grid(lat: np.ndarray, lon: np.ndarray) -> dict[str, np.ndarray]:
+    """격자 셀 키로 정렬한 코스 인덱스(grid_order) + 셀 키(grid_keys) + 셀별 시작 위치(grid_offsets)."""
+    keys = cell_keys(lat, lon)
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    uniq, starts = np.unique(keys[order], return_index=True)
+    offsets = np.append(starts, len(order)).astype(np.int64)
+    return {"grid_keys": uniq.astype(np.int64), "grid_offsets": offsets, "grid_order": order}
+
+
+def _grams(text: str) -> set[int]:
+    """text의 1·2글자 n-gram 코드. 공백이 낀 gram은 제외 (검색어는 공백으로 나눠 조회)."""
+    out: set[int] = set()
+    prev = 0
+    for ch in text:
+        if ch.isspace():
+            prev = 0
+            continue
+        cp = ord(ch)
+        out.add(cp)
+        if prev:
+            out.add(prev << _GRAM_SHIFT | cp)
+        prev = cp
+    return out
+
+
+def _term_grams(term: str) -> list[int]:
+    """검색어(공백 없음)를 덮는 gram 코드. 1글자면 unigram, 아니면 연속 bigram 전부."""
+    if len(term) == 1:
+        return [ord(term)]
+    return sorted({ord(a) << _GRAM_SHIFT | ord(b) for a, b in zip(term, term[1:])})
+
+
+def _build_keyword_index(texts: list[str]) -> dict[str, np.ndarray]:
+    """gram 코드 오름차순(kw_codes) + gram별 시작 위치(kw_offsets) + 코스 인덱스 posting(kw_postings, gram 안에서 오름차순)."""
+    codes: list[int] = []
+    docs: list[int] = []
+    for i, text in enumerate(texts):
+        grams = _grams(text)
+        codes.extend(grams)
+        docs.extend([i] * len(grams))
+    codes_arr = np.array(codes, dtype=np.int64)
+    docs_arr = np.array(docs, dtype=np.int32)
+    order = np.lexsort((docs_arr, codes_arr))
+    uniq, starts = np.unique(codes_arr[order], return_index=True)
+    return {
+        "kw_codes": uniq.astype(np.int64),
+        "kw_offsets": np.append(starts, len(order)).astype(np.int64),
+        "kw_postings": docs_arr[order],
+    }
+
+
+def _keyword_text(values: list[str]) -> str:
+    # 필드 사이를 줄바꿈으로 이어 필드 경계를 넘는 gram·부분 문자열이 생기지 않게 함
+    return "\n".join(values).lower()
+
+
+def build_columns(courses: list[dict], extra_columns: dict[str, np.ndarray] | None = None) -> dict[str, np.ndarray]:
+    """코스 dict 리스트 → 스냅샷 컬럼(숫자·문자열 인덱스·string table·공간 인덱스·키워드 역색인)."""
+    table = _StringTable()
+    columns: dict[str, np.ndarray] = {
+        "lat": np.array([c["lat"] for c in courses], dtype=np.float64),
+        "lon": np.array([c["lon"] for c in courses], dtype=np.float64),
+        "length_km": np.array(
+            [np.nan if c.get("length_km") is None else c["length_km"] for c in courses],
+            dtype=np.float64,
+        ),
+    }
+    for field in STRING_FIELDS:
+        columns[field] = np.array([table.add(c.get(field) or "") for c in courses], dtype=np.int32)
+    columns["reason_tags"] = np.array(
+        [table.add(TAG_SEPARATOR.join(c.get("reason_tags") or [])) for c in courses], dtype=np.int32
+    )
+    segments = [seg for c in courses for seg in c.get("segments") or []]
+    columns["segment_offsets"] = np.concatenate(
+        [[0], np.cumsum([len(c.get("segments") or []) for c in courses], dtype=np.int64)]
+    ).astype(np.int64)
+    columns["segment_length_km"] = np.array(
+        [np.nan if seg.get("length_km") is None else seg["length_km"] for seg in segments], dtype=np.float64
+    )
+    for field in SEGMENT_STRING_FIELDS:
+        columns[f"segment_{field}"] = np.array([table.add(seg.get(field) or "") for seg in segments], dtype=np.int32)
+    columns["strings"], columns["string_offsets"] = table.arrays()
+    columns.update(_build_grid(columns["lat"], columns["lon"]))
+    columns.update(_build_keyword_index([_keyword_text([c.get(f) or "" for f in KEYWORD_FIELDS]) for c in courses]))
+    for name, arr in (extra_columns or {}).items():
+        columns[name] = np.asarray(arr)
+    return columns
+
+
+def save_snapshot(columns: dict[str, np.ndarray], fingerprint: str) -> Path:
+    """컬럼을 스냅샷 디렉터리에 저장. 임시 디렉터리에 쓴 뒤 rename으로 교체(원자적)."""
+    SNAPSHOT_ROOT.mkdir(parents=True, exist_ok=True)
+    target = snapshot_dir(fingerprint)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=SNAPSHOT_ROOT))
+    try:
+        for name, arr in columns.items():
+            np.save(tmp / f"{name}.npy", arr, allow_pickle=False)
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "fingerprint": fingerprint,
+            "count": int(len(columns["lat"])),
+            "grid_deg": GRID_DEG,
+            "created_at": time.time(),
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # 다른 프로세스가 먼저 같은 스냅샷을 만든 경우
+            if not (target / "meta.json").is_file():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    _remove_stale_snapshots(keep=target)
+    return target
+
+
+def _remove_stale_snapshots(keep: Path) -> None:
+    for p in SNAPSHOT_ROOT.iterdir():
+        if p.is_dir() and p != keep and not p.name.startswith(".tmp-"):
+            shutil.rmtree(p, ignore_errors=True)
+
+
+@contextmanager
+def snapshot_build_lock(fingerprint: str):
+    """
+    프로세스 간 스냅샷 생성 lock (O_EXCL lock 파일, Windows/Linux 공용).
+    워커 N개가 동시에 시작해도 CSV 파싱은 한 번만 하고 나머지는 완성된 스냅샷을 attach.
+    """
+    SNAPSHOT_ROOT.mkdir(parents=True, exist_ok=True)
+    lock_path = SNAPSHOT_ROOT / f".build-{fingerprint[:16]}.lock"
+    deadline = time.monotonic() + BUILD_LOCK_TIMEOUT
+    fd = None
+    while fd is None:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                stale = time.time() - lock_path.stat().st_mtime > BUILD_LOCK_TIMEOUT
+            except OSError:
+                continue
+            if stale:
+                lock_path.unlink(missing_ok=True)
+                continue
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+    try:
+        yield
+    finally:
+        if fd is not None:
+            os.close(fd)
+            lock_path.unlink(missing_ok=True)
+
+
+def _load_mmap(path: Path) -> np.ndarray:
+    """읽기 전용 mmap .npy. np.memmap 서브클래스는 인덱싱마다 오버헤드가 있어 같은 버퍼의 ndarray 뷰로 반환."""
+    return np.asarray(np.load(path, mmap_mode="r", allow_pickle=False))
+
+
+class CourseDataset:
+    """
+    스냅샷 컬럼 위의 읽기 전용 코스 테이블.
+    숫자·공간 인덱스 컬럼은 numpy 배열(mmap)로 바로 쓰고, 코스 dict는 필요한 행만 string table에서 만든다.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], fingerprint: str | None = None, path: Path | None = None):
+        self.columns = columns
+        self.fingerprint = fingerprint
+        # 스냅샷 디렉터리 (mmap 연결 시). 메모리에만 있는 경우 None
+        self.path = path
+        self.lat = columns["lat"]
+        self.lon = columns["lon"]
+        self._blob = columns["strings"]
+        self._offsets = columns["string_offsets"]
+
+    @classmethod
+    def attach(cls, fingerprint: str) -> CourseDataset | None:
+        """fingerprint가 일치하는 스냅샷을 mmap으로 연결. 없거나 손상되면 None."""
+        path = snapshot_dir(fingerprint)
+        try:
+            with open(path / "meta.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != SNAPSHOT_FORMAT or meta.get("fingerprint") != fingerprint:
+                return None
+            columns = {p.stem: _load_mmap(p) for p in path.glob("*.npy")}
+            if len(columns["lat"]) != meta["count"]:
+                return None
+            return cls(columns, fingerprint, path)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def attach_extra(self, name: str) -> dict[str, np.ndarray] | None:
+        """스냅샷 하위 디렉터리(name)의 부가 인덱스 .npy들을 mmap으로 연결. 없으면 None."""
+        if self.path is None or not (self.path / name / "meta.json").is_file():
+            return None
+        try:
+            return {p.stem: _load_mmap(p) for p in (self.path / name).glob("*.npy")}
+        except (OSError, ValueError):
+            return None
+
+    def save_extra(self, name: str, arrays: dict[str, np.ndarray], meta: dict) -> Path:
+        """부가 인덱스를 스냅샷 하위 디렉터리(name)에 저장. 임시 디렉터리에 쓴 뒤 rename."""
+        if self.path is None:
+            raise OSError("in-memory course dataset has no snapshot directory")
+        target = self.path / name
+        tmp = Path(tempfile.mkdtemp(prefix=f".tmp-{name}-", dir=self.path))
+        try:
+            for key, arr in arrays.items():
+                np.save(tmp / f"{key}.npy", arr, allow_pickle=False)
+            with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+                json.dump({**meta, "fingerprint": self.fingerprint, "created_at": time.time()}, f)
+            if target.exists():
+                shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp, target)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return target
+
+    @classmethod
+    def empty(cls) -> CourseDataset:
+        return cls(build_columns([]))
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.course(i)
+
+    def __getitem__(self, i: int) -> dict:
+        return self.course(i)
+
+    def string(self, idx: int) -> str:
+        return bytes(self._blob[self._offsets[idx]:self._offsets[idx + 1]]).decode("utf-8")
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def course(self, i: int) -> dict:
+        """i번째 코스 dict (init 시 CSV에서 만든 dict와 동일한 필드)."""
+        i = int(i)
+        c = {field: self.string(int(self.columns[field][i])) for field in STRING_FIELDS}
+        c["lat"] = float(self.lat[i])
+        c["lon"] = float(self.lon[i])
+        length = float(self.columns["length_km"][i])
+        c["length_km"] = None if math.isnan(length) else length
+        tag_str = self.string(int(self.columns["reason_tags"][i]))
+        c["reason_tags"] = tag_str.split(TAG_SEPARATOR) if tag_str else []
+        c["segments"] = self.segments(i)
+        return c
+
+    def segments(self, i: int) -> list[dict]:
+        """i번째 코스의 걷기길 구간 목록 (공원은 빈 리스트)."""
+        offsets = self.columns["segment_offsets"]
+        lengths = self.columns["segment_length_km"]
+        out = []
+        for j in range(int(offsets[i]), int(offsets[i + 1])):
+            seg = {field: self.string(int(self.columns[f"segment_{field}"][j])) for field in SEGMENT_STRING_FIELDS}
+            length = float(lengths[j])
+            seg["length_km"] = None if math.isnan(length) else length
+            out.append(seg)
+        return out
+
+    def keyword_text(self, i: int, fields: tuple[str, ...] = KEYWORD_FIELDS) -> str:
+        return _keyword_text([self.string(int(self.columns[f][i])) for f in fields])
+
+    def _posting(self, code: int) -> np.ndarray:
+        codes = self.columns["kw_codes"]
+        pos = int(np.searchsorted(codes, code))
+        if pos >= len(codes) or codes[pos] != code:
+            return np.empty(0, dtype=np.int64)
+        offsets = self.columns["kw_offsets"]
+        return self.columns["kw_postings"][offsets[pos]:offsets[pos + 1]].astype(np.int64)
+
+    def keyword_candidates(self, term: str, fields: tuple[str, ...] = KEYWORD_FIELDS) -> np.ndarray:
+        """
+        fields(KEYWORD_FIELDS 중 일부) 중 하나에 term을 부분 문자열로 포함한 코스 인덱스(오름차순, 대소문자 무시).
+        n-gram posting 교집합으로 후보를 좁히고, 교집합이 정확하지 않은 경우(3글자 이상·필드 일부)만 후보 문자열 확인.
+        """
+        term = term.strip().lower()
+        if not term:
+            return np.arange(len(self), dtype=np.int64)
+        words = term.split()
+        result: np.ndarray | None = None
+        for code in sorted({g for w in words for g in _term_grams(w)}):
+            posting = self._posting(code)
+            result = posting if result is None else np.intersect1d(result, posting, assume_unique=True)
+            if len(result) == 0:
+                return result
+        if len(words) > 1 or len(term) > 2 or tuple(fields) != KEYWORD_FIELDS:
+            result = result[np.array([term in self.keyword_text(i, fields) for i in result], dtype=np.bool_)]
+        return result
+
+    def bbox_candidates(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        """공간 인덱스로 bbox와 겹치는 격자 셀의 코스 인덱스(오름차순). bbox 밖 코스도 일부 포함될 수 있음."""
+        keys = self.columns["grid_keys"]
+        if len(keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = self.columns["grid_offsets"]
+        order = self.columns["grid_order"]
+        (r0, r1), (c0, c1) = _cell_rows_cols(np.array([lat_min, lat_max]), np.array([lon_min, lon_max]))
+        rows = np.arange(int(r0), int(r1) + 1, dtype=np.int64) * _GRID_STRIDE
+        lo = offsets[np.searchsorted(keys, rows + c0, side="left")]
+        hi = offsets[np.searchsorted(keys, rows + c1, side="right")]
+        parts = [order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts)).astype(np.int64)
+
+    def radius_candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """(lat, lon) 반경 radius_km를 덮는 bbox의 후보 인덱스. 정확한 거리 필터는 호출 측에서."""
+        dlat = radius_km / KM_PER_DEG * 1.01
+        max_abs_lat = min(abs(lat) + dlat, 89.0)
+        dlon = radius_km / (KM_PER_DEG * math.cos(math.radians(max_abs_lat))) * 1.01
+        return self.bbox_candidates(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
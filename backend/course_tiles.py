@@ -0,0 +1,222 @@
+"""
+진단별 산책로 추천 타일 (선택 기능).
+지도를 TILE_DEG 크기 셀로 나누고, 셀·기수(정상/1기/3기)마다 그 셀 안 어느 위치에서든
+recommend_walkway 상위 TILE_LIMIT개가 나올 수 있는 후보 코스만 미리 저장한다.
+조회 시에는 후보 수십~수백 개만 정확한 거리로 다시 정렬하므로 결과는 전체 검색과 동일.
+
+후보 조건 (셀 중심 c, 셀 안 임의 위치 p, h = c에서 셀 꼭짓점까지 최대 거리):
+- 반경 r_k - h 안에 적합 코스가 limit개 이상인 첫 r_k가 있으면, 셀 안 모든 p는 r_k 이하에서 멈추므로
+  c에서 r_k + h 안의 적합 코스면 충분.
+- 없으면 최대 반경 + h 안의 적합 코스 + (추천 0건일 때의 최근접 대체용) c에서 d_limit + 2h 안의 모든 코스.
+
+오프라인 생성·검증 (프로젝트 루트에서):
+    python -m backend.course_tiles build [--bbox LAT_MIN LON_MIN LAT_MAX LON_MAX ...]
+    python -m backend.course_tiles verify --samples 2000
+서버에서 사용하려면 COURSE_TILES=1 (CSV가 바뀌어 스냅샷을 다시 만들 때 타일도 함께 재생성).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from .course_snapshot import CourseDataset, cell_bounds, cell_keys
+
+# 셀 크기(도). 0.01° ≈ 위도 1.1km
+TILE_DEG = 0.01
+# 타일은 상위 TILE_LIMIT개까지 정확 (_attach_recommended_courses 는 limit=3)
+TILE_LIMIT = 3
+TILES_DIR = "tiles"
+TILE_GRADES = {"정상": "normal", "1기": "grade1", "3기": "grade3"}
+# 부동소수점 오차 여유(km)
+_EPS_KM = 1e-6
+
+
+def tiles_enabled() -> bool:
+    return os.environ.get("COURSE_TILES", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _cell_half_diagonal_km(key: int) -> float:
+    """셀 중심에서 가장 먼 꼭짓점까지 거리(km)."""
+    from .walk_routes import haversine_km
+
+    lat_min, lat_max, lon_min, lon_max = cell_bounds(key, TILE_DEG)
+    clat, clon = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    return max(
+        haversine_km(clat, clon, la, lo) for la in (lat_min, lat_max) for lo in (lon_min, lon_max)
+    ) + _EPS_KM
+
+
+def _cell_candidates(ds: CourseDataset, grade: str, key: int, eligible_all: np.ndarray) -> np.ndarray:
+    from .walk_routes import DIAGNOSIS_CRITERIA, EXPAND_RADIUS_STEP_KM, MAX_RADIUS_TRIES, final_radius_km, haversine_km_np
+
+    lat_min, lat_max, lon_min, lon_max = cell_bounds(key, TILE_DEG)
+    clat, clon = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    h = _cell_half_diagonal_km(key)
+    final = final_radius_km(grade)
+    idx = ds.radius_candidates(clat, clon, final + h)
+    d = haversine_km_np(clat, clon, ds.lat[idx], ds.lon[idx])
+    e = eligible_all[idx]
+
+    stop_radius = None
+    for k in range(MAX_RADIUS_TRIES):
+        r = DIAGNOSIS_CRITERIA[grade]["max_radius_km"] + EXPAND_RADIUS_STEP_KM * k
+        if np.count_nonzero(e & (d <= r - h)) >= TILE_LIMIT:
+            stop_radius = r
+            break
+    if stop_radius is not None:
+        return idx[e & (d <= stop_radius + h)]
+
+    cand = idx[e & (d <= final + h)]
+    all_d = haversine_km_np(clat, clon, ds.lat, ds.lon)
+    k = min(TILE_LIMIT, len(all_d)) - 1
+    if k < 0:
+        return cand
+    d_limit = np.partition(all_d, k)[k]
+    fallback = np.flatnonzero(all_d <= d_limit + 2 * h)
+    return np.union1d(cand, fallback)
+
+
+def build_tiles(ds: CourseDataset, bboxes: list[tuple[float, float, float, float]] | None = None) -> dict[str, np.ndarray]:
+    """
+    코스가 하나 이상 있는 셀(bboxes 지정 시 그 안의 셀만)에 대해 기수별 후보 CSR 배열 생성.
+    반환 키: {grade}_keys(셀 키 오름차순), {grade}_offsets, {grade}_items(코스 인덱스, 셀 안에서 오름차순).
+    """
+    from .walk_routes import DIAGNOSIS_CRITERIA, _eligible_mask
+
+    keys = np.unique(cell_keys(ds.lat, ds.lon, TILE_DEG))
+    if bboxes:
+        keep = np.zeros(len(keys), dtype=np.bool_)
+        for i, key in enumerate(keys):
+            lat_min, lat_max, lon_min, lon_max = cell_bounds(int(key), TILE_DEG)
+            keep[i] = any(
+                lat_max > b[0] and lat_min < b[2] and lon_max > b[1] and lon_min < b[3] for b in bboxes
+            )
+        keys = keys[keep]
+    all_idx = np.arange(len(ds))
+    arrays: dict[str, np.ndarray] = {}
+    for grade, name in TILE_GRADES.items():
+        eligible_all = _eligible_mask(ds, all_idx, DIAGNOSIS_CRITERIA[grade])
+        offsets = [0]
+        items: list[np.ndarray] = []
+        for key in keys:
+            cand = _cell_candidates(ds, grade, int(key), eligible_all)
+            items.append(cand.astype(np.int32))
+            offsets.append(offsets[-1] + len(cand))
+        arrays[f"{name}_keys"] = keys.astype(np.int64)
+        arrays[f"{name}_offsets"] = np.array(offsets, dtype=np.int64)
+        arrays[f"{name}_items"] = np.concatenate(items) if items else np.empty(0, dtype=np.int32)
+    return arrays
+
+
+class CourseTiles:
+    """스냅샷에 저장된 추천 타일 (mmap)."""
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    @classmethod
+    def load(cls, ds: CourseDataset) -> CourseTiles | None:
+        arrays = ds.attach_extra(TILES_DIR)
+        return cls(arrays) if arrays is not None else None
+
+    def candidates(self, grade: str, lat: float, lon: float, limit: int) -> np.ndarray | None:
+        """(lat, lon)이 속한 셀의 후보 코스 인덱스. 타일이 없거나 limit > TILE_LIMIT 이면 None(전체 검색)."""
+        name = TILE_GRADES.get(grade)
+        if name is None or limit > TILE_LIMIT:
+            return None
+        keys = self.arrays[f"{name}_keys"]
+        key = int(cell_keys(np.array([lat]), np.array([lon]), TILE_DEG)[0])
+        pos = int(np.searchsorted(keys, key))
+        if pos >= len(keys) or keys[pos] != key:
+            return None
+        offsets = self.arrays[f"{name}_offsets"]
+        return np.asarray(self.arrays[f"{name}_items"][offsets[pos]:offsets[pos + 1]], dtype=np.int64)
+
+    def stats(self) -> dict:
+        out = {}
+        for grade, name in TILE_GRADES.items():
+            sizes = np.diff(self.arrays[f"{name}_offsets"])
+            out[grade] = {
+                "cells": int(len(sizes)),
+                "avg_candidates": round(float(sizes.mean()), 1) if len(sizes) else 0.0,
+                "max_candidates": int(sizes.max()) if len(sizes) else 0,
+            }
+        return out
+
+
+def build_and_save(ds: CourseDataset, bboxes: list[tuple[float, float, float, float]] | None = None) -> CourseTiles:
+    arrays = build_tiles(ds, bboxes)
+    ds.save_extra(TILES_DIR, arrays, {"tile_deg": TILE_DEG, "tile_limit": TILE_LIMIT})
+    return CourseTiles.load(ds)
+
+
+def verify(ds: CourseDataset, tiles: CourseTiles, samples: int, seed: int = 0) -> int:
+    """타일 셀 안 임의 위치에서 타일 결과와 전체 검색 결과 비교. 불일치 건수 반환."""
+    from .walk_routes import _select_courses
+
+    rng = random.Random(seed)
+    mismatches = 0
+    t_tile = t_exact = 0.0
+    for grade, name in TILE_GRADES.items():
+        keys = tiles.arrays[f"{name}_keys"]
+        if len(keys) == 0:
+            continue
+        for _ in range(samples):
+            lat_min, lat_max, lon_min, lon_max = cell_bounds(int(keys[rng.randrange(len(keys))]), TILE_DEG)
+            lat, lon = rng.uniform(lat_min, lat_max), rng.uniform(lon_min, lon_max)
+            limit = rng.randint(1, TILE_LIMIT)
+            cand = tiles.candidates(grade, lat, lon, limit)
+            if cand is None:
+                continue
+            t0 = time.perf_counter()
+            got = _select_courses(ds, grade, lat, lon, limit, cand, fallback_idx=cand)
+            t1 = time.perf_counter()
+            want = _select_courses(ds, grade, lat, lon, limit, np.arange(len(ds)))
+            t2 = time.perf_counter()
+            t_tile += t1 - t0
+            t_exact += t2 - t1
+            if got != want:
+                mismatches += 1
+                print(f"[mismatch] grade={grade} lat={lat} lon={lon} limit={limit} tile={got} exact={want}")
+    n = samples * len(TILE_GRADES)
+    print(f"검증 {n}건, 불일치 {mismatches}건 | 평균 타일 {t_tile / n * 1e3:.3f}ms, 전체 검색 {t_exact / n * 1e3:.3f}ms")
+    return mismatches
+
+
+def main() -> None:
+    from .walk_routes import _ensure_courses, init_courses
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="현재 CSV 스냅샷 기준으로 타일 생성")
+    p_build.add_argument(
+        "--bbox", type=float, nargs=4, action="append", metavar=("LAT_MIN", "LON_MIN", "LAT_MAX", "LON_MAX"),
+        help="이 영역(여러 번 지정 가능)의 셀만 생성. 생략하면 코스가 있는 모든 셀",
+    )
+    p_verify = sub.add_parser("verify", help="타일 결과가 전체 검색과 같은지 임의 위치로 검증")
+    p_verify.add_argument("--samples", type=int, default=1000, help="기수별 샘플 수")
+    p_verify.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    init_courses()
+    ds = _ensure_courses()
+    if ds.path is None:
+        sys.exit("코스 스냅샷을 찾을 수 없습니다 (CSV 확인).")
+    if args.command == "build":
+        t0 = time.perf_counter()
+        tiles = build_and_save(ds, [tuple(b) for b in args.bbox] if args.bbox else None)
+        print(f"타일 생성 완료 ({time.perf_counter() - t0:.1f}s): {tiles.stats()}")
+    else:
+        tiles = CourseTiles.load(ds)
+        if tiles is None:
+            sys.exit("타일이 없습니다. 먼저 build 를 실행하세요.")
+        sys.exit(1 if verify(ds, tiles, args.samples, args.seed) else 0)
+
+
+if __name__ == "__main__":
+    main()
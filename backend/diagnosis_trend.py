@@ -0,0 +1,82 @@
+"""
+반려견별 진단 추이 집계 (등급별 횟수, 최근 점수 이동평균, 마지막 등급 변화).
+진단 기록을 추가할 때마다 store.append_diagnosis 가 갱신 → 조회는 기록 전체를 읽지 않고 O(1).
+집계는 MAX_HISTORY로 잘려 나간 기록까지 포함한 누적값. 다시 만들면 남아 있는 기록 기준.
+
+기존 기록으로 다시 만들기 (프로젝트 루트에서):
+    python -m backend.diagnosis_trend rebuild [--user-id ID] [--pet-id ID]
+"""
+from __future__ import annotations
+
+import argparse
+
+# 이동평균에 쓰는 최근 점수 수
+TREND_WINDOW = 10
+GRADES = ("정상", "1기", "3기")
+
+
+def empty_trend() -> dict:
+    return {
+        "count": 0,
+        "grade_counts": {g: 0 for g in GRADES},
+        "recent_scores": [],
+        "score_avg": None,
+        "first_date": None,
+        "last": None,
+        "last_transition": None,
+    }
+
+
+def update_trend(trend: dict, record: dict) -> dict:
+    """기록 한 건(오래된 것부터 순서대로) 반영. trend를 고쳐서 그대로 반환."""
+    grade = record.get("grade", "")
+    trend["count"] += 1
+    trend["grade_counts"][grade] = trend["grade_counts"].get(grade, 0) + 1
+    scores = (trend["recent_scores"] + [record.get("score", 0.0)])[-TREND_WINDOW:]
+    trend["recent_scores"] = scores
+    trend["score_avg"] = round(sum(scores) / len(scores), 1)
+    if trend["first_date"] is None:
+        trend["first_date"] = record.get("date")
+    last = trend["last"]
+    if last is not None and last["grade"] != grade:
+        trend["last_transition"] = {
+            "from": last["grade"],
+            "to": grade,
+            "id": record.get("id"),
+            "date": record.get("date"),
+            "time": record.get("time"),
+        }
+    trend["last"] = {k: record.get(k) for k in ("id", "date", "time", "grade", "score")}
+    return trend
+
+
+def build_trend(history: list[dict]) -> dict:
+    """진단 기록 목록(최신순, load_diagnosis_history 형식)으로 집계를 처음부터 만듦."""
+    trend = empty_trend()
+    for record in reversed(history):
+        update_trend(trend, record)
+    return trend
+
+
+def main() -> None:
+    from . import store
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rebuild = sub.add_parser("rebuild", help="남아 있는 진단 기록으로 추이 집계를 다시 만듦")
+    p_rebuild.add_argument("--user-id", default=None, help="이 보호자만 (생략 시 기본 데이터 + 모든 보호자)")
+    p_rebuild.add_argument("--pet-id", default=None, help="이 반려견만 (생략 시 보호자의 모든 반려견)")
+    args = parser.parse_args()
+    user_ids = [args.user_id] if args.user_id else [None, *store.owner_ids()]
+    rebuilt = 0
+    for user_id in user_ids:
+        pet_ids = [args.pet_id] if args.pet_id else store.pet_ids(user_id)
+        for pet_id in pet_ids:
+            trend = store.rebuild_trend(user_id=user_id, pet_id=pet_id)
+            rebuilt += 1
+            print(f"user={user_id or '-'} pet={pet_id or '-'}: {trend['count']}건, {trend['grade_counts']}")
+    print(f"추이 집계 {rebuilt}개 재생성")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+라벨 폴더 오프라인 평가 — 서빙과 같은 경로로 정확도·처리량 측정.
+    parse_json_to_features → build_27_features → DogPatellaModel → softmax(_softmax_probs) → _apply_threshold
+- 폴더 구조는 학습 데이터와 같음 (정상/1기/3기 하위 폴더 아래 JSON)
+- JSON 파싱은 프로세스 여러 개, 추론은 큰 배치로 → 읽는 대로 흘려보냄 (전체를 메모리에 올리지 않음)
+- 보정 전(argmax)·보정 후(THRESHOLD_3 / AMBIGUITY_MARGIN) 혼동 행렬, 기수별 정확도, 샘플/초
+- --threshold-3·--margin 에 값을 여러 개 주면 같은 확률로 조합마다 보정 후 정확도 비교 (모델은 한 번만)
+
+사용법 (프로젝트 루트에서):
+    python -m backend.evaluate "backend/Validation/02.라벨링데이터/VL" \\
+        [--model backend/dog_patella_best.pth] [--batch-size 4096] [--workers N] [--device cpu] \\
+        [--threshold-3 0.5 0.6 0.7] [--margin 0.1 0.15] [--json report.json]
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from . import inference
+from .inference import _apply_threshold, _softmax_probs
+from .model import CLASS_NAMES, get_model_path, load_dog_patella_model
+from .preprocess import NUM_FEATURES, parse_json_to_features
+from .train_cache import scan_json_files
+
+# 프로세스 하나에 넘기는 JSON 수
+PARSE_CHUNK = 512
+BATCH_SIZE = 4096
+
+
+def _parse_chunk(paths: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """JSON 여러 개 → (특징 (M, 27), 성공 여부 (len(paths),)). 실패한 파일은 건너뜀."""
+    features, ok = [], np.zeros(len(paths), dtype=bool)
+    for i, path in enumerate(paths):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                features.append(parse_json_to_features(json.load(f)))
+            ok[i] = True
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    return np.stack(features) if features else np.zeros((0, NUM_FEATURES), dtype=np.float32), ok
+
+
+def _parsed_chunks(paths: list[str], labels: np.ndarray, workers: int):
+    """(특징, 라벨, 실패 수) 묶음을 차례로."""
+    chunks = [(paths[i:i + PARSE_CHUNK], labels[i:i + PARSE_CHUNK]) for i in range(0, len(paths), PARSE_CHUNK)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (_, chunk_labels), (features, ok) in zip(chunks, pool.map(_parse_chunk, [c[0] for c in chunks])):
+                yield features, chunk_labels[ok], int((~ok).sum())
+    else:
+        for chunk_paths, chunk_labels in chunks:
+            features, ok = _parse_chunk(chunk_paths)
+            yield features, chunk_labels[ok], int((~ok).sum())
+
+
+def _batches(chunks, batch_size: int):
+    """파싱 묶음을 batch_size 행씩 다시 묶음. (특징, 라벨, 그동안 실패한 파일 수)"""
+    buf_x, buf_y, n, failed = [], [], 0, 0
+    for features, labels, chunk_failed in chunks:
+        buf_x.append(features)
+        buf_y.append(labels)
+        n += len(labels)
+        failed += chunk_failed
+        if n >= batch_size:
+            yield np.concatenate(buf_x), np.concatenate(buf_y), failed
+            buf_x, buf_y, n, failed = [], [], 0, 0
+    if n or failed:
+        yield np.concatenate(buf_x), np.concatenate(buf_y), failed
+
+
+def confusion(targets: np.ndarray, preds: np.ndarray) -> np.ndarray:
+    """(3, 3) 혼동 행렬, 행 = 정답, 열 = 예측."""
+    cm = np.zeros((len(CLASS_NAMES), len(CLASS_NAMES)), dtype=np.int64)
+    np.add.at(cm, (targets, preds), 1)
+    return cm
+
+
+def summarize(cm: np.ndarray) -> dict:
+    total = int(cm.sum())
+    return {
+        "accuracy": round(100.0 * np.trace(cm) / total, 2) if total else None,
+        "class_accuracy": {
+            name: (round(100.0 * cm[i, i] / cm[i].sum(), 2) if cm[i].sum() else None)
+            for i, name in enumerate(CLASS_NAMES)
+        },
+        "confusion": cm.tolist(),
+    }
+
+
+def _print_confusion(title: str, cm: np.ndarray) -> None:
+    s = summarize(cm)
+    print(f"\n[{title}] 정확도 {s['accuracy']}%")
+    print("정답\\예측 " + "".join(f"{name:>8}" for name in CLASS_NAMES) + "   기수별 정확도")
+    for i, name in enumerate(CLASS_NAMES):
+        print(f"{name:>9} " + "".join(f"{v:>8}" for v in cm[i]) + f"   {s['class_accuracy'][name]}%")
+
+
+def evaluate(
+    root_dir: str,
+    model: torch.nn.Module,
+    device: torch.device,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1,
+    corrections: list[tuple[float, float]] | None = None,
+) -> dict:
+    """
+    root_dir 전체 평가. corrections: 비교할 (threshold_3, margin) 목록 (첫 번째가 기준).
+    반환: 보정 전·후 요약 + 조합별 요약 + 시간.
+    """
+    corrections = corrections or [(inference.THRESHOLD_3, inference.AMBIGUITY_MARGIN)]
+    scanned = scan_json_files(root_dir)
+    rels = sorted(scanned)
+    paths = [os.path.join(root_dir, rel) for rel in rels]
+    labels = np.array([scanned[rel][2] for rel in rels], dtype=np.int64)
+
+    raw_cm = np.zeros((len(CLASS_NAMES), len(CLASS_NAMES)), dtype=np.int64)
+    corrected_cm = {c: raw_cm.copy() for c in corrections}
+    skipped = 0
+    infer_s = 0.0
+    t0 = time.perf_counter()
+    with torch.inference_mode():
+        for x, y, failed in _batches(_parsed_chunks(paths, labels, workers), batch_size):
+            skipped += failed
+            if not len(y):
+                continue
+            t1 = time.perf_counter()
+            probs = _softmax_probs(model(torch.from_numpy(x).float().to(device)))
+            infer_s += time.perf_counter() - t1
+            raw_cm += confusion(y, probs.argmax(axis=1))
+            for threshold_3, margin in corrections:
+                preds = np.array([_apply_threshold(p, threshold_3, margin)[0] for p in probs], dtype=np.int64)
+                corrected_cm[(threshold_3, margin)] += confusion(y, preds)
+    elapsed = time.perf_counter() - t0
+    n = int(raw_cm.sum())
+    return {
+        "root_dir": root_dir,
+        "samples": n,
+        "skipped": skipped,
+        "seconds": round(elapsed, 3),
+        "samples_per_s": round(n / elapsed, 1) if elapsed > 0 else None,
+        "infer_samples_per_s": round(n / infer_s, 1) if infer_s > 0 else None,
+        "before_correction": summarize(raw_cm),
+        "after_correction": summarize(corrected_cm[corrections[0]]),
+        "corrections": [
+            {"threshold_3": t, "margin": m, **summarize(cm)} for (t, m), cm in corrected_cm.items()
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root_dir", help="라벨 폴더 (정상/1기/3기 하위 폴더)")
+    parser.add_argument("--model", type=Path, default=None, help="가중치 파일 (기본: backend/dog_patella_best.pth)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="JSON 파싱 프로세스 수")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--threshold-3", type=float, nargs="+", default=[inference.THRESHOLD_3])
+    parser.add_argument("--margin", type=float, nargs="+", default=[inference.AMBIGUITY_MARGIN])
+    parser.add_argument("--json", type=Path, default=None, help="결과를 JSON으로도 저장")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    model = load_dog_patella_model(device, args.model or get_model_path())
+    corrections = list(itertools.product(args.threshold_3, args.margin))
+    report = evaluate(args.root_dir, model, device, args.batch_size, args.workers, corrections)
+
+    print(
+        f"[evaluate] {report['samples']}개 (건너뜀 {report['skipped']}개) {report['seconds']}s → "
+        f"{report['samples_per_s']} 샘플/초 (추론만 {report['infer_samples_per_s']} 샘플/초)"
+    )
+    _print_confusion("보정 전 (argmax)", np.array(report["before_correction"]["confusion"]))
+    t, m = corrections[0]
+    _print_confusion(f"보정 후 (THRESHOLD_3={t}, AMBIGUITY_MARGIN={m})", np.array(report["after_correction"]["confusion"]))
+    if len(corrections) > 1:
+        print("\nthreshold_3   margin  정확도  " + "  ".join(f"{name:>6}" for name in CLASS_NAMES))
+        for c in report["corrections"]:
+            print(
+                f"{c['threshold_3']:>11} {c['margin']:>8} {c['accuracy']!s:>7} "
+                + "  ".join(f"{c['class_accuracy'][name]!s:>6}" for name in CLASS_NAMES)
+            )
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
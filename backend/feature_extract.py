@@ -91,3 +91,59 @@ def build_27_features(
     leg_ratio = min(calf / (thigh + 1e-6), 2.0)
 
     return np.array(keypoints + angles + [alignment, leg_ratio, side, dog_size], dtype=np.float32)
+
+
+# build_27_features 의 10개 키포인트 인덱스 (target_labels 순서)
+_ILIAC, _TROCHANTER, _FEMOROTIBIAL, _MALLEOLUS, _FIFTH = 0, 1, 2, 3, 4
+
+
+def _angle_batch(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray) -> np.ndarray:
+    """calculate_angle 벡터화. p*: (N, 2)."""
+    a = np.hypot(*(p2 - p1).T)
+    b = np.hypot(*(p2 - p3).T)
+    c = np.hypot(*(p3 - p1).T)
+    val = (a ** 2 + b ** 2 - c ** 2) / (2 * a * b + 1e-6)
+    return np.degrees(np.arccos(np.clip(val, -1.0, 1.0))) / 180.0
+
+
+def build_27_features_batch(
+    keypoints: np.ndarray,
+    side: np.ndarray | float = 0.5,
+    dog_size: np.ndarray | float = 0.5,
+) -> np.ndarray:
+    """
+    build_27_features 를 N개 한 번에 (결과 동일).
+    keypoints: (N, 10, 2) 원본 스케일(0~1000) 좌표, 라벨 순서는 build_27_features 의 target_labels. 없는 관절은 (0, 0).
+    반환: (N, 27) float32
+    """
+    kp = np.asarray(keypoints, dtype=np.float64).reshape(-1, 10, 2)
+    n = kp.shape[0]
+    trochanter, femorotibial, malleolus = kp[:, _TROCHANTER], kp[:, _FEMOROTIBIAL], kp[:, _MALLEOLUS]
+    angles = np.stack(
+        [
+            _angle_batch(trochanter, femorotibial, malleolus),
+            _angle_batch(kp[:, _ILIAC], trochanter, femorotibial),
+            _angle_batch(femorotibial, malleolus, kp[:, _FIFTH]),
+        ],
+        axis=1,
+    )
+    # calculate_alignment: 분모가 정확히 0이면(ZeroDivisionError) 0
+    d1 = femorotibial[:, 0] - trochanter[:, 0] + 1e-6
+    d2 = malleolus[:, 0] - femorotibial[:, 0] + 1e-6
+    ok = (d1 != 0) & (d2 != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope1 = (femorotibial[:, 1] - trochanter[:, 1]) / d1
+        slope2 = (malleolus[:, 1] - femorotibial[:, 1]) / d2
+        alignment = np.where(ok, np.minimum(np.abs(slope1 - slope2), 5.0), 0.0)
+    thigh = np.hypot(*(trochanter - femorotibial).T)
+    calf = np.hypot(*(femorotibial - malleolus).T)
+    leg_ratio = np.minimum(calf / (thigh + 1e-6), 2.0)
+
+    out = np.empty((n, 27), dtype=np.float32)
+    out[:, :20] = kp.reshape(n, 20) / 1000.0
+    out[:, 20:23] = angles
+    out[:, 23] = alignment
+    out[:, 24] = leg_ratio
+    out[:, 25] = side
+    out[:, 26] = dog_size
+    return out
@@ -0,0 +1,82 @@
+"""
+산책로 API HTTP 캐시·압축.
+- ETag: 코스 데이터 버전(CSV fingerprint) + 경로 + 정렬한 쿼리 → 같은 요청·같은 데이터면 워커·재시작과 무관하게 같은 값
+- If-None-Match 가 일치하면 본문 없이 304 (응답 계산도 생략)
+- 내용 주소(content-addressed) 파일(프로필 사진 등): 내용이 바뀌면 URL도 바뀌므로 1년 immutable 캐시
+- 응답 압축: brotli-asgi 가 설치돼 있으면 br(미지원 클라이언트는 gzip), 없으면 gzip
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+from fastapi import FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+# 응답 형식(필드)이 바뀌면 올려서 기존 ETag 무효화
+RESPONSE_VERSION = 1
+# 이보다 작은 응답은 압축하지 않음 (bytes)
+COMPRESS_MIN_BYTES = 1024
+# 캐시는 하되 매번 재검증 → 데이터가 그대로면 304
+CACHE_CONTROL = "no-cache"
+# 내용 주소 파일: 재검증 없이 1년 (사용자별 데이터라 공유 캐시 제외)
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def query_etag(request: Request, data_version: str | None) -> str | None:
+    """요청 경로·쿼리와 데이터 버전으로 만든 weak ETag. 데이터가 아직 없으면 None(캐시 안 함)."""
+    if not data_version:
+        return None
+    query = urlencode(sorted(request.query_params.multi_items()))
+    h = hashlib.sha256(f"v{RESPONSE_VERSION}\x1f{data_version}\x1f{request.url.path}\x1f{query}".encode("utf-8"))
+    # 압축 여부와 무관하게 같은 내용이므로 weak 비교용 W/ 사용
+    return f'W/"{h.hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match(쉼표 구분 목록, '*' 허용)에 etag가 있으면 True. W/ 접두어는 무시하고 비교."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    target = opaque(etag)
+    return any(opaque(t) == target for t in header.split(","))
+
+
+def cached_json(request: Request, data_version: str | None, build: Callable[[], Any]) -> Response:
+    """ETag가 일치하면 304, 아니면 build() 결과를 ETag·Cache-Control 헤더와 함께 JSON으로."""
+    etag = query_etag(request, data_version)
+    if etag is None:
+        return JSONResponse(jsonable_encoder(build()))
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder(build()), headers=headers)
+
+
+def immutable_file(request: Request, content_id: str, path, media_type: str) -> Response:
+    """내용 id가 곧 ETag인 파일 응답. If-None-Match 일치 시 304."""
+    headers = {"ETag": f'"{content_id}"', "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def add_compression(app: FastAPI) -> str:
+    """응답 압축 미들웨어 등록. 반환: 사용한 방식 ("br" | "gzip")."""
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+        return "gzip"
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+    return "br"
@@ -9,6 +9,7 @@ import torch
 from .model import CLASS_NAMES, DogPatellaModel, NUM_CLASSES
 from .preprocess import preprocess_logic
 from .schemas import ChartDataItem, JointMetric, PredictResponse, WalkPrescription
+from .timing import stage
 
 # 3기 판정: 3기 확률이 최소 이 값 이상일 때만 '3기'로 판정
 THRESHOLD_3 = 0.60
@@ -64,23 +65,35 @@ WALK_FILTER_MAP = {
 }
 
 
-def _apply_threshold(probs: np.ndarray) -> tuple[int, float]:
+def _softmax_probs(logits: torch.Tensor) -> np.ndarray:
+    """모델 출력 (N, 3) → softmax → clip → 행마다 합 1로. 반환: (N, 3)"""
+    probs = torch.softmax(logits, dim=1).cpu().numpy()
+    probs = np.clip(probs, 0.0, 1.0)
+    return probs / (probs.sum(axis=1, keepdims=True) + 1e-8)
+
+
+def _apply_threshold(
+    probs: np.ndarray, threshold_3: float | None = None, margin: float | None = None
+) -> tuple[int, float]:
     """
     3기(인덱스 2) 확률이 THRESHOLD_3 미만이면 3기로 내지 않고 안전한 기수 우선.
     애매한 경우 정상/1기 우선. 반환: (class_index 0~2, confidence 0~100)
+    threshold_3·margin: 생략 시 THRESHOLD_3·AMBIGUITY_MARGIN (evaluate.py 에서 다른 값 비교용)
     """
+    threshold_3 = THRESHOLD_3 if threshold_3 is None else threshold_3
+    margin = AMBIGUITY_MARGIN if margin is None else margin
     idx = int(np.argmax(probs))
     conf = float(probs[idx])
 
     # 3기(인덱스 2)인데 확률 60% 미만이면 3기로 확정하지 않음
-    if idx == 2 and conf < THRESHOLD_3:
+    if idx == 2 and conf < threshold_3:
         probs_no_3 = np.array(probs, copy=True)
         probs_no_3[2] = 0.0
         idx = int(np.argmax(probs_no_3))
         conf = float(probs[idx])
 
     sorted_idx = np.argsort(probs)[::-1]
-    if len(sorted_idx) >= 2 and (probs[sorted_idx[0]] - probs[sorted_idx[1]]) < AMBIGUITY_MARGIN:
+    if len(sorted_idx) >= 2 and (probs[sorted_idx[0]] - probs[sorted_idx[1]]) < margin:
         idx = int(min(sorted_idx[0], sorted_idx[1]))
         conf = float(probs[idx])
 
@@ -150,11 +163,9 @@ def run_predict_from_features(
     joint_angles = _metrics_to_joint_angles(metrics)
 
     x = torch.from_numpy(features).float().to(device)
-    with torch.no_grad():
+    with stage("model"), torch.no_grad():
         logits = model(x)
-    probs = torch.softmax(logits, dim=1).cpu().numpy()[0]
-    probs = np.clip(probs, 0.0, 1.0)
-    probs = probs / (probs.sum() + 1e-8)
+        probs = _softmax_probs(logits)[0]
 
     class_idx, confidence = _apply_threshold(probs)
     status = CLASS_NAMES[class_idx]
@@ -189,11 +200,9 @@ def run_predict_from_features_multi_frame(
         raise ValueError(f"Expected {model.in_features} features, got {features_stack.shape[1]}")
 
     x = torch.from_numpy(features_stack).float().to(device)
-    with torch.no_grad():
+    with stage("model"), torch.no_grad():
         logits = model(x)
-    probs_all = torch.softmax(logits, dim=1).cpu().numpy()
-    probs_all = np.clip(probs_all, 0.0, 1.0)
-    probs_all = probs_all / (probs_all.sum(axis=1, keepdims=True) + 1e-8)
+        probs_all = _softmax_probs(logits)
 
     avg_probs = np.mean(probs_all, axis=0)
     avg_probs = avg_probs / (avg_probs.sum() + 1e-8)
@@ -231,17 +240,17 @@ def run_predict(
     content_type: str,
     model: DogPatellaModel,
     device: torch.device,
+    frame_features: list[np.ndarray] | None = None,
 ) -> PredictResponse:
     """
     이미지/영상 -> 전처리 -> 모델 추론 -> 3기 보정 -> PredictResponse 생성.
+    frame_features: 주면 프레임별 27차원을 여기에 추가 (preprocess_logic 참고).
     """
-    features, metrics = preprocess_logic(file_bytes, content_type)
+    features, metrics = preprocess_logic(file_bytes, content_type, frame_features)
     x = torch.from_numpy(features).float().unsqueeze(0).to(device)
-    with torch.no_grad():
+    with stage("model"), torch.no_grad():
         logits = model(x)
-    probs = torch.softmax(logits, dim=1).cpu().numpy()[0]
-    probs = np.clip(probs, 0.0, 1.0)
-    probs = probs / (probs.sum() + 1e-8)
+        probs = _softmax_probs(logits)[0]
 
     class_idx, confidence = _apply_threshold(probs)
     status = CLASS_NAMES[class_idx]
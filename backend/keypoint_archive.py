@@ -0,0 +1,166 @@
+"""
+진단별 관절 키포인트 보관 (모델을 바꿨을 때 영상·사진을 다시 올리지 않고 재판정하기 위함).
+- 프레임마다 10개 관절 (x, y) + side + dog_size = float32 22개 (27차원 특징의 0~19, 25, 26번 그대로)
+- 집계 방식: mean(프레임 특징 평균 → 한 번 추론, 이미지·영상·JSON annotation_info — 27차원을 직접 보낸 JSON 은 보관하지 않음) | multi(프레임별 확률 평균, ZIP)
+- 파일: data/keypoints/{id[:2]}/{id}.npz, id = 내용 sha256 앞 24자
+- /predict 응답의 keypoints_id 가 진단 기록 result 에 같이 저장되어 연결됨 (rescore.py 가 사용)
+- 기본은 꺼짐 — PATELLA_KEYPOINT_ARCHIVE=1 이면 저장
+- 정리: 어떤 진단 기록도 가리키지 않고 PRUNE_GRACE_SEC 보다 오래된 파일 삭제 (prune_keypoints)
+    저장하면서 PRUNE_INTERVAL_SEC 마다 한 번 백그라운드로 실행, 또는 python -m backend.keypoint_archive --prune
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+
+from . import store
+
+KEYPOINT_DIR = store.DATA_DIR / "keypoints"
+ARCHIVE_ENABLED = os.environ.get("PATELLA_KEYPOINT_ARCHIVE", "0").strip() not in ("0", "false", "no", "")
+MODES = ("mean", "multi")
+# 27차원 특징 중 보관하는 열: 키포인트 20개 + side + dog_size (나머지는 여기서 다시 계산됨)
+_ARCHIVED_COLUMNS = np.r_[0:20, 25, 26]
+
+# 정리 시 이보다 최근 파일은 남김 (진단 직후 아직 기록으로 저장되지 않은 키포인트를 지우지 않도록)
+PRUNE_GRACE_SEC = 24 * 3600
+# 저장 중 자동 정리 간격
+PRUNE_INTERVAL_SEC = 3600
+
+_KEYPOINTS_ID = re.compile(r"^[0-9a-f]{24}$")
+_prune_lock = threading.Lock()
+_last_prune = float("-inf")
+
+
+def _path(keypoints_id: str) -> Path:
+    return KEYPOINT_DIR / keypoints_id[:2] / f"{keypoints_id}.npz"
+
+
+def save_keypoints(frame_features: np.ndarray | list[np.ndarray], mode: str) -> str | None:
+    """
+    프레임별 27차원 특징 (F, 27)에서 키포인트·side·dog_size만 저장. 반환: keypoints_id.
+    비활성이거나 프레임이 없으면 None.
+    """
+    if not ARCHIVE_ENABLED:
+        return None
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    feats = np.asarray(frame_features, dtype=np.float32).reshape(-1, 27)
+    if feats.shape[0] == 0:
+        return None
+    frames = np.ascontiguousarray(feats[:, _ARCHIVED_COLUMNS])
+    mode_code = np.uint8(MODES.index(mode))
+    keypoints_id = hashlib.sha256(frames.tobytes() + mode_code.tobytes()).hexdigest()[:24]
+    _maybe_prune()
+    path = _path(keypoints_id)
+    if path.is_file():
+        return keypoints_id
+    path.parent.mkdir(parents=True, exist_ok=True)
+    buf = BytesIO()
+    np.savez(buf, frames=frames, mode=mode_code)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return keypoints_id
+
+
+def load_keypoints(keypoints_id: str) -> tuple[np.ndarray, str] | None:
+    """저장된 (frames (F, 22) float32, mode). 없거나 손상되면 None."""
+    if not _KEYPOINTS_ID.match(keypoints_id or ""):
+        return None
+    try:
+        with np.load(_path(keypoints_id)) as z:
+            return z["frames"], MODES[int(z["mode"])]
+    except (OSError, KeyError, ValueError, IndexError):
+        return None
+
+
+def frames_to_features(frames: np.ndarray) -> np.ndarray:
+    """보관한 프레임 (N, 22) → 27차원 특징 (N, 27). build_27_features_batch 로 각도·비율 재계산."""
+    from .feature_extract import build_27_features_batch
+
+    frames = np.asarray(frames, dtype=np.float32).reshape(-1, 22)
+    # 특징의 키포인트는 원본/1000 → build 입력 스케일(0~1000)로 되돌림
+    keypoints = frames[:, :20].astype(np.float64).reshape(-1, 10, 2) * 1000.0
+    return build_27_features_batch(keypoints, frames[:, 20], frames[:, 21])
+
+
+def referenced_ids() -> set[str]:
+    """진단 기록(기본 데이터 + 모든 보호자·반려견) result 에 들어 있는 keypoints_id."""
+    ids: set[str] = set()
+    for user_id in [None, *store.owner_ids()]:
+        for pet_id in store.pet_ids(user_id):
+            for h in store.load_diagnosis_history(user_id=user_id, pet_id=pet_id):
+                keypoints_id = (h.get("result") or {}).get("keypoints_id")
+                if keypoints_id:
+                    ids.add(keypoints_id)
+    return ids
+
+
+def prune_keypoints(grace_sec: float = PRUNE_GRACE_SEC) -> int:
+    """어떤 진단 기록도 가리키지 않는 키포인트 파일 삭제 (grace_sec 보다 최근 것은 남김). 반환: 지운 파일 수."""
+    if not KEYPOINT_DIR.is_dir():
+        return 0
+    keep = referenced_ids()
+    cutoff = time.time() - grace_sec
+    removed = 0
+    for path in KEYPOINT_DIR.glob("*/*.npz"):
+        if path.stem in keep:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _maybe_prune() -> None:
+    """마지막 정리 후 PRUNE_INTERVAL_SEC 가 지났으면 백그라운드로 prune_keypoints (요청을 막지 않음)."""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < PRUNE_INTERVAL_SEC or not _prune_lock.acquire(blocking=False):
+        return
+    _last_prune = now
+
+    def run():
+        try:
+            removed = prune_keypoints()
+            if removed:
+                print(f"[keypoint_archive] pruned {removed} unreferenced keypoint files")
+        except Exception as e:
+            print(f"[keypoint_archive] prune failed: {e}")
+        finally:
+            _prune_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prune", action="store_true", help="진단 기록이 가리키지 않는 오래된 키포인트 파일 삭제")
+    parser.add_argument("--grace-hours", type=float, default=PRUNE_GRACE_SEC / 3600, help="이보다 최근 파일은 남김")
+    args = parser.parse_args()
+    if not args.prune:
+        parser.print_help()
+        return
+    removed = prune_keypoints(args.grace_hours * 3600)
+    print(f"[keypoint_archive] {KEYPOINT_DIR}: {removed}개 삭제")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,48 @@ Patella Care AI - FastAPI 백엔드.
 서버 시작 시 dog_patella_best.pth 로드, /predict 에서 피그마 맞춤 JSON 응답.
 이미지·영상·JSON·ZIP(프레임 이미지 묶음) 업로드 지원.
 """
-import zipfile
 from contextlib import asynccontextmanager
-from io import BytesIO
 
-from fastapi import Body, FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Body, FastAPI, File, Form, HTTPException, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 
-import cv2
 import numpy as np
 
+from .http_cache import add_compression, cached_json, immutable_file
 from .inference import run_predict, run_predict_from_features, run_predict_from_features_multi_frame
-from .store import append_diagnosis, load_diagnosis_history, load_profile, save_profile
+from . import mem_budget, profiling
+from .timing import add_timing, note, stage
+from .store import (
+    DEFAULT_HISTORY_FIELDS,
+    DEFAULT_HISTORY_PAGE,
+    append_diagnosis,
+    get_diagnosis,
+    history_fields,
+    load_diagnosis_page,
+    load_profile,
+    load_trend,
+    save_profile,
+    validate_id,
+)
+from .keypoint_archive import save_keypoints
 from .model import load_dog_patella_model
+from .photo_store import PHOTO_SIZES, photo_file, save_photo
 from .preprocess import parse_json_to_features
-from .pose_to_features import image_to_27_features
-from .schemas import PredictResponse, RecommendedCourse
-from .walk_routes import get_walk_routes, get_recommended_courses, get_recommendation_reason, init_courses
+from .pose_to_features import zip_to_frame_features
+from .schemas import PredictResponse, RecommendedCourse, WalkRoutesBatchRequest
+from .walk_routes import (
+    course_status,
+    dataset_version,
+    get_recommendation_reason,
+    get_recommended_courses,
+    get_walk_routes,
+    get_walk_routes_in_viewport,
+    init_courses,
+    recommend_walkway_batch,
+    start_course_watcher,
+    stop_course_watcher,
+)
 
 # 앱 수명주기: 시작 시 모델 로드
 _model = None
@@ -36,10 +61,14 @@ async def lifespan(app: FastAPI):
     except FileNotFoundError as e:
         print(f"[Patella] Model file not found, /predict will return 503: {e}")
         _model = None
-    init_courses()
+    # 스냅샷이 유효하면 즉시 mmap 적재, 아니면 CSV 파싱·스냅샷 생성을 백그라운드로
+    init_courses(background=True)
+    # CSV가 바뀌면 백그라운드에서 스냅샷을 다시 만들어 교체 (재시작 불필요, COURSE_RELOAD_INTERVAL=0 이면 끔)
+    start_course_watcher()
     try:
         yield
     finally:
+        stop_course_watcher()
         _model = None
 
 
@@ -56,6 +85,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 큰 JSON(산책로 목록 등) 압축. brotli-asgi 설치 시 br, 아니면 gzip
+add_compression(app)
+# 단계별 시간 Server-Timing 헤더 + GET /metrics (압축까지 포함해 재도록 가장 바깥에)
+add_timing(app)
 
 
 @app.get("/")
@@ -71,21 +104,47 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": _model is not None}
+    courses = course_status()
+    return {
+        "status": "ok",
+        "model_loaded": _model is not None,
+        "courses_loaded": courses["loaded"],
+        "course_count": courses["count"],
+        "course_source": courses["source"],
+        "course_version": courses["fingerprint"],
+        "course_loaded_at": courses["loaded_at"],
+    }
 
 
 # --- 프로필·진단 기록 (JSON 파일 저장, 재시작 후 유지) ---
+# user_id·pet_id (선택): 보호자·반려견별로 따로 저장. 생략하면 기존 단일 프로필·기록
+
+
+def _owner_scope(user_id: str | None, pet_id: str | None) -> dict:
+    """user_id·pet_id 검증 → store 함수 kwargs. 형식이 잘못되면 400."""
+    try:
+        return {"user_id": validate_id(user_id, "user_id"), "pet_id": validate_id(pet_id, "pet_id")}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 @app.get("/api/profile")
-def api_get_profile():
+def api_get_profile(user_id: str | None = None, pet_id: str | None = None):
     """반려견 이름·사진 등 프로필 조회."""
-    return load_profile()
+    return load_profile(**_owner_scope(user_id, pet_id))
 
 
 @app.put("/api/profile")
-def api_update_profile(body: dict = Body(default_factory=dict)):
-    """프로필 수정. body에 포함된 필드만 갱신 (photo_base64=null 이면 사진 제거)."""
-    kwargs = {}
+def api_update_profile(
+    body: dict = Body(default_factory=dict),
+    user_id: str | None = None,
+    pet_id: str | None = None,
+):
+    """
+    프로필 수정. body에 포함된 필드만 갱신.
+    photo_base64: 이미지 base64 → 사진 파일로 저장해 photo_id로 바꿈 (null 이면 사진 제거). 새 클라이언트는 PUT /api/profile/photo 사용.
+    """
+    kwargs = _owner_scope(user_id, pet_id)
     if "name" in body:
         kwargs["name"] = body["name"]
     if "breed" in body:
@@ -94,13 +153,94 @@ def api_update_profile(body: dict = Body(default_factory=dict)):
         kwargs["age"] = body["age"]
     if "photo_base64" in body:
         kwargs["photo_base64"] = body["photo_base64"]
-    return save_profile(**kwargs)
+    try:
+        return save_profile(**kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.put("/api/profile/photo")
+async def api_upload_profile_photo(
+    file: UploadFile = File(...),
+    user_id: str | None = None,
+    pet_id: str | None = None,
+):
+    """프로필 사진 업로드 (multipart). 원본·축소본 저장 후 photo_id가 들어간 프로필 반환."""
+    scope = _owner_scope(user_id, pet_id)
+    data = await file.read()
+    try:
+        return save_profile(photo_id=save_photo(data, **scope), **scope)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/api/profile/photo")
+def api_delete_profile_photo(user_id: str | None = None, pet_id: str | None = None):
+    """프로필 사진 제거."""
+    return save_profile(photo_id=None, **_owner_scope(user_id, pet_id))
+
+
+@app.get("/api/profile/photo/{photo_id}")
+def api_get_profile_photo(
+    request: Request,
+    photo_id: str,
+    size: str = "medium",
+    user_id: str | None = None,
+    pet_id: str | None = None,
+):
+    """
+    프로필 사진 파일. size: small(128px) | medium(512px) | original.
+    photo_id가 내용 해시라 브라우저가 1년 캐시 (사진을 바꾸면 photo_id가 바뀜).
+    """
+    if size not in PHOTO_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(PHOTO_SIZES)}")
+    found = photo_file(photo_id, size, **_owner_scope(user_id, pet_id))
+    if found is None:
+        raise HTTPException(status_code=404, detail="photo not found")
+    path, media_type = found
+    return immutable_file(request, f"{photo_id}-{size}", path, media_type)
 
 
 @app.get("/api/diagnosis-history")
-def api_get_diagnosis_history():
-    """최근 진단 기록 목록 (날짜 내림차순)."""
-    return load_diagnosis_history()
+def api_get_diagnosis_history(
+    limit: int = DEFAULT_HISTORY_PAGE,
+    cursor: int | None = None,
+    fields: str | None = None,
+    user_id: str | None = None,
+    pet_id: str | None = None,
+):
+    """
+    최근 진단 기록 목록 (최신순, cursor 페이지).
+    limit: 한 페이지 건수 (최대 100). cursor: 이전 응답의 next_cursor (없으면 처음부터).
+    fields: 쉼표 구분 (id,date,time,grade,score,result,rescore). 기본은 result·rescore 제외 — 상세는 /api/diagnosis-history/{id}.
+    반환: { items, next_cursor } (next_cursor가 null이면 마지막 페이지)
+    """
+    scope = _owner_scope(user_id, pet_id)
+    try:
+        selected = history_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items, next_cursor = load_diagnosis_page(limit=limit, cursor=cursor, fields=selected, **scope)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@app.get("/api/diagnosis-history/{record_id}")
+def api_get_diagnosis(record_id: int, user_id: str | None = None, pet_id: str | None = None):
+    """진단 기록 한 건 (result 스냅샷 포함)."""
+    record = get_diagnosis(record_id, **_owner_scope(user_id, pet_id))
+    if record is None:
+        raise HTTPException(status_code=404, detail="diagnosis record not found")
+    return record
+
+
+@app.get("/api/diagnosis-trend")
+def api_get_diagnosis_trend(user_id: str | None = None, pet_id: str | None = None):
+    """
+    진단 추이 집계 (기록 추가 시마다 갱신, 조회는 기록 전체를 읽지 않음).
+    반환: count, grade_counts(등급별 횟수), recent_scores·score_avg(최근 10건 점수 이동평균),
+          first_date, last(마지막 기록), last_transition(마지막 등급 변화 from→to, 없으면 null)
+    """
+    return load_trend(**_owner_scope(user_id, pet_id))
 
 
 @app.post("/api/diagnosis-history")
@@ -110,22 +250,27 @@ def api_add_diagnosis(
     grade: str = Body(..., embed=True),
     score: float = Body(..., embed=True),
     result: dict | None = Body(None, embed=True),
+    user_id: str | None = None,
+    pet_id: str | None = None,
 ):
-    """진단 한 건 추가. result 있으면 상세 결과 재조회용으로 저장."""
-    append_diagnosis(date=date, time=time, grade=grade, score=score, result_snapshot=result)
-    return {"ok": True, "history": load_diagnosis_history()}
+    """진단 한 건 추가. result 있으면 상세 결과 재조회용으로 저장. 반환: 추가한 기록 (result 제외)."""
+    scope = _owner_scope(user_id, pet_id)
+    record = append_diagnosis(date=date, time=time, grade=grade, score=score, result_snapshot=result, **scope)
+    return {"ok": True, "record": {f: record[f] for f in DEFAULT_HISTORY_FIELDS}}
 
 
 # --- 산책로 추천 (공원·걷기길 CSV) ---
 
 @app.get("/api/walk-routes")
 def api_walk_routes(
+    request: Request,
     filter_type: str = "normal",
     limit: int = 100,
     latitude: float | None = None,
     longitude: float | None = None,
     category: str | None = None,
     diagnosis_grade: str | None = None,
+    q: str | None = None,
 ):
     """
     공공데이터 CSV(공원 + 둘레길/걷기길) 기반 산책로 목록.
@@ -133,7 +278,25 @@ def api_walk_routes(
     category: 평지위주|단거리|장거리|경사 (또는 flat|short|long|slope) — 해당 조건으로 필터.
     latitude, longitude: 선택. 있으면 해당 위치에서 가까운 순으로 정렬하고 distance_from_user_km 포함.
     diagnosis_grade: 선택. 정상|1기|3기 — 있으면 진단 결과별 거리·장소 유형 기준으로 추천하고 recommendation_reason 포함해 반환.
+    q: 선택. 검색어 — 단어(공백 구분)를 모두 이름·공원 유형·설명에 포함한 코스만 (diagnosis_grade 추천에는 미적용).
+    ETag(쿼리 + 코스 데이터 버전) 지원: If-None-Match 가 같으면 304.
     """
+    return cached_json(
+        request,
+        dataset_version(),
+        lambda: _walk_routes_payload(filter_type, limit, latitude, longitude, category, diagnosis_grade, q),
+    )
+
+
+def _walk_routes_payload(
+    filter_type: str,
+    limit: int,
+    latitude: float | None,
+    longitude: float | None,
+    category: str | None,
+    diagnosis_grade: str | None,
+    q: str | None,
+):
     from .walk_routes import recommend_walkway
 
     if diagnosis_grade and diagnosis_grade.strip() in ("정상", "1기", "3기"):
@@ -159,9 +322,56 @@ def api_walk_routes(
         user_lat=latitude,
         user_lon=longitude,
         category=category,
+        q=q,
+    )
+
+
+@app.get("/api/walk-routes/viewport")
+def api_walk_routes_viewport(
+    request: Request,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int = 14,
+    filter_type: str = "normal",
+    category: str | None = None,
+    q: str | None = None,
+):
+    """
+    지도 화면(bbox) 안의 산책로. 지도 이동·확대 시 화면 모서리와 줌 레벨로 호출.
+    filter_type, category, q: /api/walk-routes 와 동일.
+    낮은 줌 또는 항목이 많으면 clusters(중심 위경도·개수)로 묶어 응답 크기를 제한. ETag/304 지원.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="min_lat/min_lon must be <= max_lat/max_lon")
+    if not 0 <= zoom <= 22:
+        raise HTTPException(status_code=400, detail="zoom must be between 0 and 22")
+    return cached_json(
+        request,
+        dataset_version(),
+        lambda: get_walk_routes_in_viewport(
+            min_lat, min_lon, max_lat, max_lon, zoom=zoom, filter_type=filter_type, category=category, q=q
+        ),
     )
 
 
+@app.post("/api/walk-routes/batch")
+def api_walk_routes_batch(body: WalkRoutesBatchRequest):
+    """
+    여러 좌표에 대한 진단별 산책로 추천 (최대 1000개).
+    결과는 좌표마다 /api/walk-routes?diagnosis_grade=... 를 호출한 것과 동일하며, 요청한 좌표 순서대로 반환.
+    """
+    from .walk_routes import _to_route_item
+
+    points = [(p.latitude, p.longitude) for p in body.points]
+    rows, reason = recommend_walkway_batch(body.diagnosis_grade, points, limit=body.limit)
+    return {
+        "recommendation_reason": reason,
+        "results": [[_to_route_item(r, r["distance_km"]) for r in row] for row in rows],
+    }
+
+
 def _is_json_type(content_type: str, filename: str) -> bool:
     return (
         content_type.startswith("application/json")
@@ -173,14 +383,8 @@ def _is_json_type(content_type: str, filename: str) -> bool:
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".avi", ".mkv"}
 ZIP_EXTENSIONS = {".zip"}
-IMAGE_EXT_TO_CONTENT_TYPE = {
-    ".jpg": "image/jpeg",
-    ".jpeg": "image/jpeg",
-    ".png": "image/png",
-    ".gif": "image/gif",
-    ".webp": "image/webp",
-    ".bmp": "image/bmp",
-}
+# 크기를 모르는 업로드를 읽는 단위
+_UPLOAD_CHUNK = 1 << 20
 
 
 def _body_looks_like_image(body: bytes) -> bool:
@@ -241,80 +445,45 @@ def _is_zip_type(content_type: str, filename: str, body: bytes) -> bool:
     return False
 
 
-# ZIP 내 추출 대상: .jpg, .png만 (동영상 프레임 이미지)
-ZIP_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
-
-
-def _extract_images_from_zip(zip_bytes: bytes) -> list[tuple[bytes, str]]:
-    """ZIP 압축 해제 후 내부 .jpg/.png 이미지 리스트. 반환: [(bytes, content_type), ...]"""
-    out: list[tuple[bytes, str]] = []
-    try:
-        with zipfile.ZipFile(BytesIO(zip_bytes), "r") as zf:
-            for name in sorted(zf.namelist()):
-                if zf.getinfo(name).is_dir():
-                    continue
-                ext = "." + (name.rsplit(".", 1)[-1].lower()) if "." in name else ""
-                if ext not in ZIP_IMAGE_EXTENSIONS:
-                    continue
-                content_type = IMAGE_EXT_TO_CONTENT_TYPE.get(ext, "image/jpeg")
-                try:
-                    data = zf.read(name)
-                    if len(data) < 100:
-                        continue
-                    out.append((data, content_type))
-                except Exception:
-                    continue
-    except zipfile.BadZipFile:
-        return []
-    return out
-
-
-def _decode_image(img_bytes: bytes) -> np.ndarray:
-    """이미지 bytes → BGR numpy (OpenCV)."""
-    nparr = np.frombuffer(img_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    if img is not None:
-        return img
-    from PIL import Image
-    pil = Image.open(BytesIO(img_bytes))
-    return cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
-
-
 def _run_predict_zip(
     zip_bytes: bytes,
     model,
     device,
+    frame_features: list[np.ndarray] | None = None,
 ) -> PredictResponse:
     """
-    ZIP 처리: 압축 해제 → .jpg/.png 리스트 → 각 이미지 YOLOv8-pose로 10점 추출
+    ZIP 처리: 압축 해제 → .jpg/.png 리스트 → 이미지를 묶어 YOLOv8-pose로 10점 추출
     → Data_AI_Final 동일 방식으로 27차원 특징 계산 → 다중 프레임 확률 평균/대표 프레임으로 최종 진단.
+    frame_features: 주면 프레임별 27차원을 여기에 추가 (키포인트 보관용).
     """
-    images = _extract_images_from_zip(zip_bytes)
-    if not images:
+    n_images, list_features = zip_to_frame_features(zip_bytes)
+    if not n_images:
         raise HTTPException(
             status_code=400,
             detail="ZIP 파일에 .jpg 또는 .png 이미지가 없습니다. 동영상을 프레임별로 나눈 이미지를 넣어주세요.",
         )
-    from .pose_to_features import _get_pose_model
-    pose_model = _get_pose_model()
-    list_features: list[np.ndarray] = []
-    for img_bytes, _ in images:
-        try:
-            img_bgr = _decode_image(img_bytes)
-            if img_bgr is None or img_bgr.size == 0:
-                continue
-            features, _ = image_to_27_features(img_bgr, pose_model=pose_model)
-            list_features.append(features)
-        except Exception:
-            continue
     if not list_features:
         raise HTTPException(
             status_code=400,
             detail="ZIP 내 이미지에서 포즈를 추출할 수 없었습니다. YOLOv8-pose가 인식할 수 있는 형태의 이미지인지 확인해주세요.",
         )
+    if frame_features is not None:
+        frame_features.extend(list_features)
     return run_predict_from_features_multi_frame(list_features, model, device)
 
 
+def _archive_keypoints(response: PredictResponse, frame_features: list[np.ndarray], mode: str) -> PredictResponse:
+    """프레임별 키포인트 보관 후 keypoints_id를 붙여 반환. 보관 실패는 진단에 영향 없음."""
+    try:
+        keypoints_id = save_keypoints(frame_features, mode) if frame_features else None
+    except Exception as e:
+        print(f"[predict] keypoint archive failed: {e}")
+        return response
+    if keypoints_id is None:
+        return response
+    return response.model_copy(update={"keypoints_id": keypoints_id})
+
+
 # 위치 미제공 시 시연용 기본값 (서울시청)
 _DEFAULT_LAT, _DEFAULT_LON = 37.5667, 126.9784
 
@@ -347,6 +516,8 @@ def _attach_recommended_courses(response: PredictResponse, latitude: str | None,
 
 @app.post("/predict", response_model=PredictResponse)
 async def predict(
+    request: Request,
+    http_response: Response,
     file: UploadFile = File(...),
     latitude: str | None = Form(None),
     longitude: str | None = Form(None),
@@ -357,46 +528,119 @@ async def predict(
     - ZIP: 압축 내 이미지마다 모델 추론 후, 확률(confidence)이 가장 높은 결과를 최종 진단으로 반환.
     - JSON: 27개 숫자 배열 또는 {"features": [27개]} 형태로 바로 추론.
     - latitude, longitude(선택): 현재 위치 위경도. 있으면 응답에 recommended_courses(진단별 상위 3개) 포함.
+    - 관리자 프로파일 수집(profiling.py): X-Patella-Profile: 1 + X-Admin-Token 헤더 또는 샘플링.
+    - 요청 메모리 한도(mem_budget.py): 넘으면 해상도·프레임 수를 낮추고, 그래도 안 되면 413.
+      최고 사용량은 X-Memory-Peak 헤더(바이트), 품질을 낮췄으면 X-Memory-Degraded.
     """
     if _model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     content_type = (file.content_type or "").strip() or "application/octet-stream"
     filename = file.filename or ""
+    budget = mem_budget.RequestBudget()
+    token = mem_budget.activate(budget)
+    try:
+        with stage("read"):
+            body = await _read_upload(file)
+        if not body:
+            raise HTTPException(status_code=400, detail="Empty file")
+        note("upload_bytes", len(body))
+
+        print(f"[predict] filename={filename!r} content_type={content_type!r} size={len(body)}")
+
+        reason = profiling.should_profile(request.headers)
+        if reason is None:
+            response = _predict_body(body, content_type, filename, latitude, longitude)
+        else:
+            meta = {"filename": filename, "content_type": content_type, "size": len(body)}
+            response = profiling.run_profiled(
+                reason, meta, _predict_body, body, content_type, filename, latitude, longitude
+            )
+    except mem_budget.MemoryBudgetExceeded as e:
+        print(f"[predict] rejected {filename!r}: {e}")
+        raise HTTPException(status_code=413, detail=str(e), headers=budget.headers())
+    except HTTPException as e:
+        # 오류 응답(400·413·500)에도 메모리 사용량 헤더
+        e.headers = {**(e.headers or {}), **budget.headers()}
+        raise
+    finally:
+        mem_budget.deactivate(token)
+        note("memory_peak", budget.peak)
+    http_response.headers.update(budget.headers())
+    return response
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """업로드 본문을 메모리로 읽으며 요청 메모리 한도에 계산. 크기를 알면 읽기 전에 한도부터 확인."""
     try:
-        body = await file.read()
+        if file.size is not None:
+            mem_budget.charge(file.size, "업로드 파일")
+            return await file.read()
+        body = bytearray()
+        while chunk := await file.read(_UPLOAD_CHUNK):
+            mem_budget.charge(len(chunk), "업로드 파일")
+            body += chunk
+        with mem_budget.held(len(body), "업로드 파일 복사"):
+            return bytes(body)
+    except mem_budget.MemoryBudgetExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read file: {e}")
-    if not body:
-        raise HTTPException(status_code=400, detail="Empty file")
 
-    print(f"[predict] filename={filename!r} content_type={content_type!r} size={len(body)}")
+
+def _predict_body(
+    body: bytes,
+    content_type: str,
+    filename: str,
+    latitude: str | None,
+    longitude: str | None,
+) -> PredictResponse:
+    """업로드를 읽은 뒤의 /predict 처리: 형식 판별 → 전처리·추론 → 키포인트 보관 → 추천 코스."""
+    with stage("sniff"):
+        if _is_json_type(content_type, filename):
+            kind = "json"
+        elif _is_image_or_video_type(content_type, filename, body):
+            kind = "media"
+        elif _is_zip_type(content_type, filename, body):
+            kind = "zip"
+        else:
+            kind = None
 
     response: PredictResponse
-    if _is_json_type(content_type, filename):
+    frame_features: list[np.ndarray] = []
+    archive_mode = "mean"
+    if kind == "json":
         try:
             import json
-            data = json.loads(body.decode("utf-8"))
+            with stage("parse"):
+                data = json.loads(body.decode("utf-8"))
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
         try:
-            features = parse_json_to_features(data)
+            with stage("features"):
+                features = parse_json_to_features(data)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         try:
             response = run_predict_from_features(features, _model, _device)
+            # 보관은 annotation_info 입력만: 27차원을 직접 보낸 경우 재판정 시 각도·비율을 다시 계산하면 보낸 값과 달라짐
+            if isinstance(data, dict) and "features" not in data:
+                frame_features.append(features)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
-    elif _is_image_or_video_type(content_type, filename, body):
+    elif kind == "media":
         try:
-            response = run_predict(body, content_type, _model, _device)
+            response = run_predict(body, content_type, _model, _device, frame_features)
+        except mem_budget.MemoryBudgetExceeded:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
-    elif _is_zip_type(content_type, filename, body):
+    elif kind == "zip":
         try:
-            response = _run_predict_zip(body, _model, _device)
-        except HTTPException:
+            response = _run_predict_zip(body, _model, _device, frame_features)
+            archive_mode = "multi"
+        except (HTTPException, mem_budget.MemoryBudgetExceeded):
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
@@ -408,4 +652,40 @@ async def predict(
                 "Use image (jpg/png/...), video (mp4/...), ZIP (프레임 이미지 묶음), or .json with 27 features."
             ),
         )
-    return _attach_recommended_courses(response, latitude, longitude)
+    note("frames", len(frame_features))
+    with stage("archive"):
+        response = _archive_keypoints(response, frame_features, archive_mode)
+    with stage("courses"):
+        return _attach_recommended_courses(response, latitude, longitude)
+
+
+# --- 관리자: 요청 프로파일 (PATELLA_ADMIN_TOKEN 설정 시에만) ---
+
+
+def _require_admin(request: Request) -> None:
+    """프로파일 수집이 꺼져 있으면 404, 토큰이 틀리면 401."""
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.is_admin(request.headers):
+        raise HTTPException(status_code=401, detail="admin token required")
+
+
+@app.get("/admin/profiles", include_in_schema=False)
+def admin_list_profiles(request: Request):
+    """저장된 /predict 프로파일 목록 (최신순)."""
+    _require_admin(request)
+    return {"profiles": profiling.list_profiles(), "max": profiling.MAX_PROFILES}
+
+
+@app.get("/admin/profiles/{profile_id}", include_in_schema=False)
+def admin_get_profile(request: Request, profile_id: str, format: str = "json"):
+    """프로파일 하나. format=json(요약, 상위 함수·할당) | prof(pstats 파일)."""
+    _require_admin(request)
+    if format not in ("json", "prof"):
+        raise HTTPException(status_code=400, detail="format must be json or prof")
+    path = profiling.profile_path(profile_id, f".{format}")
+    if path is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    if format == "json":
+        return FileResponse(path, media_type="application/json")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
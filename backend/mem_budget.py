@@ -0,0 +1,156 @@
+"""
+요청별 메모리 한도·사용량 계산 (/predict).
+- 요청마다 RequestBudget 을 contextvar 에 두고, 큰 버퍼를 잡을 때 charge/release (또는 with held(...))
+    업로드 본문, ZIP 안 이미지 원본, 디코딩한 프레임(처리 중 복사본 포함 FRAME_WORK_FACTOR 배), 영상 프레임별 특징
+- 한도를 넘으면 MemoryBudgetExceeded (/predict 는 413). 그 전에 가능하면 품질을 낮춰서 처리:
+    사진·ZIP 프레임은 디코딩 해상도를 1/2·1/4·1/8 로 (plan_reduction), ZIP 포즈 배치는 들어가는 장수만큼만,
+    영상은 모아 둔 프레임 샘플을 절반씩 솎아 냄
+- 한도: PATELLA_REQUEST_MEMORY_MB (기본 1024, 0이면 제한 없이 계산만). 최고 사용량은 응답 헤더·/metrics 로
+- 요청 밖(CLI 등)에서는 아무것도 하지 않음 (held·charge 는 그냥 통과, plan_reduction 은 항상 1)
+"""
+from __future__ import annotations
+
+import math
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import BytesIO
+
+import cv2
+
+LIMIT_BYTES = int(float(os.environ.get("PATELLA_REQUEST_MEMORY_MB") or 1024) * 2**20)
+# 디코딩한 프레임 하나를 처리하는 동안 실제로 쓰는 메모리 ≈ 프레임 크기 × 이 값 (회색조·블러·이진화 등 복사본)
+FRAME_WORK_FACTOR = 2.0
+# 디코딩 축소 비율 → OpenCV 플래그 (JPEG 은 축소 디코딩이라 원본 해상도 버퍼를 만들지 않음)
+IMREAD_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class MemoryBudgetExceeded(Exception):
+    """요청 메모리 한도 초과 (품질을 낮춰도 처리할 수 없음)."""
+
+
+class RequestBudget:
+    """요청 하나의 메모리 사용량(바이트). limit 0 이면 제한 없이 계산만."""
+
+    __slots__ = ("limit", "current", "peak", "degraded")
+
+    def __init__(self, limit: int = LIMIT_BYTES):
+        self.limit = limit
+        self.current = 0
+        self.peak = 0
+        # 품질을 낮춘 횟수 (downscaled_frames, batch_splits, video_decimations)
+        self.degraded: dict[str, int] = {}
+
+    def remaining(self) -> float:
+        return self.limit - self.current if self.limit else math.inf
+
+    def charge(self, nbytes: int, what: str) -> None:
+        nbytes = int(nbytes)
+        if self.limit and self.current + nbytes > self.limit:
+            raise MemoryBudgetExceeded(
+                f"요청 메모리 한도 {_mb(self.limit)} 초과: {what} {_mb(nbytes)} 필요, 남은 용량 {_mb(self.remaining())}"
+            )
+        self.current += nbytes
+        self.peak = max(self.peak, self.current)
+
+    def release(self, nbytes: int) -> None:
+        self.current = max(0, self.current - int(nbytes))
+
+    def note(self, key: str) -> None:
+        self.degraded[key] = self.degraded.get(key, 0) + 1
+
+    def headers(self) -> dict[str, str]:
+        """응답 헤더: X-Memory-Peak(바이트), 품질을 낮췄으면 X-Memory-Degraded."""
+        out = {"X-Memory-Peak": str(self.peak)}
+        if self.degraded:
+            out["X-Memory-Degraded"] = ",".join(f"{k}={v}" for k, v in self.degraded.items())
+        return out
+
+
+_budget: ContextVar[RequestBudget | None] = ContextVar("request_memory_budget", default=None)
+
+
+def activate(budget: RequestBudget):
+    """현재 요청의 한도로 설정. 반환한 token 으로 deactivate."""
+    return _budget.set(budget)
+
+
+def deactivate(token) -> None:
+    _budget.reset(token)
+
+
+def current() -> RequestBudget | None:
+    return _budget.get()
+
+
+def charge(nbytes: int, what: str) -> None:
+    budget = _budget.get()
+    if budget is not None:
+        budget.charge(nbytes, what)
+
+
+def release(nbytes: int) -> None:
+    budget = _budget.get()
+    if budget is not None:
+        budget.release(nbytes)
+
+
+def note(key: str) -> None:
+    budget = _budget.get()
+    if budget is not None:
+        budget.note(key)
+
+
+@contextmanager
+def held(nbytes: int, what: str):
+    """블록 동안 nbytes 를 잡아 둠."""
+    charge(nbytes, what)
+    try:
+        yield
+    finally:
+        release(nbytes)
+
+
+def frame_bytes(width: int, height: int, reduction: int = 1, channels: int = 3) -> int:
+    """축소 디코딩한 프레임을 처리하는 데 드는 메모리 (FRAME_WORK_FACTOR 포함)."""
+    return int(math.ceil(width / reduction) * math.ceil(height / reduction) * channels * FRAME_WORK_FACTOR)
+
+
+def image_size(data: bytes) -> tuple[int, int] | None:
+    """이미지 헤더만 읽어 (가로, 세로). 모르는 형식이면 None."""
+    try:
+        from PIL import Image
+
+        with Image.open(BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def plan_reduction(size: tuple[int, int] | None, slots: int = 1, what: str = "이미지") -> int:
+    """
+    남은 용량을 slots 장이 나눠 쓸 때 이미지 한 장을 디코딩할 축소 비율 (1·2·4·8).
+    1/8 로도 안 되면 MemoryBudgetExceeded. 한도가 없거나 크기를 모르면 1.
+    """
+    budget = _budget.get()
+    if budget is None or not budget.limit or size is None:
+        return 1
+    available = budget.remaining() / max(1, slots)
+    for reduction in IMREAD_FLAGS:
+        if frame_bytes(*size, reduction) <= available:
+            if reduction > 1:
+                budget.note("downscaled_frames")
+            return reduction
+    raise MemoryBudgetExceeded(
+        f"요청 메모리 한도 {_mb(budget.limit)} 초과: {what} {size[0]}x{size[1]} 은 1/8 로 줄여도 "
+        f"{_mb(frame_bytes(*size, 8))} 필요, 남은 용량 {_mb(available)}"
+    )
+
+
+def _mb(nbytes: float) -> str:
+    return f"{nbytes / 2**20:.1f}MB"
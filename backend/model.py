@@ -42,12 +42,12 @@ def get_model_path() -> Path:
     return Path(__file__).resolve().parent / "dog_patella_best.pth"
 
 
-def load_dog_patella_model(device: str | None = None) -> DogPatellaModel:
-    """Data_AI_Final에서 저장한 state_dict 로드."""
+def load_dog_patella_model(device: str | None = None, path: str | Path | None = None) -> DogPatellaModel:
+    """Data_AI_Final에서 저장한 state_dict 로드. path 생략 시 get_model_path()."""
     if device is None:
         device = "cuda" if torch.cuda.is_available() else "cpu"
     device = torch.device(device)
-    path = get_model_path()
+    path = Path(path) if path is not None else get_model_path()
     if not path.is_file():
         raise FileNotFoundError(f"Model file not found: {path}")
 
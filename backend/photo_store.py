@@ -0,0 +1,147 @@
+"""
+반려견 프로필 사진 저장 (프로필 JSON/DB 밖의 별도 파일).
+- 사진 id = 원본 bytes의 sha256 앞 24자 → 같은 사진은 같은 id, 내용이 바뀌면 id도 바뀜 (캐시 무효화 불필요)
+- 업로드 시 원본 + 축소본(small, medium) JPEG 생성
+- 반려견 디렉터리 아래 photos/ 에 저장 (store.py 의 user_id·pet_id 구분 그대로)
+    photos/{photo_id}.{jpg|png|webp|...}     원본
+    photos/{photo_id}_small.jpg             128px
+    photos/{photo_id}_medium.jpg            512px
+- 프로필에는 photo_id만 저장
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import store
+
+PHOTOS_DIR = "photos"
+# 축소본 이름 → 긴 변 최대 px
+THUMBNAIL_SIZES = {"small": 128, "medium": 512}
+PHOTO_SIZES = ("original", *THUMBNAIL_SIZES)
+THUMBNAIL_QUALITY = 85
+# 업로드 허용 최대 크기 (bytes)
+MAX_PHOTO_BYTES = 20 * 1024 * 1024
+# 허용 최대 픽셀 수 (헤더로 먼저 확인 — 작게 압축된 거대 PNG·GIF 를 디코딩하지 않도록)
+MAX_PHOTO_PIXELS = 40_000_000
+# 정리 시 이보다 최근 파일은 남김 (동시에 올라온 다른 사진이 프로필에 반영되기 전 지우지 않도록)
+PRUNE_GRACE_SEC = 60
+
+_PHOTO_ID = re.compile(r"^[0-9a-f]{24}$")
+_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "BMP": "bmp"}
+_MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif", "bmp": "image/bmp"}
+
+
+def _photos_dir(user_id: str | None, pet_id: str | None) -> Path:
+    return store._pet_dir(user_id, pet_id) / PHOTOS_DIR
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _thumbnail_base(img: Image.Image, max_side: int) -> Image.Image:
+    """축소본들의 공통 원본: 긴 변이 max_side 이상 남는 정수 배율로 줄인 RGB/RGBA 이미지."""
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+    factor = max(1, max(img.size) // max_side)
+    return img.reduce(factor) if factor > 1 else img
+
+
+def _thumbnail(img: Image.Image, max_side: int) -> bytes:
+    thumb = img.copy()
+    thumb.thumbnail((max_side, max_side), Image.LANCZOS)
+    if thumb.mode != "RGB":
+        # 투명 배경은 흰색으로
+        background = Image.new("RGB", thumb.size, (255, 255, 255))
+        rgba = thumb.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        thumb = background
+    buf = BytesIO()
+    thumb.save(buf, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+def save_photo(data: bytes, user_id: str | None = None, pet_id: str | None = None) -> str:
+    """이미지 bytes 저장 + 축소본 생성. 반환: photo_id. 이미지가 아니거나 너무 크면 ValueError."""
+    if not data:
+        raise ValueError("empty photo")
+    if len(data) > MAX_PHOTO_BYTES:
+        raise ValueError(f"photo too large (max {MAX_PHOTO_BYTES // (1024 * 1024)}MB)")
+    try:
+        img = Image.open(BytesIO(data))
+        ext = _EXTENSIONS.get(img.format or "")
+        if img.width * img.height > MAX_PHOTO_PIXELS:
+            raise ValueError(f"photo too large ({img.width}x{img.height}, max {MAX_PHOTO_PIXELS // 1_000_000}MP)")
+        # JPEG 은 가장 큰 축소본 근처 해상도로 디코딩 (원본 해상도를 메모리에 풀지 않음)
+        largest = max(THUMBNAIL_SIZES.values())
+        img.draft(None, (largest, largest))
+        img.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"invalid image: {e}") from e
+    if ext is None:
+        raise ValueError(f"unsupported image format: {img.format}")
+    photo_id = hashlib.sha256(data).hexdigest()[:24]
+    directory = _photos_dir(user_id, pet_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    original = directory / f"{photo_id}.{ext}"
+    if not original.is_file():
+        # 휴대폰 사진의 EXIF 회전 반영 (줄인 뒤에)
+        img = ImageOps.exif_transpose(_thumbnail_base(img, largest))
+        for size, max_side in THUMBNAIL_SIZES.items():
+            _write_file(directory / f"{photo_id}_{size}.jpg", _thumbnail(img, max_side))
+        # 원본은 마지막에 → 원본이 있으면 축소본도 있음
+        _write_file(original, data)
+    else:
+        os.utime(original)
+    return photo_id
+
+
+def photo_file(
+    photo_id: str, size: str = "original", user_id: str | None = None, pet_id: str | None = None
+) -> tuple[Path, str] | None:
+    """저장된 사진 파일 경로와 media type. 없으면 None. size는 PHOTO_SIZES 중 하나."""
+    if not _PHOTO_ID.match(photo_id or "") or size not in PHOTO_SIZES:
+        return None
+    directory = _photos_dir(user_id, pet_id)
+    if size != "original":
+        path = directory / f"{photo_id}_{size}.jpg"
+        return (path, "image/jpeg") if path.is_file() else None
+    for ext, media_type in _MEDIA_TYPES.items():
+        path = directory / f"{photo_id}.{ext}"
+        if path.is_file():
+            return path, media_type
+    return None
+
+
+def prune_photos(keep: str | None, user_id: str | None = None, pet_id: str | None = None) -> int:
+    """keep 이외의 사진 파일 삭제 (PRUNE_GRACE_SEC 보다 최근 것은 남김). 반환: 지운 파일 수."""
+    directory = _photos_dir(user_id, pet_id)
+    if not directory.is_dir():
+        return 0
+    cutoff = time.time() - PRUNE_GRACE_SEC
+    removed = 0
+    for path in directory.iterdir():
+        if path.name.startswith(".") or (keep and path.name.startswith(keep)):
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
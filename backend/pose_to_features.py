@@ -6,10 +6,15 @@ from __future__ import annotations
 
 import os
 import logging
+import zipfile
+from io import BytesIO
 
+import cv2
 import numpy as np
 
+from . import mem_budget
 from .feature_extract import build_27_features
+from .timing import stage
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +67,10 @@ DOG_24_TO_OUR_10 = [
     6,    # Ulnar styloid <- front_right_paw
 ]
 MIN_KEYPOINT_CONF = 0.25
+# 포즈 모델에 한 번에 넣는 이미지 수
+POSE_BATCH_SIZE = 16
+# ZIP 내 추출 대상: .jpg, .png만 (동영상 프레임 이미지) → content type
+ZIP_IMAGE_EXTENSIONS = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
 
 # 환경 변수: 강아지 포즈 모델 경로 (dog-pose.yaml로 학습한 .pt 권장)
 # 예: POSE_MODEL_PATH=./weights/yolov8n-pose-dog.pt 또는 Hugging Face URL
@@ -137,21 +146,8 @@ def _keypoints_to_joint_dict(
     return joint_dict
 
 
-def image_to_27_features(img_bgr: np.ndarray, pose_model=None) -> tuple[np.ndarray, float]:
-    """
-    단일 이미지(BGR) → 포즈 추정 → 10점 좌표 → 27차원 특징.
-    모델 출력이 24점이면 dog-pose 매핑, 17점이면 COCO(사람) 매핑 사용.
-    반환: (features shape (27,), keypoint_confidence 0~1).
-    """
-    if pose_model is None:
-        pose_model = _get_pose_model()
-    h, w = img_bgr.shape[:2]
-    if h == 0 or w == 0:
-        raise ValueError("Empty image")
-    results = pose_model(img_bgr, verbose=False)
-    if not results or len(results) == 0:
-        raise ValueError("No pose detection")
-    r = results[0]
+def _result_to_features(r, w: int, h: int) -> tuple[np.ndarray, float]:
+    """YOLO 결과 하나 → (27차원 특징, keypoint_confidence 0~1). 키포인트가 없으면 ValueError."""
     if r.keypoints is None or r.keypoints.data is None:
         raise ValueError("No keypoints")
     kpts_all = r.keypoints.data.cpu().numpy()
@@ -174,3 +170,150 @@ def image_to_27_features(img_bgr: np.ndarray, pose_model=None) -> tuple[np.ndarr
     dog_size = 0.5
     features = build_27_features(joint_dict, side=side, dog_size=dog_size)
     return features.astype(np.float32), min(max(conf, 0.0), 1.0)
+
+
+def image_to_27_features(img_bgr: np.ndarray, pose_model=None) -> tuple[np.ndarray, float]:
+    """
+    단일 이미지(BGR) → 포즈 추정 → 10점 좌표 → 27차원 특징.
+    모델 출력이 24점이면 dog-pose 매핑, 17점이면 COCO(사람) 매핑 사용.
+    반환: (features shape (27,), keypoint_confidence 0~1).
+    """
+    if pose_model is None:
+        pose_model = _get_pose_model()
+    h, w = img_bgr.shape[:2]
+    if h == 0 or w == 0:
+        raise ValueError("Empty image")
+    results = pose_model(img_bgr, verbose=False)
+    if not results or len(results) == 0:
+        raise ValueError("No pose detection")
+    return _result_to_features(results[0], w, h)
+
+
+def images_to_27_features(
+    images_bgr: list[np.ndarray], pose_model=None, batch_size: int = POSE_BATCH_SIZE
+) -> list[np.ndarray | None]:
+    """
+    여러 이미지를 batch_size 장씩 포즈 모델에 한 번에 넣어 27차원 특징.
+    반환: 이미지마다 특징, 포즈를 못 찾은 이미지는 None.
+    """
+    if pose_model is None:
+        pose_model = _get_pose_model()
+    out: list[np.ndarray | None] = [None] * len(images_bgr)
+    valid = [i for i, img in enumerate(images_bgr) if img is not None and img.size and min(img.shape[:2]) > 0]
+    for start in range(0, len(valid), batch_size):
+        idx = valid[start:start + batch_size]
+        try:
+            with stage("pose"):
+                results = pose_model([images_bgr[i] for i in idx], verbose=False)
+        except Exception as e:
+            logger.warning("pose batch failed: %s", e)
+            continue
+        with stage("features"):
+            for i, r in zip(idx, results or []):
+                h, w = images_bgr[i].shape[:2]
+                try:
+                    out[i] = _result_to_features(r, w, h)[0]
+                except Exception:
+                    continue
+    return out
+
+
+def _zip_image_members(zf: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """ZIP 안 .jpg/.png 항목 (이름순, 100바이트 미만 제외)."""
+    out: list[zipfile.ZipInfo] = []
+    for name in sorted(zf.namelist()):
+        info = zf.getinfo(name)
+        if info.is_dir() or info.file_size < 100:
+            continue
+        ext = "." + (name.rsplit(".", 1)[-1].lower()) if "." in name else ""
+        if ext in ZIP_IMAGE_EXTENSIONS:
+            out.append(info)
+    return out
+
+
+def decode_image(img_bytes: bytes, reduction: int = 1) -> np.ndarray:
+    """이미지 bytes → BGR numpy (OpenCV). reduction: 1·2·4·8 (가로·세로를 그만큼 줄여 디코딩)."""
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    img = cv2.imdecode(nparr, mem_budget.IMREAD_FLAGS[reduction])
+    if img is not None:
+        return img
+    from PIL import Image
+    pil = Image.open(BytesIO(img_bytes))
+    if reduction > 1:
+        pil = pil.reduce(reduction)
+    return cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
+
+
+def _decode_zip_batch(
+    zf: zipfile.ZipFile, members: list[zipfile.ZipInfo]
+) -> tuple[list[np.ndarray | None], int]:
+    """
+    members 앞에서부터 요청 메모리 한도 안에 들어가는 만큼 디코딩 (한도가 빠듯하면 해상도를 낮춤).
+    디코딩한 프레임만큼 한도를 잡아 두므로 다 쓰면 release 필요.
+    반환: (디코딩한 이미지 — 실패는 None, 잡아 둔 바이트). 한 장도 못 넣으면 MemoryBudgetExceeded.
+    """
+    decoded: list[np.ndarray | None] = []
+    held = 0
+    for k, info in enumerate(members):
+        try:
+            with mem_budget.held(info.file_size, f"ZIP 이미지 {info.filename!r}"):
+                data = zf.read(info)
+                size, what = mem_budget.image_size(data), f"ZIP 이미지 {info.filename!r}"
+                try:
+                    reduction = mem_budget.plan_reduction(size, len(members) - k, what)
+                except mem_budget.MemoryBudgetExceeded:
+                    if decoded:
+                        raise
+                    # 배치 첫 장: 이 한 장만이라도 들어가는 비율로
+                    reduction = mem_budget.plan_reduction(size, 1, what)
+                img = decode_image(data, reduction)
+                del data
+        except mem_budget.MemoryBudgetExceeded:
+            if not decoded:
+                raise
+            # 남은 장은 다음 배치로 (한 번에 메모리에 두는 프레임 수를 줄임)
+            mem_budget.note("batch_splits")
+            break
+        except Exception:
+            img = None
+        if img is not None:
+            nbytes = int(img.nbytes * mem_budget.FRAME_WORK_FACTOR)
+            mem_budget.charge(nbytes, "ZIP 프레임")
+            held += nbytes
+        decoded.append(img)
+    return decoded, held
+
+
+def zip_to_frame_features(
+    zip_bytes: bytes, pose_model=None, batch_size: int = POSE_BATCH_SIZE
+) -> tuple[int, list[np.ndarray]]:
+    """
+    ZIP → .jpg/.png 프레임 디코딩 → 포즈 배치 추정 → 프레임별 27차원.
+    포즈 배치(batch_size 장)만큼만 읽고 디코딩해서 메모리에 두고, 요청 메모리 한도(mem_budget)가
+    빠듯하면 해상도를 낮추거나 배치를 더 작게 나눔.
+    반환: (ZIP 안 이미지 수, 포즈를 찾은 프레임의 특징 목록)
+    """
+    try:
+        zf = zipfile.ZipFile(BytesIO(zip_bytes), "r")
+    except zipfile.BadZipFile:
+        return 0, []
+    features: list[np.ndarray] = []
+    with zf:
+        with stage("unzip"):
+            members = _zip_image_members(zf)
+        if not members:
+            return 0, []
+        if pose_model is None:
+            pose_model = _get_pose_model()
+        start = 0
+        while start < len(members):
+            with stage("decode"):
+                decoded, held = _decode_zip_batch(zf, members[start:start + batch_size])
+            try:
+                batch = images_to_27_features(decoded, pose_model, batch_size)
+            finally:
+                del decoded
+                mem_budget.release(held)
+            features.extend(f for f in batch if f is not None)
+            start += len(batch)
+    return len(members), features
@@ -12,9 +12,15 @@ import cv2
 import numpy as np
 from PIL import Image
 
+from . import mem_budget
 from .feature_extract import build_27_features
+from .timing import stage
 
 NUM_FEATURES = 27
+# 영상에서 모아 두는 프레임 샘플 상한 (길이를 모르는 영상은 모든 프레임이 샘플) — 넘으면 절반으로 솎아 냄
+MAX_VIDEO_SAMPLES = 256
+# 프레임 샘플 하나(27차원 + 메트릭)가 차지하는 메모리 추정치
+_SAMPLE_BYTES = 1024
 
 # Data_AI_Final과 동일한 10개 키포인트 라벨 순서
 TARGET_LABELS = [
@@ -125,42 +131,57 @@ def parse_json_to_features(data: Any) -> np.ndarray:
     raise ValueError("JSON must be [f1..f27], { features: [...] }, or { annotation_info: [...] }")
 
 
-def preprocess_logic(file_bytes: bytes, content_type: str) -> tuple[np.ndarray, dict[str, Any]]:
+def preprocess_logic(
+    file_bytes: bytes,
+    content_type: str,
+    frame_features: list[np.ndarray] | None = None,
+) -> tuple[np.ndarray, dict[str, Any]]:
     """
     이미지/영상: 프레임별 27차원 추출 (Data_AI_Final 형식).
+    frame_features: 주면 평균 내기 전 프레임별 27차원을 여기에 추가 (키포인트 보관용).
     반환: (features shape (27,), metrics dict)
     """
-    nparr = np.frombuffer(file_bytes, np.uint8)
     metrics_agg: dict[str, list] = {}
 
     if content_type.startswith("video/"):
         suffix = ".mp4" if "mp4" in content_type else ".webm"
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
-            f.write(file_bytes)
-            f.flush()
-            temp_path = f.name
-        cap = cv2.VideoCapture(temp_path)
+        with stage("decode"):
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+                f.write(file_bytes)
+                f.flush()
+                temp_path = f.name
+            cap = cv2.VideoCapture(temp_path)
         try:
             if not cap.isOpened():
-                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                with stage("decode"):
+                    img = _decode_image(file_bytes)
                 if img is not None:
-                    return _extract_frame_features(img)
+                    return _extract_frame(img, frame_features)
                 return np.zeros(NUM_FEATURES, dtype=np.float32), _default_metrics()
             feat_list = []
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
             step = max(1, total_frames // 10)
             idx = 0
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                if idx % step == 0:
-                    f, m = _extract_frame_features(frame)
-                    feat_list.append(f)
-                    for k, v in m.items():
-                        if isinstance(v, (int, float)):
-                            metrics_agg.setdefault(k, []).append(v)
-                idx += 1
+            width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            # 디코더가 원본 해상도로 내주므로 줄일 수 없음 → 프레임 하나를 처리할 자리가 없으면 바로 413
+            with mem_budget.held(mem_budget.frame_bytes(width, height), f"영상 프레임 {width}x{height}"):
+                while True:
+                    with stage("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if idx % step == 0:
+                        step = _make_room_for_sample(feat_list, metrics_agg, step)
+                        if idx % step:
+                            mem_budget.release(_SAMPLE_BYTES)
+                        else:
+                            with stage("features"):
+                                f, m = _extract_frame_features(frame)
+                            feat_list.append(f)
+                            for k, v in m.items():
+                                if isinstance(v, (int, float)):
+                                    metrics_agg.setdefault(k, []).append(v)
+                    idx += 1
         finally:
             cap.release()
             try:
@@ -169,17 +190,61 @@ def preprocess_logic(file_bytes: bytes, content_type: str) -> tuple[np.ndarray,
                 pass
         if not feat_list:
             return np.zeros(NUM_FEATURES, dtype=np.float32), _default_metrics()
+        if frame_features is not None:
+            frame_features.extend(feat_list)
         features = np.mean(feat_list, axis=0).astype(np.float32)
         metrics = {k: round(float(np.mean(v)), 2) for k, v in metrics_agg.items() if v}
         if "normal_hip" not in metrics:
             metrics.update(_default_metrics())
         return features, metrics
 
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    with stage("decode"):
+        img = _decode_image(file_bytes)
+    if img is None:
+        return np.zeros(NUM_FEATURES, dtype=np.float32), _default_metrics()
+    return _extract_frame(img, frame_features)
+
+
+def _decode_image(file_bytes: bytes) -> np.ndarray | None:
+    """이미지 bytes → BGR. 요청 메모리 한도가 빠듯하면 해상도를 낮춰 디코딩 (mem_budget.plan_reduction)."""
+    reduction = mem_budget.plan_reduction(mem_budget.image_size(file_bytes))
+    img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), mem_budget.IMREAD_FLAGS[reduction])
     if img is None:
         try:
             pil = Image.open(io.BytesIO(file_bytes))
+            if reduction > 1:
+                pil = pil.reduce(reduction)
             img = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
         except Exception:
-            return np.zeros(NUM_FEATURES, dtype=np.float32), _default_metrics()
-    return _extract_frame_features(img)
+            img = None
+    return img
+
+
+def _make_room_for_sample(feat_list: list[np.ndarray], metrics_agg: dict[str, list], step: int) -> int:
+    """
+    영상 프레임 샘플 하나를 더 모을 자리(개수 상한·요청 메모리 한도)를 잡음.
+    자리가 없으면 모아 둔 샘플을 하나 걸러 하나씩 버리고 간격을 두 배로. 반환: 새 샘플 간격.
+    """
+    while True:
+        if len(feat_list) < MAX_VIDEO_SAMPLES:
+            try:
+                mem_budget.charge(_SAMPLE_BYTES, "영상 프레임 샘플")
+                return step
+            except mem_budget.MemoryBudgetExceeded:
+                if len(feat_list) < 2:
+                    raise
+        kept = feat_list[::2]
+        mem_budget.release((len(feat_list) - len(kept)) * _SAMPLE_BYTES)
+        feat_list[:] = kept
+        for values in metrics_agg.values():
+            values[:] = values[::2]
+        mem_budget.note("video_decimations")
+        step *= 2
+
+
+def _extract_frame(frame: np.ndarray, frame_features: list[np.ndarray] | None) -> tuple[np.ndarray, dict[str, Any]]:
+    with stage("features"), mem_budget.held(int(frame.nbytes * mem_budget.FRAME_WORK_FACTOR), "프레임 처리"):
+        features, metrics = _extract_frame_features(frame)
+    if frame_features is not None:
+        frame_features.append(features)
+    return features, metrics
@@ -0,0 +1,167 @@
+"""
+/predict 요청별 프로파일 수집 (관리자 전용, 켜야만 동작).
+- PATELLA_ADMIN_TOKEN 이 설정돼 있을 때만 사용 가능 (없으면 꺼짐: 요청마다 확인하는 것은 전역 bool 하나)
+- 수집 조건: 요청 헤더 X-Patella-Profile: 1 + X-Admin-Token 일치, 또는 PATELLA_PROFILE_SAMPLE_RATE(0~1) 확률
+- 업로드를 읽은 뒤 진단 처리(형식 판별 ~ 추천 코스)를 cProfile + tracemalloc 으로 실행
+    {id}.prof : pstats 파일 (python -m pstats, snakeviz 등으로 열기)
+    {id}.json : 파일 정보·소요 시간·결과, 누적 시간 상위 함수, 메모리 최고치(peak_bytes),
+                끝난 시점에 남아 있는 할당 상위 위치
+- 저장 위치 PATELLA_PROFILE_DIR (기본 data/profiles), 최근 PATELLA_PROFILE_MAX개만 남기고 오래된 것부터 삭제
+- 목록·내려받기: GET /admin/profiles, /admin/profiles/{id}(.prof) — X-Admin-Token 필요
+  tracemalloc 은 프로세스 전체를 추적하므로 같은 시각 다른 스레드의 할당도 섞일 수 있음
+"""
+from __future__ import annotations
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from . import store
+
+ADMIN_TOKEN = os.environ.get("PATELLA_ADMIN_TOKEN", "").strip()
+PROFILE_DIR = Path(os.environ.get("PATELLA_PROFILE_DIR") or store.DATA_DIR / "profiles")
+SAMPLE_RATE = float(os.environ.get("PATELLA_PROFILE_SAMPLE_RATE") or 0)
+MAX_PROFILES = int(os.environ.get("PATELLA_PROFILE_MAX") or 50)
+ENABLED = bool(ADMIN_TOKEN)
+
+PROFILE_HEADER = "x-patella-profile"
+ADMIN_HEADER = "x-admin-token"
+# 요약에 넣는 상위 함수·할당 위치 수
+TOP_N = 25
+# tracemalloc 이 저장하는 호출 스택 깊이
+TRACE_FRAMES = 1
+
+# id = 시각(마이크로초까지) + 임의 4자리 → 이름순 = 시간순
+_PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{6}-[0-9a-f]{4}$")
+# cProfile·tracemalloc 은 한 번에 하나만
+_lock = threading.Lock()
+
+
+def is_admin(headers) -> bool:
+    token = headers.get(ADMIN_HEADER) or ""
+    return ENABLED and hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+def should_profile(headers) -> str | None:
+    """이 요청을 수집할지. 반환: 이유("header" | "sample") 또는 None. 꺼져 있으면 바로 None."""
+    if not ENABLED:
+        return None
+    if headers.get(PROFILE_HEADER, "").strip() in ("1", "true") and is_admin(headers):
+        return "header"
+    if SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def run_profiled(reason: str, meta: dict, fn, *args, **kwargs):
+    """fn(*args, **kwargs) 를 프로파일하며 실행하고 결과를 저장. 예외도 기록한 뒤 그대로 다시 발생."""
+    if not _lock.acquire(blocking=False):
+        # 다른 요청을 수집 중이면 이번 요청은 그냥 실행
+        return fn(*args, **kwargs)
+    try:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        base_current, _ = tracemalloc.get_traced_memory()
+        profiler = cProfile.Profile()
+        outcome = "ok"
+        t0 = time.perf_counter()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        except BaseException as e:
+            outcome = f"{type(e).__name__}: {getattr(e, 'detail', None) or e}"
+            raise
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                _save(profiler, snapshot, {
+                    **meta,
+                    "reason": reason,
+                    "outcome": outcome,
+                    "seconds": round(elapsed, 4),
+                    "peak_bytes": peak - base_current,
+                })
+            except Exception as e:
+                print(f"[profiling] failed to save profile: {e}")
+    finally:
+        _lock.release()
+
+
+def _save(profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, meta: dict) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now % 1 * 1e6):06d}-{uuid.uuid4().hex[:4]}"
+    profiler.dump_stats(PROFILE_DIR / f"{profile_id}.prof")
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(TOP_N)
+    snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+    allocations = [
+        {"where": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_N]
+    ]
+    summary = {
+        "id": profile_id,
+        "created_at": now,
+        **meta,
+        "retained_allocations": allocations,
+        "cumulative": out.getvalue(),
+    }
+    tmp = PROFILE_DIR / f".{profile_id}.json.tmp"
+    tmp.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, PROFILE_DIR / f"{profile_id}.json")
+    _rotate()
+    print(f"[profiling] {profile_id} {meta.get('filename')!r} {meta['seconds']}s peak {meta['peak_bytes'] / 2**20:.1f}MB")
+    return profile_id
+
+
+def _rotate() -> None:
+    """최근 MAX_PROFILES개만 남김 (id가 시각순이므로 이름순 = 오래된 순)."""
+    ids = sorted(p.stem for p in PROFILE_DIR.glob("*.json") if _PROFILE_ID.match(p.stem))
+    for old in ids[:max(0, len(ids) - MAX_PROFILES)]:
+        for suffix in (".json", ".prof"):
+            try:
+                (PROFILE_DIR / f"{old}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> list[dict]:
+    """저장된 프로파일 요약 (최신순, 상위 함수·할당 목록 제외)."""
+    out = []
+    if not PROFILE_DIR.is_dir():
+        return out
+    for path in sorted(PROFILE_DIR.glob("*.json"), reverse=True):
+        if not _PROFILE_ID.match(path.stem):
+            continue
+        try:
+            summary = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        out.append({k: v for k, v in summary.items() if k not in ("retained_allocations", "cumulative")})
+    return out
+
+
+def profile_path(profile_id: str, suffix: str) -> Path | None:
+    """id·확장자(.json | .prof) → 파일 경로. 형식이 틀리거나 없으면 None."""
+    if not _PROFILE_ID.match(profile_id) or suffix not in (".json", ".prof"):
+        return None
+    path = PROFILE_DIR / f"{profile_id}{suffix}"
+    return path if path.is_file() else None
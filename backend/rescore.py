@@ -0,0 +1,143 @@
+"""
+보관한 키포인트(keypoint_archive.py)로 지난 진단을 새 모델로 한꺼번에 재판정.
+영상·사진을 다시 디코딩하거나 포즈 추정하지 않고, 모든 기록의 프레임을 모아 build_27_features_batch → 모델을 큰 배치로 실행.
+결과는 기록마다 rescore 필드에 저장 (원래 grade·score는 그대로):
+    {"grade", "score", "model", "changed", "at"}
+
+사용법 (프로젝트 루트에서):
+    python -m backend.rescore [--model backend/dog_patella_best.pth] [--user-id ID] [--pet-id ID] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from . import store
+from .inference import _apply_threshold, _softmax_probs
+from .keypoint_archive import frames_to_features, load_keypoints
+from .model import CLASS_NAMES, get_model_path, load_dog_patella_model
+
+# 모델 한 번에 넣는 행 수
+BATCH_SIZE = 8192
+
+
+def _model_tag(path: Path) -> str:
+    """모델 파일 이름 + 내용 해시 앞 12자 (어떤 가중치로 재판정했는지 기록용)."""
+    return f"{path.name}@{hashlib.sha256(path.read_bytes()).hexdigest()[:12]}"
+
+
+def _probs(model: torch.nn.Module, x: np.ndarray, batch_size: int) -> np.ndarray:
+    """(N, 27) → 클래스 확률 (N, 3). 배치마다 서빙 코드의 _softmax_probs."""
+    out = np.empty((x.shape[0], len(CLASS_NAMES)), dtype=np.float32)
+    with torch.inference_mode():
+        for start in range(0, x.shape[0], batch_size):
+            out[start:start + batch_size] = _softmax_probs(model(torch.from_numpy(x[start:start + batch_size])))
+    return out
+
+
+def _segment_mean(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """연속된 구간(길이 counts)별 평균. values: (sum(counts), D)."""
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.add.reduceat(values, starts, axis=0) / counts[:, None]
+
+
+def collect_targets(user_ids: list[str | None], pet_id: str | None) -> list[dict]:
+    """keypoints_id 가 있는 진단 기록 목록 (user_id, pet_id, id, grade, keypoints_id)."""
+    targets = []
+    for user_id in user_ids:
+        for pid in [pet_id] if pet_id else store.pet_ids(user_id):
+            for h in store.load_diagnosis_history(user_id=user_id, pet_id=pid):
+                keypoints_id = (h.get("result") or {}).get("keypoints_id")
+                if keypoints_id:
+                    targets.append(
+                        {"user_id": user_id, "pet_id": pid, "id": h["id"], "grade": h.get("grade"),
+                         "keypoints_id": keypoints_id}
+                    )
+    return targets
+
+
+def rescore(targets: list[dict], model: torch.nn.Module, batch_size: int = BATCH_SIZE) -> list[dict]:
+    """
+    기록별 보관 키포인트 → 새 등급. 반환: targets 중 키포인트 파일이 있는 것에 grade_new·score_new 를 붙인 목록.
+    mean: 프레임 특징 평균 → 추론 (이미지·영상·JSON), multi: 프레임별 확률 평균 (ZIP) — 서빙과 같은 방식.
+    """
+    groups: dict[str, list] = {"mean": [], "multi": []}
+    for t in targets:
+        loaded = load_keypoints(t["keypoints_id"])
+        if loaded is not None:
+            frames, mode = loaded
+            groups[mode].append((t, frames))
+
+    scored = []
+    for mode, items in groups.items():
+        if not items:
+            continue
+        counts = np.array([len(frames) for _, frames in items])
+        features = frames_to_features(np.concatenate([frames for _, frames in items]))
+        if mode == "mean":
+            probs = _probs(model, _segment_mean(features, counts).astype(np.float32), batch_size)
+        else:
+            probs = _segment_mean(_probs(model, features, batch_size), counts)
+            probs = probs / (probs.sum(axis=1, keepdims=True) + 1e-8)
+        for (t, _), p in zip(items, probs):
+            class_idx, confidence = _apply_threshold(p)
+            scored.append({**t, "grade_new": CLASS_NAMES[class_idx], "score_new": confidence})
+    return scored
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=None, help="가중치 파일 (기본: backend/dog_patella_best.pth)")
+    parser.add_argument("--user-id", default=None, help="이 보호자만 (생략 시 기본 데이터 + 모든 보호자)")
+    parser.add_argument("--pet-id", default=None, help="이 반려견만")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="저장하지 않고 결과 요약만 출력")
+    args = parser.parse_args()
+
+    model_path = args.model or get_model_path()
+    model = load_dog_patella_model("cpu", model_path)
+    tag = _model_tag(model_path)
+
+    t0 = time.perf_counter()
+    user_ids = [args.user_id] if args.user_id else [None, *store.owner_ids()]
+    targets = collect_targets(user_ids, args.pet_id)
+    t1 = time.perf_counter()
+    scored = rescore(targets, model, args.batch_size)
+    t2 = time.perf_counter()
+
+    changed = [s for s in scored if s["grade_new"] != s["grade"]]
+    if not args.dry_run:
+        at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        by_pet: dict[tuple, dict[int, dict]] = {}
+        for s in scored:
+            by_pet.setdefault((s["user_id"], s["pet_id"]), {})[s["id"]] = {
+                "grade": s["grade_new"],
+                "score": s["score_new"],
+                "model": tag,
+                "changed": s["grade_new"] != s["grade"],
+                "at": at,
+            }
+        for (user_id, pet_id), updates in by_pet.items():
+            store.set_rescores(updates, user_id=user_id, pet_id=pet_id)
+    t3 = time.perf_counter()
+
+    print(f"[rescore] model={tag} 기록 {len(targets)}건 중 키포인트 있음 {len(scored)}건, 등급 변경 {len(changed)}건")
+    transitions: dict[tuple, int] = {}
+    for s in changed:
+        transitions[(s["grade"], s["grade_new"])] = transitions.get((s["grade"], s["grade_new"]), 0) + 1
+    for (before, after), n in sorted(transitions.items()):
+        print(f"  {before} → {after}: {n}건")
+    print(
+        f"[rescore] 수집 {t1 - t0:.2f}s, 재판정 {t2 - t1:.2f}s, 저장 {t3 - t2:.2f}s"
+        + (" (dry-run, 저장 안 함)" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
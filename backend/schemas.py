@@ -6,6 +6,20 @@ from typing import Literal
 from pydantic import BaseModel, Field
 
 
+# --- Request ---
+
+class GeoPoint(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class WalkRoutesBatchRequest(BaseModel):
+    """여러 좌표(저장된 장소, 여행 경로 위 지점 등)에 대한 진단별 산책로 추천 일괄 요청."""
+    diagnosis_grade: Literal["정상", "1기", "3기"]
+    points: list[GeoPoint] = Field(..., max_length=1000)
+    limit: int = Field(3, ge=1, le=200)
+
+
 # --- Response (Figma 화면 대응) ---
 
 class ChartDataItem(BaseModel):
@@ -76,3 +90,7 @@ class PredictResponse(BaseModel):
         default=None,
         description="ZIP 업로드 시 가장 명확하게 분석된 대표 프레임 정보 (frame_index, confidence 등)",
     )
+    keypoints_id: str | None = Field(
+        default=None,
+        description="보관한 프레임별 관절 키포인트 id (모델 교체 후 재판정용, keypoint_archive.py)",
+    )
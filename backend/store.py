@@ -1,40 +1,145 @@
 """
-프로필·진단 기록 JSON 파일 저장 (재시작 후에도 유지).
+프로필·진단 기록 저장 (재시작 후에도 유지).
+- 기본: JSON 파일 (pet_profile.json, diagnosis_history.json)
+- PATELLA_STORE=sqlite: SQLite WAL (store_sqlite.py, 첫 사용 시 JSON 내용 자동 이전)
+- 사진은 프로필과 별도 파일 (photo_store.py), 프로필에는 photo_id만 → 프로필 읽기·쓰기 비용이 사진 크기와 무관
+- user_id·pet_id 로 보호자·반려견별 분리. 보호자마다 디렉터리가 따로라 다른 보호자 데이터를 읽거나 잠그지 않음
+  (둘 다 없으면 기존 단일 파일 그대로)
+    data/pet_profile.json, data/diagnosis_history.json          ← user_id 없음, pet_id 없음
+    data/owners/{user_id}/pet_profile.json ...                   ← user_id 만
+    data/owners/{user_id}/pets/{pet_id}/pet_profile.json ...     ← user_id + pet_id
 """
 from __future__ import annotations
 
+import base64
+import binascii
 import json
+import os
+import re
+import tempfile
+import threading
 from pathlib import Path
 
+from . import diagnosis_trend
+
 BACKEND_DIR = Path(__file__).resolve().parent
-DATA_DIR = BACKEND_DIR / "data"
+DATA_DIR = Path(os.environ.get("PATELLA_DATA_DIR") or BACKEND_DIR / "data")
 PROFILE_PATH = DATA_DIR / "pet_profile.json"
 HISTORY_PATH = DATA_DIR / "diagnosis_history.json"
+PROFILE_NAME = PROFILE_PATH.name
+HISTORY_NAME = HISTORY_PATH.name
+TREND_NAME = "diagnosis_trend.json"
+OWNERS_DIR = "owners"
+PETS_DIR = "pets"
 
 DEFAULT_PROFILE = {
     "name": "복실이",
     "breed": "말티즈",
     "age": "3세",
-    "photo_base64": None,
+    "photo_id": None,
 }
 
 MAX_HISTORY = 100
+# 진단 기록 목록 한 페이지 기본 건수
+DEFAULT_HISTORY_PAGE = 20
+# 진단 기록 필드. 목록 기본 응답은 result(상세 결과 스냅샷) 제외
+HISTORY_FIELDS = ("id", "date", "time", "grade", "score", "result", "rescore")
+DEFAULT_HISTORY_FIELDS = ("id", "date", "time", "grade", "score")
+
+# 저장 방식: "json" | "sqlite"
+STORE_BACKEND = os.environ.get("PATELLA_STORE", "json").strip().lower()
+
+# user_id / pet_id 허용 형식 (경로 구성요소로 쓰이므로 제한)
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# JSON 파일별 쓰기 lock (같은 프로세스 안의 동시 요청 직렬화)
+_file_locks: dict[Path, threading.Lock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def _use_sqlite() -> bool:
+    return STORE_BACKEND == "sqlite"
 
 
 def _ensure_data_dir():
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def load_profile() -> dict:
-    _ensure_data_dir()
-    if not PROFILE_PATH.is_file():
-        return dict(DEFAULT_PROFILE)
+def validate_id(value: str | None, field: str) -> str | None:
+    """user_id / pet_id 검증. None·빈 문자열은 None. 형식이 맞지 않으면 ValueError."""
+    if value is None or value == "":
+        return None
+    if not _ID_PATTERN.match(value):
+        raise ValueError(f"{field} must match [A-Za-z0-9_-]{{1,64}}")
+    return value
+
+
+def owner_dir(user_id: str | None) -> Path:
+    """보호자 데이터 디렉터리 (user_id 없으면 DATA_DIR)."""
+    user_id = validate_id(user_id, "user_id")
+    return DATA_DIR if user_id is None else DATA_DIR / OWNERS_DIR / user_id
+
+
+def _pet_dir(user_id: str | None, pet_id: str | None) -> Path:
+    pet_id = validate_id(pet_id, "pet_id")
+    base = owner_dir(user_id)
+    return base if pet_id is None else base / PETS_DIR / pet_id
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    with _file_locks_guard:
+        lock = _file_locks.get(path)
+        if lock is None:
+            lock = _file_locks[path] = threading.Lock()
+        return lock
+
+
+def _read_json(path: Path, default):
+    if not path.is_file():
+        return default
     try:
-        with open(PROFILE_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return {**DEFAULT_PROFILE, **data}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
     except Exception:
+        return default
+
+
+def _write_json(path: Path, data) -> None:
+    """임시 파일에 쓴 뒤 교체 → 읽는 쪽이 쓰다 만 파일을 보지 않음."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def load_profile(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    if _use_sqlite():
+        from . import store_sqlite
+        profile = store_sqlite.load_profile(user_id, pet_id)
+    else:
+        profile = _json_load_profile(user_id, pet_id)
+    legacy_photo = profile.pop("photo_base64", None)
+    if legacy_photo:
+        # 예전 형식(사진 base64 내장) → 사진 파일로 옮기고 프로필에서 제거 (한 번만)
+        try:
+            return save_profile(photo_base64=legacy_photo, user_id=user_id, pet_id=pet_id)
+        except ValueError as e:
+            print(f"[store] 기존 프로필 사진 변환 실패, 사진 제거: {e}")
+            return save_profile(photo_id=None, user_id=user_id, pet_id=pet_id)
+    return profile
+
+
+def _json_load_profile(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    _ensure_data_dir()
+    data = _read_json(_pet_dir(user_id, pet_id) / PROFILE_NAME, None)
+    if not isinstance(data, dict):
         return dict(DEFAULT_PROFILE)
+    return {**DEFAULT_PROFILE, **data}
 
 
 _MISSING = object()
@@ -45,31 +150,112 @@ def save_profile(
     breed: str | None = _MISSING,
     age: str | None = _MISSING,
     photo_base64: str | None = _MISSING,
+    user_id: str | None = None,
+    pet_id: str | None = None,
+    photo_id: str | None = _MISSING,
 ) -> dict:
-    _ensure_data_dir()
-    profile = load_profile()
+    """
+    프로필 갱신. photo_base64(이미지 base64, 빈 값이면 사진 제거)는 사진 파일로 저장해 photo_id로 바꿈.
+    사진이 바뀌면 이전 사진 파일 정리. 이미지가 잘못되면 ValueError.
+    """
+    if photo_base64 is not _MISSING:
+        photo_id = _save_photo_base64(photo_base64, user_id, pet_id)
+    if _use_sqlite():
+        from . import store_sqlite
+        profile = store_sqlite.save_profile(name, breed, age, photo_id, user_id=user_id, pet_id=pet_id)
+    else:
+        _ensure_data_dir()
+        path = _pet_dir(user_id, pet_id) / PROFILE_NAME
+        with _file_lock(path):
+            profile = _apply_profile_update(_json_load_profile(user_id, pet_id), name, breed, age, photo_id)
+            _write_json(path, profile)
+    if photo_id is not _MISSING:
+        from . import photo_store
+        photo_store.prune_photos(profile["photo_id"], user_id, pet_id)
+    return profile
+
+
+def _save_photo_base64(photo_base64: str | None, user_id: str | None, pet_id: str | None) -> str | None:
+    """base64(data URL 접두어 허용) → 사진 파일 저장 → photo_id. 빈 값이면 None."""
+    if not photo_base64:
+        return None
+    if photo_base64.startswith("data:"):
+        photo_base64 = photo_base64.split(",", 1)[-1]
+    try:
+        data = base64.b64decode(photo_base64, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"invalid photo_base64: {e}") from e
+    from . import photo_store
+    return photo_store.save_photo(data, user_id, pet_id)
+
+
+def _apply_profile_update(profile: dict, name, breed, age, photo_id) -> dict:
+    """_MISSING이 아닌 필드만 반영 (빈 값이면 기본값). 예전 형식의 photo_base64는 버림."""
+    profile.pop("photo_base64", None)
     if name is not _MISSING:
         profile["name"] = name or DEFAULT_PROFILE["name"]
     if breed is not _MISSING:
         profile["breed"] = breed or DEFAULT_PROFILE["breed"]
     if age is not _MISSING:
         profile["age"] = age or DEFAULT_PROFILE["age"]
-    if photo_base64 is not _MISSING:
-        profile["photo_base64"] = photo_base64
-    with open(PROFILE_PATH, "w", encoding="utf-8") as f:
-        json.dump(profile, f, ensure_ascii=False, indent=2)
+    if photo_id is not _MISSING:
+        profile["photo_id"] = photo_id
     return profile
 
 
-def load_diagnosis_history() -> list[dict]:
+def load_diagnosis_history(user_id: str | None = None, pet_id: str | None = None) -> list[dict]:
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.load_diagnosis_history(user_id, pet_id)
+    return _json_load_diagnosis_history(user_id, pet_id)
+
+
+def _json_load_diagnosis_history(user_id: str | None = None, pet_id: str | None = None) -> list[dict]:
     _ensure_data_dir()
-    if not HISTORY_PATH.is_file():
-        return []
-    try:
-        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
+    data = _read_json(_pet_dir(user_id, pet_id) / HISTORY_NAME, [])
+    return data if isinstance(data, list) else []
+
+
+def history_fields(fields: str | None) -> tuple[str, ...]:
+    """쉼표 구분 필드 목록 검증 (id는 항상 포함). 없으면 DEFAULT_HISTORY_FIELDS. 모르는 필드면 ValueError."""
+    if not fields:
+        return DEFAULT_HISTORY_FIELDS
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (allowed: {', '.join(HISTORY_FIELDS)})")
+    return tuple(f for f in HISTORY_FIELDS if f == "id" or f in names)
+
+
+def load_diagnosis_page(
+    limit: int = DEFAULT_HISTORY_PAGE,
+    cursor: int | None = None,
+    fields: tuple[str, ...] = DEFAULT_HISTORY_FIELDS,
+    user_id: str | None = None,
+    pet_id: str | None = None,
+) -> tuple[list[dict], int | None]:
+    """
+    진단 기록 한 페이지 (최신순). cursor: 이전 페이지의 next_cursor (이 id보다 오래된 기록부터).
+    반환: (fields 필드만 담은 기록 목록, 다음 페이지 cursor 또는 None)
+    """
+    limit = max(1, min(limit, MAX_HISTORY))
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.load_diagnosis_page(limit, cursor, fields, user_id, pet_id)
+    history = _json_load_diagnosis_history(user_id, pet_id)
+    if cursor is not None:
+        history = [h for h in history if h.get("id", 0) < cursor]
+    page = [{f: h[f] for f in fields if f in h} for h in history[:limit]]
+    next_cursor = page[-1]["id"] if len(history) > limit else None
+    return page, next_cursor
+
+
+def get_diagnosis(record_id: int, user_id: str | None = None, pet_id: str | None = None) -> dict | None:
+    """진단 기록 한 건 (result 포함). 없으면 None."""
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.get_diagnosis(record_id, user_id, pet_id)
+    return next((h for h in _json_load_diagnosis_history(user_id, pet_id) if h.get("id") == record_id), None)
 
 
 def append_diagnosis(
@@ -78,15 +264,105 @@ def append_diagnosis(
     grade: str,
     score: float,
     result_snapshot: dict | None = None,
-) -> list[dict]:
+    user_id: str | None = None,
+    pet_id: str | None = None,
+) -> dict:
+    """진단 한 건 추가 (MAX_HISTORY건 넘는 오래된 기록은 삭제). 반환: 추가한 기록."""
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.append_diagnosis(
+            date, time, grade, score, result_snapshot, user_id=user_id, pet_id=pet_id
+        )
     _ensure_data_dir()
-    history = load_diagnosis_history()
-    new_id = max((h.get("id", 0) for h in history), default=0) + 1
-    record: dict = {"id": new_id, "date": date, "time": time, "grade": grade, "score": round(score, 1)}
-    if result_snapshot is not None:
-        record["result"] = result_snapshot
-    history.insert(0, record)
-    history = history[:MAX_HISTORY]
-    with open(HISTORY_PATH, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
-    return history
+    path = _pet_dir(user_id, pet_id) / HISTORY_NAME
+    with _file_lock(path):
+        history = _json_load_diagnosis_history(user_id, pet_id)
+        new_id = max((h.get("id", 0) for h in history), default=0) + 1
+        record: dict = {"id": new_id, "date": date, "time": time, "grade": grade, "score": round(score, 1)}
+        if result_snapshot is not None:
+            record["result"] = result_snapshot
+        trend = _json_load_trend(user_id, pet_id, history)
+        history.insert(0, record)
+        history = history[:MAX_HISTORY]
+        _write_json(path, history)
+        _write_json(path.with_name(TREND_NAME), diagnosis_trend.update_trend(trend, record))
+    return record
+
+
+def set_rescores(updates: dict[int, dict], user_id: str | None = None, pet_id: str | None = None) -> int:
+    """
+    재판정 결과를 기록의 rescore 필드에 저장 (원래 grade·score는 그대로). updates: 기록 id → rescore dict.
+    반환: 갱신한 기록 수.
+    """
+    if not updates:
+        return 0
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.set_rescores(updates, user_id, pet_id)
+    path = _pet_dir(user_id, pet_id) / HISTORY_NAME
+    with _file_lock(path):
+        history = _json_load_diagnosis_history(user_id, pet_id)
+        updated = 0
+        for h in history:
+            if h.get("id") in updates:
+                h["rescore"] = updates[h["id"]]
+                updated += 1
+        if updated:
+            _write_json(path, history)
+    return updated
+
+
+def _json_load_trend(user_id: str | None, pet_id: str | None, history: list[dict] | None = None) -> dict:
+    """저장된 추이 집계. 없으면 (예전 데이터) 진단 기록으로 만듦."""
+    trend = _read_json(_pet_dir(user_id, pet_id) / TREND_NAME, None)
+    if isinstance(trend, dict):
+        return trend
+    if history is None:
+        history = _json_load_diagnosis_history(user_id, pet_id)
+    return diagnosis_trend.build_trend(history)
+
+
+def load_trend(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    """진단 추이 집계 (diagnosis_trend.py). 기록 전체를 읽지 않음."""
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.load_trend(user_id, pet_id)
+    return _json_load_trend(user_id, pet_id)
+
+
+def rebuild_trend(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    """남아 있는 진단 기록으로 추이 집계를 다시 만들어 저장."""
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.rebuild_trend(user_id, pet_id)
+    path = _pet_dir(user_id, pet_id) / HISTORY_NAME
+    with _file_lock(path):
+        trend = diagnosis_trend.build_trend(_json_load_diagnosis_history(user_id, pet_id))
+        if path.is_file():
+            _write_json(path.with_name(TREND_NAME), trend)
+    return trend
+
+
+def owner_ids() -> list[str]:
+    """데이터 디렉터리에 있는 보호자 id 목록."""
+    owners = DATA_DIR / OWNERS_DIR
+    if not owners.is_dir():
+        return []
+    return sorted(p.name for p in owners.iterdir() if p.is_dir() and _ID_PATTERN.match(p.name))
+
+
+def pet_ids(user_id: str | None = None) -> list[str | None]:
+    """보호자의 반려견 id 목록 (None = pet_id 없는 기본 반려견)."""
+    if _use_sqlite():
+        from . import store_sqlite
+        return store_sqlite.pet_ids(user_id)
+    return _json_pet_ids(user_id)
+
+
+def _json_pet_ids(user_id: str | None) -> list[str | None]:
+    """보호자 디렉터리에 JSON 파일이 있는 pet_id 목록 (None = pet_id 없는 기존 파일)."""
+    pets_dir = owner_dir(user_id) / PETS_DIR
+    ids: list[str | None] = [None]
+    if pets_dir.is_dir():
+        ids += sorted(p.name for p in pets_dir.iterdir() if p.is_dir() and _ID_PATTERN.match(p.name))
+    return ids
@@ -0,0 +1,405 @@
+"""
+프로필·진단 기록 SQLite 저장 (PATELLA_STORE=sqlite 일 때 store.py 가 사용).
+- WAL 모드: 읽기는 쓰기를 기다리지 않고, 쓰기는 BEGIN IMMEDIATE 트랜잭션으로 직렬화
+- 진단 기록은 행 단위 INSERT (파일 전체 재작성 없음), (pet_id, id)·(pet_id, 날짜) 인덱스
+- 보호자(user_id)마다 DB 파일이 따로 (data/owners/{user_id}/patella.db) → 다른 보호자의 쓰기 lock에 막히지 않음.
+  반려견(pet_id)은 같은 DB 안에서 pet_id 열로 구분 (없으면 '')
+- 반려견별 진단 추이 집계(diagnosis_trend.py)를 기록 추가와 같은 트랜잭션에서 갱신
+- DB를 처음 만들 때 그 보호자 디렉터리의 JSON 파일(pet_profile.json, diagnosis_history.json, pets/*/)을 한 번 옮겨 옴
+
+수동 이전 (프로젝트 루트에서):
+    python -m backend.store_sqlite migrate [--force] [--user-id ID]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import diagnosis_trend, store
+
+DB_PATH = store.DATA_DIR / "patella.db"
+DB_NAME = DB_PATH.name
+SCHEMA_VERSION = 4
+# 다른 연결이 쓰는 중이면 기다리는 최대 시간(초)
+BUSY_TIMEOUT_SEC = 30.0
+# 스레드마다 열어 두는 보호자 DB 연결 수 (넘으면 가장 오래 안 쓴 것부터 닫음)
+MAX_CONNECTIONS_PER_THREAD = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile (
+    pet_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS diagnosis_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pet_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    score REAL NOT NULL,
+    result TEXT,
+    rescore TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_diagnosis_history_pet ON diagnosis_history (pet_id, id);
+CREATE INDEX IF NOT EXISTS idx_diagnosis_history_pet_date ON diagnosis_history (pet_id, date, id);
+CREATE TABLE IF NOT EXISTS diagnosis_trend (
+    pet_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# v1 → v2: profile 단일 행(id=1) → pet_id 키, 진단 기록에 pet_id 열 추가
+_UPGRADE_V2 = """
+CREATE TABLE profile_v2 (
+    pet_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+INSERT INTO profile_v2 (pet_id, data) SELECT '', data FROM profile;
+DROP TABLE profile;
+ALTER TABLE profile_v2 RENAME TO profile;
+ALTER TABLE diagnosis_history ADD COLUMN pet_id TEXT NOT NULL DEFAULT '';
+DROP INDEX IF EXISTS idx_diagnosis_history_date;
+"""
+
+# v1~3 → v4: 재판정 결과 열 (rescore.py)
+_UPGRADE_V4 = """
+ALTER TABLE diagnosis_history ADD COLUMN rescore TEXT;
+"""
+
+# JSON 문자열로 저장하는 열
+_JSON_COLUMNS = ("result", "rescore")
+
+_local = threading.local()
+
+
+def _db_path(user_id: str | None = None) -> Path:
+    if user_id is None:
+        return Path(os.environ.get("PATELLA_DB_PATH") or DB_PATH)
+    return store.owner_dir(user_id) / DB_NAME
+
+
+def _pet_key(pet_id: str | None) -> str:
+    return store.validate_id(pet_id, "pet_id") or ""
+
+
+def _execute_script(conn: sqlite3.Connection, script: str) -> None:
+    # executescript 는 열린 트랜잭션을 먼저 COMMIT 하므로 문장 단위로 실행
+    for statement in script.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+def _connect(user_id: str | None = None) -> sqlite3.Connection:
+    """스레드별·보호자별 연결 (sqlite3 연결은 스레드 간 공유 불가). 첫 연결 시 스키마 생성·업그레이드·JSON 이전."""
+    user_id = store.validate_id(user_id, "user_id")
+    conns: OrderedDict | None = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = OrderedDict()
+    conn = conns.get(user_id)
+    if conn is not None:
+        conns.move_to_end(user_id)
+        return conn
+    path = _db_path(user_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SEC, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    with _transaction(conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            if version == 1:
+                _execute_script(conn, _UPGRADE_V2)
+            if 0 < version < 4:
+                _execute_script(conn, _UPGRADE_V4)
+            _execute_script(conn, _SCHEMA)
+            if version == 0:
+                moved = _migrate_from_json(conn, user_id, force=False)
+                if moved["profile"] or moved["history"]:
+                    print(f"[store] JSON → SQLite 이전 ({path}): 프로필 {moved['profile']}건, 진단 기록 {moved['history']}건")
+            # 이전·업그레이드로 들어온 기록의 추이 집계
+            _build_trends(conn, missing_only=True)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    conns[user_id] = conn
+    while len(conns) > MAX_CONNECTIONS_PER_THREAD:
+        _, old = conns.popitem(last=False)
+        old.close()
+    return conn
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """쓰기 트랜잭션. 시작 시 쓰기 lock을 잡아 읽고-고쳐-쓰기 사이에 다른 쓰기가 끼지 않게 함."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _migrate_from_json(conn: sqlite3.Connection, user_id: str | None, force: bool) -> dict:
+    """보호자의 JSON 파일 → 테이블. force=False면 해당 반려견 데이터가 비어 있을 때만. 반환: 옮긴 건수."""
+    moved = {"profile": 0, "history": 0}
+    for pet_id in store._json_pet_ids(user_id):
+        key = pet_id or ""
+        pet_dir = store._pet_dir(user_id, pet_id)
+        has_profile = conn.execute("SELECT 1 FROM profile WHERE pet_id = ?", (key,)).fetchone() is not None
+        has_history = (
+            conn.execute("SELECT 1 FROM diagnosis_history WHERE pet_id = ? LIMIT 1", (key,)).fetchone() is not None
+        )
+        if (pet_dir / store.PROFILE_NAME).is_file() and (force or not has_profile):
+            profile = store._json_load_profile(user_id, pet_id)
+            conn.execute(
+                "INSERT OR REPLACE INTO profile (pet_id, data) VALUES (?, ?)",
+                (key, json.dumps(profile, ensure_ascii=False)),
+            )
+            moved["profile"] += 1
+        if (pet_dir / store.HISTORY_NAME).is_file() and (force or not has_history):
+            if force:
+                conn.execute("DELETE FROM diagnosis_history WHERE pet_id = ?", (key,))
+            # JSON은 최신순 → 오래된 것부터 넣어 id 순서 유지.
+            # JSON id는 반려견마다 1부터라 같은 DB 안에서 겹칠 수 있으므로 pet_id 없는 기존 파일만, 비어 있는 id일 때 유지
+            for h in reversed(store._json_load_diagnosis_history(user_id, pet_id)):
+                keep_id = pet_id is None and (
+                    conn.execute("SELECT 1 FROM diagnosis_history WHERE id = ?", (h.get("id"),)).fetchone() is None
+                )
+                conn.execute(
+                    "INSERT INTO diagnosis_history (id, pet_id, date, time, grade, score, result, rescore) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        h.get("id") if keep_id else None,
+                        key,
+                        h.get("date", ""),
+                        h.get("time", ""),
+                        h.get("grade", ""),
+                        h.get("score", 0.0),
+                        json.dumps(h["result"], ensure_ascii=False) if h.get("result") is not None else None,
+                        json.dumps(h["rescore"], ensure_ascii=False) if h.get("rescore") is not None else None,
+                    ),
+                )
+                moved["history"] += 1
+    return moved
+
+
+def _read_profile(conn: sqlite3.Connection, key: str) -> dict:
+    row = conn.execute("SELECT data FROM profile WHERE pet_id = ?", (key,)).fetchone()
+    if row is None:
+        return dict(store.DEFAULT_PROFILE)
+    try:
+        return {**store.DEFAULT_PROFILE, **json.loads(row["data"])}
+    except ValueError:
+        return dict(store.DEFAULT_PROFILE)
+
+
+def load_profile(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    key = _pet_key(pet_id)
+    return _read_profile(_connect(user_id), key)
+
+
+def save_profile(
+    name: str | None = store._MISSING,
+    breed: str | None = store._MISSING,
+    age: str | None = store._MISSING,
+    photo_id: str | None = store._MISSING,
+    user_id: str | None = None,
+    pet_id: str | None = None,
+) -> dict:
+    key = _pet_key(pet_id)
+    conn = _connect(user_id)
+    with _transaction(conn):
+        profile = store._apply_profile_update(_read_profile(conn, key), name, breed, age, photo_id)
+        conn.execute(
+            "INSERT OR REPLACE INTO profile (pet_id, data) VALUES (?, ?)",
+            (key, json.dumps(profile, ensure_ascii=False)),
+        )
+    return profile
+
+
+def _row_to_record(row: sqlite3.Row) -> dict:
+    """행 → 기록 dict (SELECT 한 열만, result·rescore가 NULL이면 키 생략)."""
+    record = {}
+    for k in row.keys():
+        if k in _JSON_COLUMNS:
+            if row[k] is not None:
+                record[k] = json.loads(row[k])
+        else:
+            record[k] = row[k]
+    return record
+
+
+def _read_history(conn: sqlite3.Connection, key: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT id, date, time, grade, score, result, rescore FROM diagnosis_history "
+        "WHERE pet_id = ? ORDER BY id DESC LIMIT ?",
+        (key, store.MAX_HISTORY),
+    ).fetchall()
+    return [_row_to_record(r) for r in rows]
+
+
+def load_diagnosis_page(
+    limit: int,
+    cursor: int | None,
+    fields: tuple[str, ...],
+    user_id: str | None = None,
+    pet_id: str | None = None,
+) -> tuple[list[dict], int | None]:
+    """store.load_diagnosis_page 참고. 요청한 열만 SELECT (result 미요청 시 스냅샷 JSON을 읽지 않음)."""
+    key = _pet_key(pet_id)
+    columns = ", ".join(f for f in store.HISTORY_FIELDS if f in fields)
+    where, params = "pet_id = ?", [key]
+    if cursor is not None:
+        where += " AND id < ?"
+        params.append(cursor)
+    rows = _connect(user_id).execute(
+        f"SELECT {columns} FROM diagnosis_history WHERE {where} ORDER BY id DESC LIMIT ?",
+        (*params, limit + 1),
+    ).fetchall()
+    page = [_row_to_record(r) for r in rows[:limit]]
+    return page, (page[-1]["id"] if len(rows) > limit else None)
+
+
+def get_diagnosis(record_id: int, user_id: str | None = None, pet_id: str | None = None) -> dict | None:
+    key = _pet_key(pet_id)
+    row = _connect(user_id).execute(
+        "SELECT id, date, time, grade, score, result, rescore FROM diagnosis_history WHERE pet_id = ? AND id = ?",
+        (key, record_id),
+    ).fetchone()
+    return _row_to_record(row) if row is not None else None
+
+
+def load_diagnosis_history(user_id: str | None = None, pet_id: str | None = None) -> list[dict]:
+    """최신순 최대 MAX_HISTORY건 (JSON 저장과 같은 형식)."""
+    key = _pet_key(pet_id)
+    return _read_history(_connect(user_id), key)
+
+
+def append_diagnosis(
+    date: str,
+    time: str,
+    grade: str,
+    score: float,
+    result_snapshot: dict | None = None,
+    user_id: str | None = None,
+    pet_id: str | None = None,
+) -> dict:
+    """한 건 INSERT 후 그 반려견의 MAX_HISTORY건을 넘는 오래된 기록 삭제 (한 트랜잭션). 반환: 추가한 기록."""
+    key = _pet_key(pet_id)
+    conn = _connect(user_id)
+    record: dict = {"date": date, "time": time, "grade": grade, "score": round(score, 1)}
+    with _transaction(conn):
+        trend = _read_trend(conn, key)
+        cur = conn.execute(
+            "INSERT INTO diagnosis_history (pet_id, date, time, grade, score, result) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                date,
+                time,
+                grade,
+                record["score"],
+                json.dumps(result_snapshot, ensure_ascii=False) if result_snapshot is not None else None,
+            ),
+        )
+        conn.execute(
+            "DELETE FROM diagnosis_history WHERE pet_id = ? AND id <= "
+            "(SELECT id FROM diagnosis_history WHERE pet_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (key, key, store.MAX_HISTORY),
+        )
+        record = {"id": cur.lastrowid, **record}
+        _write_trend(conn, key, diagnosis_trend.update_trend(trend, record))
+    if result_snapshot is not None:
+        record["result"] = result_snapshot
+    return record
+
+
+def set_rescores(updates: dict[int, dict], user_id: str | None = None, pet_id: str | None = None) -> int:
+    key = _pet_key(pet_id)
+    conn = _connect(user_id)
+    with _transaction(conn):
+        cur = conn.executemany(
+            "UPDATE diagnosis_history SET rescore = ? WHERE pet_id = ? AND id = ?",
+            [(json.dumps(v, ensure_ascii=False), key, record_id) for record_id, v in updates.items()],
+        )
+    return cur.rowcount
+
+
+def _read_trend(conn: sqlite3.Connection, key: str) -> dict:
+    """저장된 추이 집계. 없으면 (예전 DB) 남아 있는 진단 기록으로 만듦."""
+    row = conn.execute("SELECT data FROM diagnosis_trend WHERE pet_id = ?", (key,)).fetchone()
+    if row is not None:
+        return json.loads(row["data"])
+    return diagnosis_trend.build_trend(_read_history(conn, key))
+
+
+def _write_trend(conn: sqlite3.Connection, key: str, trend: dict) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO diagnosis_trend (pet_id, data) VALUES (?, ?)",
+        (key, json.dumps(trend, ensure_ascii=False)),
+    )
+
+
+def _build_trends(conn: sqlite3.Connection, missing_only: bool) -> None:
+    """기록이 있는 반려견의 추이 집계를 남아 있는 기록으로 만듦 (missing_only면 집계가 없는 반려견만)."""
+    query = "SELECT DISTINCT pet_id FROM diagnosis_history"
+    if missing_only:
+        query += " WHERE pet_id NOT IN (SELECT pet_id FROM diagnosis_trend)"
+    for row in conn.execute(query).fetchall():
+        _write_trend(conn, row["pet_id"], diagnosis_trend.build_trend(_read_history(conn, row["pet_id"])))
+
+
+def load_trend(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    key = _pet_key(pet_id)
+    return _read_trend(_connect(user_id), key)
+
+
+def rebuild_trend(user_id: str | None = None, pet_id: str | None = None) -> dict:
+    key = _pet_key(pet_id)
+    conn = _connect(user_id)
+    with _transaction(conn):
+        trend = diagnosis_trend.build_trend(_read_history(conn, key))
+        _write_trend(conn, key, trend)
+    return trend
+
+
+def pet_ids(user_id: str | None = None) -> list[str | None]:
+    """기록·프로필이 있는 pet_id 목록 (None = pet_id 없는 기본 반려견)."""
+    rows = _connect(user_id).execute(
+        "SELECT pet_id FROM profile UNION SELECT DISTINCT pet_id FROM diagnosis_history"
+    ).fetchall()
+    keys = {r["pet_id"] for r in rows} | {""}
+    return [k or None for k in sorted(keys)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_migrate = sub.add_parser("migrate", help="JSON 파일의 프로필·진단 기록을 SQLite로 이전")
+    p_migrate.add_argument("--force", action="store_true", help="DB에 이미 데이터가 있어도 JSON 내용으로 덮어씀")
+    p_migrate.add_argument("--user-id", default=None, help="이 보호자만 (생략 시 기본 데이터 + 모든 보호자)")
+    args = parser.parse_args()
+    if args.user_id:
+        user_ids: list[str | None] = [args.user_id]
+    else:
+        owners = store.DATA_DIR / store.OWNERS_DIR
+        user_ids = [None]
+        if owners.is_dir():
+            user_ids += sorted(p.name for p in owners.iterdir() if p.is_dir() and store._ID_PATTERN.match(p.name))
+    for user_id in user_ids:
+        conn = _connect(user_id)
+        with _transaction(conn):
+            moved = _migrate_from_json(conn, user_id, force=args.force)
+            if moved["history"]:
+                _build_trends(conn, missing_only=False)
+        print(f"{_db_path(user_id)}: 프로필 {moved['profile']}건, 진단 기록 {moved['history']}건 이전")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+요청 단계별 시간 측정 + Prometheus 지표.
+- 요청마다 타이머를 contextvar 에 두고, 처리 코드에서 with stage("decode"): ... 로 단계 시간을 누적
+  (같은 단계가 여러 번 나오면 합산, 요청 밖(CLI 등)에서는 아무것도 하지 않음)
+- 응답 헤더 Server-Timing: read;dur=1.2, decode;dur=30.5, ..., total;dur=45.0 (ms)
+- GET /metrics: 경로별 요청 시간, 경로·단계별 시간, 업로드 크기, 분석 프레임 수 히스토그램 (Prometheus 텍스트 형식)
+  지표는 워커 프로세스마다 따로 집계됨
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+# 히스토그램 버킷 상한
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+UPLOAD_BYTES_BUCKETS = (1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8)
+FRAMES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+MEMORY_BYTES_BUCKETS = (1e6, 1e7, 5e7, 1e8, 2.5e8, 5e8, 1e9, 2e9, 4e9)
+
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestTimer:
+    """요청 하나의 단계별 누적 시간(초)과 기록 값."""
+
+    __slots__ = ("start", "stages", "values")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.values: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_timer: ContextVar[RequestTimer | None] = ContextVar("request_timer", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """현재 요청의 name 단계 시간 측정. 요청 밖이면 그냥 실행."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - t0)
+
+
+def timed(name: str):
+    """함수 전체를 stage(name) 으로 감싸는 데코레이터."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def note(name: str, value: float) -> None:
+    """현재 요청에 값 기록 (upload_bytes, frames, memory_peak → /metrics 히스토그램)."""
+    timer = _timer.get()
+    if timer is not None:
+        timer.values[name] = value
+
+
+class Histogram:
+    """라벨별 누적 히스토그램 (Prometheus histogram 형식으로 출력)."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        # 라벨 값 → [버킷별 개수(+Inf 포함), 합계]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(k, list(v[0]), v[1]) for k, v in sorted(self._series.items())]
+        for label_values, counts, total in snapshot:
+            base = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values)]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                labels = ",".join([*base, f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{labels}}} {cumulative}")
+            suffix = f"{{{','.join(base)}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {total:g}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "patella_request_duration_seconds", "HTTP request latency", LATENCY_BUCKETS, ("route", "method", "status")
+)
+STAGE_SECONDS = Histogram(
+    "patella_stage_duration_seconds", "Per-stage time within a request", LATENCY_BUCKETS, ("route", "stage")
+)
+UPLOAD_BYTES = Histogram("patella_upload_size_bytes", "Uploaded file size for /predict", UPLOAD_BYTES_BUCKETS)
+FRAMES_ANALYZED = Histogram("patella_frames_analyzed", "Frames analyzed per /predict", FRAMES_BUCKETS)
+MEMORY_PEAK = Histogram(
+    "patella_request_memory_peak_bytes", "Peak accounted memory per /predict (mem_budget)", MEMORY_BYTES_BUCKETS
+)
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, UPLOAD_BYTES, FRAMES_ANALYZED, MEMORY_PEAK)
+# note() 이름 → 히스토그램
+_VALUE_HISTOGRAMS = {"upload_bytes": UPLOAD_BYTES, "frames": FRAMES_ANALYZED, "memory_peak": MEMORY_PEAK}
+
+
+def render_metrics() -> str:
+    return "\n".join(line for h in HISTOGRAMS for line in h.render()) + "\n"
+
+
+class TimingMiddleware:
+    """요청마다 타이머를 만들고, 응답 시작 시 Server-Timing 헤더를 붙인 뒤 끝나면 지표에 반영 (ASGI)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+        timer = RequestTimer()
+        token = _timer.set(timer)
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                total = time.perf_counter() - timer.start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing(total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timer.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - timer.start, path, scope["method"], str(status["code"]))
+            for name, seconds in timer.stages.items():
+                STAGE_SECONDS.observe(seconds, path, name)
+            for name, value in timer.values.items():
+                if name in _VALUE_HISTOGRAMS:
+                    _VALUE_HISTOGRAMS[name].observe(value)
+
+
+def add_timing(app: FastAPI) -> None:
+    """Server-Timing 미들웨어와 GET /metrics 등록."""
+    app.add_middleware(TimingMiddleware)
+
+    @app.get(METRICS_PATH, include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,149 @@
+"""
+학습 배치 단위 증강 + 27차원 특징 재계산 (torch 텐서, Data_AI_Final.py 에서 사용).
+- 캐시(train_cache.py)의 원본 좌표 전체를 한 번 텐서로 올려 두고, 배치마다 인덱스로 잘라서
+    Shift(샘플마다 N(0, 5)) + Jitter(관절마다 N(0, 2)) → 있는 관절에만 적용
+    → 증강된 좌표로 각도·alignment·leg_ratio 다시 계산 (feature_extract.build_27_features_batch 와 같은 식)
+- 샘플마다 파이썬으로 도는 Dataset.__getitem__ / DataLoader 워커 없이 배치 하나가 텐서 연산 몇 번
+- 증강 없이(검증용) 쓰면 캐시의 특징을 그대로 이어 붙임 → 기존 값과 동일
+"""
+from __future__ import annotations
+
+import math
+import warnings
+
+import numpy as np
+import torch
+
+# 증강 표준편차 (원본 좌표 px 단위, Data_AI_Final 기존 값)
+SHIFT_STD = 5.0
+JITTER_STD = 2.0
+
+# 관절 인덱스 (train_cache.TARGET_LABELS 순서)
+_ILIAC, _TROCHANTER, _FEMOROTIBIAL, _MALLEOLUS, _FIFTH = 0, 1, 2, 3, 4
+
+
+def _angle(p1: torch.Tensor, p2: torch.Tensor, p3: torch.Tensor) -> torch.Tensor:
+    """calculate_angle 텐서 버전. p*: (N, 2)."""
+    a = torch.linalg.vector_norm(p2 - p1, dim=1)
+    b = torch.linalg.vector_norm(p2 - p3, dim=1)
+    c = torch.linalg.vector_norm(p3 - p1, dim=1)
+    val = (a ** 2 + b ** 2 - c ** 2) / (2 * a * b + 1e-6)
+    return torch.rad2deg(torch.arccos(val.clamp(-1.0, 1.0))) / 180.0
+
+
+def build_27_features_torch(
+    keypoints: torch.Tensor, side: torch.Tensor, dog_size: torch.Tensor
+) -> torch.Tensor:
+    """
+    build_27_features_batch 의 torch 버전 (같은 장치에서 계산, 계산은 float64).
+    keypoints: (N, 10, 2) 원본 스케일 좌표, 없는 관절은 (0, 0). side·dog_size: (N,)
+    반환: (N, 27) float32
+    """
+    kp = keypoints.to(torch.float64)
+    trochanter, femorotibial, malleolus = kp[:, _TROCHANTER], kp[:, _FEMOROTIBIAL], kp[:, _MALLEOLUS]
+    angles = torch.stack(
+        [
+            _angle(trochanter, femorotibial, malleolus),
+            _angle(kp[:, _ILIAC], trochanter, femorotibial),
+            _angle(femorotibial, malleolus, kp[:, _FIFTH]),
+        ],
+        dim=1,
+    )
+    # calculate_alignment: 분모가 정확히 0이면(ZeroDivisionError) 0
+    d1 = femorotibial[:, 0] - trochanter[:, 0] + 1e-6
+    d2 = malleolus[:, 0] - femorotibial[:, 0] + 1e-6
+    ok = (d1 != 0) & (d2 != 0)
+    slope1 = (femorotibial[:, 1] - trochanter[:, 1]) / d1
+    slope2 = (malleolus[:, 1] - femorotibial[:, 1]) / d2
+    alignment = torch.where(ok, (slope1 - slope2).abs().clamp(max=5.0), torch.zeros_like(d1))
+    thigh = torch.linalg.vector_norm(trochanter - femorotibial, dim=1)
+    calf = torch.linalg.vector_norm(femorotibial - malleolus, dim=1)
+    leg_ratio = (calf / (thigh + 1e-6)).clamp(max=2.0)
+    return torch.cat(
+        [
+            kp.reshape(-1, 20) / 1000.0,
+            angles,
+            alignment[:, None],
+            leg_ratio[:, None],
+            side.to(torch.float64)[:, None],
+            dog_size.to(torch.float64)[:, None],
+        ],
+        dim=1,
+    ).to(torch.float32)
+
+
+def _as_tensor(array: np.ndarray, dtype: np.dtype, device: torch.device) -> torch.Tensor:
+    """
+    CPU면 캐시 배열(읽기 전용 mmap)을 복사 없이 그대로 텐서로 → 여러 프로세스가 같은 페이지 공유.
+    (텐서에 쓰지 않으므로 읽기 전용 경고는 무시) GPU면 한 번 복사해서 올림.
+    """
+    array = np.asarray(array)
+    if device.type == "cpu" and array.dtype == dtype:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.from_numpy(array)
+    return torch.from_numpy(np.array(array, dtype=dtype)).to(device)
+
+
+def augment_keypoints(
+    keypoints: torch.Tensor, present: torch.Tensor, generator: torch.Generator | None = None
+) -> torch.Tensor:
+    """배치 (N, 10, 2) 에 Shift + Jitter. 없는 관절(present=False)은 (0, 0) 그대로."""
+    n = keypoints.shape[0]
+    shift = torch.randn((n, 1, 2), generator=generator, device=keypoints.device) * SHIFT_STD
+    jitter = torch.randn((n, 10, 2), generator=generator, device=keypoints.device) * JITTER_STD
+    return torch.where(present[:, :, None], keypoints + shift + jitter, torch.zeros_like(keypoints))
+
+
+class BatchLoader:
+    """
+    DogJointDataset 전체를 텐서로 올려 두고 (features, labels) 배치를 내는 DataLoader 대용.
+    augment=True 면 배치마다 augment_keypoints → build_27_features_torch (DogJointDataset.__getitem__ 과 같은 증강).
+    augment 를 주지 않으면 dataset.transform 을 따름.
+    """
+
+    def __init__(
+        self,
+        dataset,
+        batch_size: int,
+        shuffle: bool = False,
+        augment: bool | None = None,
+        device: torch.device | str = "cpu",
+        seed: int | None = None,
+    ):
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.augment = bool(getattr(dataset, "transform", False)) if augment is None else augment
+        self.device = torch.device(device)
+        self.keypoints = _as_tensor(dataset.keypoints, np.float32, self.device)
+        self.present = _as_tensor(dataset.present, np.bool_, self.device)
+        # 증강 없을 때는 캐시의 특징 그대로, 증강 때는 side·dog_size 만 사용
+        self.static = _as_tensor(dataset.static, np.float32, self.device)
+        self.side, self.dog_size = self.static[:, 5], self.static[:, 6]
+        self.labels = _as_tensor(dataset.labels, np.int64, self.device)
+        self.generator = None
+        if seed is not None:
+            self.generator = torch.Generator(device=self.device)
+            self.generator.manual_seed(seed)
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.labels) / self.batch_size)
+
+    def __iter__(self):
+        n = len(self.labels)
+        if self.shuffle:
+            order = torch.randperm(n, generator=self.generator, device=self.device)
+        else:
+            order = torch.arange(n, device=self.device)
+        for start in range(0, n, self.batch_size):
+            idx = order[start:start + self.batch_size]
+            yield self.features(idx), self.labels[idx]
+
+    def features(self, idx: torch.Tensor) -> torch.Tensor:
+        """인덱스 배치 → (B, 27) 특징."""
+        keypoints = self.keypoints[idx]
+        if not self.augment:
+            keypoints = (keypoints.reshape(-1, 20).to(torch.float64) / 1000.0).to(torch.float32)
+            return torch.cat([keypoints, self.static[idx]], dim=1)
+        keypoints = augment_keypoints(keypoints, self.present[idx], self.generator)
+        return build_27_features_torch(keypoints, self.side[idx], self.dog_size[idx])
@@ -0,0 +1,273 @@
+"""
+학습용 라벨 JSON → 메모리 맵 특징 캐시 (Data_AI_Final.py DogJointDataset 이 사용).
+- 라벨 폴더(정상/1기/3기) 아래 JSON의 annotation_info 를 한 번만 파싱해 배열로 저장
+    keypoints (N, 10, 2) float32  원본 스케일 좌표 (없는 관절은 0)
+    present   (N, 10)    bool     관절 존재 여부 (증강은 있는 관절에만)
+    static    (N, 7)     float32  증강과 무관한 특징: 각도 3 + alignment + leg_ratio + side + dog_size
+    label     (N,)       int64
+- shard-NNNNN/*.npy 로 저장해 np.load(mmap_mode="r") → 여러 프로세스가 같은 페이지를 공유
+- manifest.json: 파일별 (mtime_ns, size) → 다시 실행하면 추가·변경된 파일만 파싱해 새 shard로 추가
+  (지워지거나 바뀐 파일의 이전 행은 제외, 버려진 행이 살아 있는 행보다 많아지면 한 shard로 다시 씀)
+
+캐시 만들기 (backend 폴더에서, 기본 캐시 위치는 {root_dir}.cache):
+    python train_cache.py ".\\Training\\02.라벨링데이터\\TL" [--cache-dir DIR] [--workers N]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .feature_extract import build_27_features_batch
+except ImportError:
+    # Data_AI_Final.py 처럼 backend 폴더에서 스크립트로 실행할 때
+    from feature_extract import build_27_features_batch
+
+CACHE_VERSION = 1
+TARGET_MAP = {"정상": 0, "1기": 1, "3기": 2}
+TARGET_LABELS = [
+    "Iliac crest", "Femoral greater trochanter", "Femorotibial joint",
+    "Lateral malleolus of the distal tibia", "Distal lateral aspect of the fifth metatarsus",
+    "T13 Spinous precess", "Dorsal scapular spine", "Acromion/Greater tubercle",
+    "Lateral humeral epicondyle", "Ulnar styloid process",
+]
+SIZE_MAP = {"소형견": 0.0, "중형견": 0.5, "대형견": 1.0}
+ARRAYS = ("keypoints", "present", "static", "label")
+# 배열별 행 모양·dtype (빈 캐시용)
+_ARRAY_SPECS = {
+    "keypoints": ((10, 2), np.float32),
+    "present": ((10,), np.bool_),
+    "static": ((7,), np.float32),
+    "label": ((), np.int64),
+}
+MANIFEST_NAME = "manifest.json"
+# 한 프로세스에 넘기는 파일 수
+PARSE_CHUNK = 512
+
+
+def default_cache_dir(root_dir: str) -> str:
+    return os.path.normpath(root_dir) + ".cache"
+
+
+def scan_json_files(root_dir: str) -> dict[str, tuple[int, int, int]]:
+    """라벨 폴더 아래 JSON 파일 → (mtime_ns, size, label). 키는 root_dir 기준 상대 경로."""
+    files = {}
+    if not os.path.isdir(root_dir):
+        return files
+    for severity_folder in sorted(os.listdir(root_dir)):
+        if severity_folder not in TARGET_MAP:
+            continue
+        label = TARGET_MAP[severity_folder]
+        for root, _, names in os.walk(os.path.join(root_dir, severity_folder)):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    files[os.path.relpath(path, root_dir)] = (st.st_mtime_ns, st.st_size, label)
+    return files
+
+
+def _parse_one(path: str) -> tuple[np.ndarray, np.ndarray, float, float]:
+    """JSON 하나 → (keypoints (10, 2), present (10,), side, dog_size). Data_AI_Final.__getitem__ 과 같은 규칙."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    joint_dict = {a["label"]: (float(a["x"]), float(a["y"])) for a in data.get("annotation_info", [])}
+    keypoints = np.zeros((10, 2), dtype=np.float64)
+    present = np.zeros(10, dtype=bool)
+    for i, t in enumerate(TARGET_LABELS):
+        if t in joint_dict:
+            keypoints[i] = joint_dict[t]
+            present[i] = True
+    side = 0.5
+    # Data_AI_Final 과 같이 break 없음 → value==1 인 마지막 기록 기준
+    for r in data.get("pet_medical_record_info", []):
+        if r.get("value") == 1:
+            side = 0.0 if r.get("foot_position") == "left" else 1.0
+    dog_size = SIZE_MAP.get(data.get("size", "소형견"), 0.0)
+    return keypoints, present, side, dog_size
+
+
+def _parse_chunk(paths: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """JSON 여러 개 → (keypoints (M, 10, 2) float64, present, side, dog_size)."""
+    parsed = [_parse_one(p) for p in paths]
+    return (
+        np.stack([p[0] for p in parsed]) if parsed else np.zeros((0, 10, 2)),
+        np.stack([p[1] for p in parsed]) if parsed else np.zeros((0, 10), dtype=bool),
+        np.array([p[2] for p in parsed], dtype=np.float64),
+        np.array([p[3] for p in parsed], dtype=np.float64),
+    )
+
+
+def _static_features(keypoints: np.ndarray, side: np.ndarray, dog_size: np.ndarray) -> np.ndarray:
+    """증강과 무관한 7개 특징 (27차원 중 20~26번). 각도는 Data_AI_Final 처럼 증강 전 좌표 기준."""
+    return build_27_features_batch(keypoints, side, dog_size)[:, 20:]
+
+
+def _write_shard(cache_dir: str, name: str, arrays: dict[str, np.ndarray]) -> None:
+    tmp = tempfile.mkdtemp(dir=cache_dir, prefix=f".{name}.")
+    try:
+        for key in ARRAYS:
+            np.save(os.path.join(tmp, f"{key}.npy"), arrays[key])
+        os.replace(tmp, os.path.join(cache_dir, name))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _write_manifest(cache_dir: str, manifest: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=".manifest.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST_NAME))
+
+
+def load_manifest(cache_dir: str) -> dict | None:
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == CACHE_VERSION else None
+
+
+def build_cache(root_dir: str, cache_dir: str | None = None, workers: int | None = None) -> dict:
+    """
+    root_dir 의 라벨 JSON을 캐시에 반영 (추가·변경된 파일만 파싱). 반환: manifest.
+    manifest["files"]: 상대 경로 → [mtime_ns, size, label, shard 이름, 행 번호]
+    """
+    cache_dir = cache_dir or default_cache_dir(root_dir)
+    manifest = load_manifest(cache_dir) or {"version": CACHE_VERSION, "shards": {}, "files": {}}
+    if not os.path.isdir(root_dir):
+        # 원본이 없으면 (캐시만 옮겨 온 경우 등) 기존 캐시 그대로
+        print(f"[train_cache] {root_dir} 없음 → 기존 캐시 사용 ({len(manifest['files'])}개)")
+        return manifest
+    os.makedirs(cache_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    scanned = scan_json_files(root_dir)
+    old_files = manifest["files"]
+    files = {
+        rel: entry for rel, entry in old_files.items()
+        if rel in scanned and tuple(entry[:3]) == scanned[rel]
+    }
+    todo = sorted(rel for rel in scanned if rel not in files)
+
+    if todo:
+        paths = [os.path.join(root_dir, rel) for rel in todo]
+        chunks = [paths[i:i + PARSE_CHUNK] for i in range(0, len(paths), PARSE_CHUNK)]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                parsed = list(pool.map(_parse_chunk, chunks))
+        else:
+            parsed = [_parse_chunk(c) for c in chunks]
+        keypoints = np.concatenate([p[0] for p in parsed])
+        side = np.concatenate([p[2] for p in parsed])
+        dog_size = np.concatenate([p[3] for p in parsed])
+        name = f"shard-{max((int(s[6:]) for s in manifest['shards']), default=-1) + 1:05d}"
+        _write_shard(cache_dir, name, {
+            "keypoints": keypoints.astype(np.float32),
+            "present": np.concatenate([p[1] for p in parsed]),
+            "static": _static_features(keypoints, side, dog_size),
+            "label": np.array([scanned[rel][2] for rel in todo], dtype=np.int64),
+        })
+        manifest["shards"][name] = len(todo)
+        for row, rel in enumerate(todo):
+            files[rel] = [*scanned[rel], name, row]
+
+    manifest["files"] = files
+    # 더 이상 쓰지 않는 shard 정리
+    live_shards = {entry[3] for entry in files.values()}
+    for name in [s for s in manifest["shards"] if s not in live_shards]:
+        del manifest["shards"][name]
+    _write_manifest(cache_dir, manifest)
+    _remove_unlisted_shards(cache_dir, manifest)
+    if sum(manifest["shards"].values()) > 2 * len(files) and len(manifest["shards"]) > 1:
+        manifest = _compact(cache_dir, manifest)
+    print(
+        f"[train_cache] {root_dir}: {len(files)}개 (새로 파싱 {len(todo)}개, 제외 {len(old_files) - (len(files) - len(todo))}개) "
+        f"{time.perf_counter() - t0:.1f}s → {cache_dir}"
+    )
+    return manifest
+
+
+def _remove_unlisted_shards(cache_dir: str, manifest: dict) -> None:
+    for name in os.listdir(cache_dir):
+        if name.startswith("shard-") and name not in manifest["shards"]:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def _compact(cache_dir: str, manifest: dict) -> dict:
+    """살아 있는 행만 모아 shard 하나로 다시 씀."""
+    cache = FeatureCache(cache_dir, manifest)
+    name = f"shard-{max(int(s[6:]) for s in manifest['shards']) + 1:05d}"
+    _write_shard(cache_dir, name, {key: cache.array(key) for key in ARRAYS})
+    manifest["shards"] = {name: len(cache)}
+    manifest["files"] = {
+        rel: [*manifest["files"][rel][:3], name, row] for row, rel in enumerate(cache.paths)
+    }
+    _write_manifest(cache_dir, manifest)
+    _remove_unlisted_shards(cache_dir, manifest)
+    return manifest
+
+
+class FeatureCache:
+    """
+    캐시 읽기. shard 배열은 mmap (읽기 전용), 행 순서는 상대 경로 정렬순.
+    cache.keypoints[i] 처럼 행 단위로 읽거나 cache.array("static") 으로 전체를 한 배열로.
+    """
+
+    def __init__(self, cache_dir: str, manifest: dict | None = None):
+        manifest = manifest or load_manifest(cache_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"train cache not found: {cache_dir}")
+        self.cache_dir = cache_dir
+        shard_names = sorted(manifest["shards"])
+        self._shards = [
+            {key: np.load(os.path.join(cache_dir, name, f"{key}.npy"), mmap_mode="r") for key in ARRAYS}
+            for name in shard_names
+        ]
+        shard_index = {name: i for i, name in enumerate(shard_names)}
+        self.paths = sorted(manifest["files"])
+        entries = [manifest["files"][rel] for rel in self.paths]
+        self.shard_of = np.array([shard_index[e[3]] for e in entries], dtype=np.int32)
+        self.row_of = np.array([e[4] for e in entries], dtype=np.int64)
+        # shard 하나면 (보통 한 번 만든 뒤) 행 번호가 그대로라 바로 슬라이스
+        self._direct = len(self._shards) == 1 and np.array_equal(self.row_of, np.arange(len(entries)))
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def row(self, key: str, i: int) -> np.ndarray:
+        return self._shards[self.shard_of[i]][key][self.row_of[i]]
+
+    def array(self, key: str) -> np.ndarray:
+        """전체 행을 한 배열로 (shard 하나면 mmap 그대로, 아니면 복사)."""
+        if self._direct:
+            return self._shards[0][key]
+        shape, dtype = _ARRAY_SPECS[key]
+        out = np.empty((len(self), *shape), dtype=dtype)
+        for s, shard in enumerate(self._shards):
+            mask = self.shard_of == s
+            out[mask] = shard[key][self.row_of[mask]]
+        return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root_dir", nargs="+", help="라벨 폴더 (정상/1기/3기 하위 폴더가 있는 TL·VL 등)")
+    parser.add_argument("--cache-dir", default=None, help="캐시 위치 (root_dir 하나일 때만, 기본 {root_dir}.cache)")
+    parser.add_argument("--workers", type=int, default=None, help="파싱 프로세스 수 (기본 CPU 수)")
+    args = parser.parse_args()
+    for root_dir in args.root_dir:
+        build_cache(root_dir, args.cache_dir if len(args.root_dir) == 1 else None, args.workers)
+
+
+if __name__ == "__main__":
+    main()
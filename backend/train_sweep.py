@@ -0,0 +1,204 @@
+"""
+슬개골 MLP(Data_AI_Final.DogPatellaModel) 하이퍼파라미터 탐색 — CPU 코어 여러 개에서 trial 병렬 학습.
+- 격자(--lr, --weight-decay, --dropout, --class-weights)의 모든 조합을 trial 하나씩
+- trial마다 프로세스 하나, torch 스레드 수 고정(--threads, 기본 1) → 코어 수 / threads 개가 동시에
+- 학습·검증 데이터는 train_cache 캐시를 각 프로세스가 읽기 전용 mmap으로 공유 (메모리에 한 벌만)
+- 조기 종료
+    early_stop: --patience epoch 동안 최고 정확도 갱신 없음
+    pruned    : --prune-warmup epoch 이후, 같은 epoch까지 다른 trial 최고 정확도의 중앙값보다 낮음
+- 결과: {out}/trial-NNN/best.pth (trial별 최고 검증 정확도 가중치) + config.json,
+        {out}/results.csv·results.json (기수별 정확도 포함, 정확도 높은 순)
+
+사용법 (프로젝트 루트에서, 캐시가 없으면 먼저 만듦):
+    python -m backend.train_sweep TRAIN_DIR VAL_DIR \\
+        --lr 1e-4 3e-4 --weight-decay 0.01 0.05 --dropout 0.2 0.4 --class-weights 1.2,1,4 1,1,3 \\
+        [--epochs 30] [--workers N] [--threads 1] [--patience 6] [--prune-warmup 5] [--out runs/sweep]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import torch
+
+from .Data_AI_Final import DogJointDataset, DogPatellaModel, train_model
+from .train_augment import BatchLoader
+from .train_cache import build_cache
+
+CLASS_LABELS = ("정상", "1기", "3기")
+# 가지치기할 때 비교 대상이 이보다 적으면 건너뜀
+MIN_PEERS = 2
+COLUMNS = (
+    "trial", "lr", "weight_decay", "dropout", "class_weights", "status", "epochs", "best_epoch",
+    "best_acc", *(f"acc_{c}" for c in CLASS_LABELS), "seconds", "checkpoint",
+)
+
+# 워커 프로세스 전역 (initializer 에서 채움)
+_WORKER: dict = {}
+
+
+def _init_worker(train_dir: str, val_dir: str, threads: int, progress) -> None:
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _WORKER["train"] = DogJointDataset(train_dir, transform=True, refresh=False)
+    _WORKER["val"] = DogJointDataset(val_dir, transform=False, refresh=False)
+    _WORKER["progress"] = progress
+
+
+def _should_prune(progress, trial_id: int, epoch: int, best: float) -> bool:
+    """같은 epoch까지 돈 다른 trial들의 최고 정확도 중앙값보다 낮으면 True."""
+    peers = [max(curve[:epoch]) for tid, curve in progress.items() if tid != trial_id and len(curve) >= epoch]
+    return len(peers) >= MIN_PEERS and best < statistics.median(peers)
+
+
+def _run_trial(trial: dict) -> dict:
+    torch.manual_seed(trial["seed"])
+    trial_dir = os.path.join(trial["out"], f"trial-{trial['id']:03d}")
+    os.makedirs(trial_dir, exist_ok=True)
+    checkpoint = os.path.join(trial_dir, "best.pth")
+    progress = _WORKER["progress"]
+    curve: list[float] = []
+    status = {"value": "done"}
+
+    def on_epoch(epoch: int, accuracy: float) -> bool:
+        curve.append(accuracy)
+        progress[trial["id"]] = list(curve)
+        if epoch >= trial["epochs"]:
+            return False
+        best = max(curve)
+        if epoch - (curve.index(best) + 1) >= trial["patience"]:
+            status["value"] = "early_stop"
+            return True
+        if epoch >= trial["prune_warmup"] and _should_prune(progress, trial["id"], epoch, best):
+            status["value"] = "pruned"
+            return True
+        return False
+
+    train_loader = BatchLoader(
+        _WORKER["train"], batch_size=trial["batch_size"], shuffle=True, augment=True, seed=trial["seed"]
+    )
+    val_loader = BatchLoader(_WORKER["val"], batch_size=512)
+    model = DogPatellaModel(dropout=trial["dropout"])
+    t0 = time.perf_counter()
+    result = train_model(
+        model, train_loader, val_loader, torch.device("cpu"), epochs=trial["epochs"], lr=trial["lr"],
+        weight_decay=trial["weight_decay"], class_weights=trial["class_weights"], checkpoint=checkpoint,
+        on_epoch=on_epoch, verbose=False,
+    )
+    config = {k: trial[k] for k in ("lr", "weight_decay", "dropout", "class_weights", "batch_size", "epochs", "seed")}
+    with open(os.path.join(trial_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({**config, "curve": curve}, f, ensure_ascii=False, indent=2)
+    return {
+        "trial": trial["id"],
+        "lr": trial["lr"],
+        "weight_decay": trial["weight_decay"],
+        "dropout": trial["dropout"],
+        "class_weights": "/".join(f"{w:g}" for w in trial["class_weights"]),
+        "status": status["value"],
+        "epochs": result["epochs"],
+        "best_epoch": result["best_epoch"],
+        "best_acc": round(result["best_acc"], 2),
+        **{f"acc_{c}": _round(result["class_acc"].get(c)) for c in CLASS_LABELS},
+        "seconds": round(time.perf_counter() - t0, 1),
+        "checkpoint": checkpoint if result["best_epoch"] else "",
+    }
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 2)
+
+
+def _class_weights(text: str) -> tuple[float, ...]:
+    weights = tuple(float(w) for w in text.split(","))
+    if len(weights) != len(CLASS_LABELS):
+        raise argparse.ArgumentTypeError(f"class weights need {len(CLASS_LABELS)} values: {text}")
+    return weights
+
+
+def _write_results(out_dir: str, rows: list[dict]) -> None:
+    rows = sorted(rows, key=lambda r: -r["best_acc"])
+    with open(os.path.join(out_dir, "results.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, "results.csv"), "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("train_dir", help="학습 라벨 폴더 (TL)")
+    parser.add_argument("val_dir", help="검증 라벨 폴더 (VL)")
+    parser.add_argument("--lr", type=float, nargs="+", default=[0.0001])
+    parser.add_argument("--weight-decay", type=float, nargs="+", default=[0.05])
+    parser.add_argument("--dropout", type=float, nargs="+", default=[0.4])
+    parser.add_argument("--class-weights", type=_class_weights, nargs="+", default=[(1.2, 1.0, 4.0)],
+                        help="정상,1기,3기 손실 가중치 (예: 1.2,1,4)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--threads", type=int, default=1, help="trial 하나의 torch 스레드 수")
+    parser.add_argument("--workers", type=int, default=None, help="동시에 돌릴 trial 수 (기본 CPU 수 / threads)")
+    parser.add_argument("--patience", type=int, default=6, help="최고 정확도 갱신 없이 이만큼 지나면 중단")
+    parser.add_argument("--prune-warmup", type=int, default=5, help="이 epoch부터 다른 trial과 비교해 가지치기")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=os.path.join("runs", "sweep"))
+    args = parser.parse_args()
+
+    # 캐시를 먼저 만들어 두고 워커는 읽기만
+    build_cache(args.train_dir)
+    build_cache(args.val_dir)
+    os.makedirs(args.out, exist_ok=True)
+
+    grid = list(itertools.product(args.lr, args.weight_decay, args.dropout, args.class_weights))
+    trials = [
+        {
+            "id": i, "lr": lr, "weight_decay": wd, "dropout": dropout, "class_weights": list(weights),
+            "batch_size": args.batch_size, "epochs": args.epochs, "seed": args.seed + i,
+            "patience": args.patience, "prune_warmup": args.prune_warmup, "out": args.out,
+        }
+        for i, (lr, wd, dropout, weights) in enumerate(grid)
+    ]
+    workers = min(len(trials), args.workers or max(1, (os.cpu_count() or 1) // args.threads))
+    print(f"[train_sweep] trial {len(trials)}개, 동시 {workers}개 × 스레드 {args.threads}")
+
+    # 워커가 torch를 읽기 전에 BLAS/OpenMP 스레드 수도 고정
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(args.threads)
+    ctx = multiprocessing.get_context("spawn")
+    rows: list[dict] = []
+    t0 = time.perf_counter()
+    with ctx.Manager() as manager:
+        progress = manager.dict()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=_init_worker,
+            initargs=(args.train_dir, args.val_dir, args.threads, progress),
+        ) as pool:
+            futures = [pool.submit(_run_trial, t) for t in trials]
+            for future in as_completed(futures):
+                row = future.result()
+                rows.append(row)
+                _write_results(args.out, rows)
+                print(
+                    f"[train_sweep] trial-{row['trial']:03d} {row['status']:>10} epoch {row['epochs']:>3} "
+                    f"best {row['best_acc']:.2f}% ({len(rows)}/{len(trials)})"
+                )
+
+    rows.sort(key=lambda r: -r["best_acc"])
+    print(f"[train_sweep] {time.perf_counter() - t0:.1f}s → {os.path.join(args.out, 'results.csv')}")
+    print(" ".join(f"{c:>13}" for c in COLUMNS[:-1]))
+    for r in rows:
+        print(" ".join(f"{r[c]!s:>13}" for c in COLUMNS[:-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,30 @@
 공공데이터 CSV 두 개: 서버 시작 시 pandas로 로드·전처리.
 - 주소, 코스명(공원명), 길이(km), 경사도 추출
 - Haversine 거리 기반 + 진단별 상위 3개 추천
+- 파싱 결과는 바이너리 스냅샷(course_snapshot)으로 저장해 재시작 시 CSV 재파싱 생략
+- 거리·필터 계산은 스냅샷의 numpy 컬럼 + 격자 공간 인덱스로 벡터화 (워커 간 mmap 공유)
 """
 from __future__ import annotations
 
+import hashlib
 import math
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Literal
+from typing import Literal, NamedTuple
 
+import numpy as np
 import pandas as pd
 
+from .course_snapshot import CourseDataset, build_columns, csv_fingerprint, save_snapshot, snapshot_build_lock
+from .course_tiles import CourseTiles, build_and_save, tiles_enabled
+from .timing import timed
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 PARK_CSV = PROJECT_ROOT / "KC_498_DMSTC_MCST_PBL_CT_PARK_2025.csv"
 WALK_CSV = PROJECT_ROOT / "KC_CFR_WLK_STRET_INFO_2021.csv"
 
-# 전역: 서버 시작 시 로드된 코스 리스트 (dict 리스트)
-_courses: list[dict] = []
-
 
 def _parse_length_km(s: str | None) -> float | None:
     """길이 문자열 → km 수치. '2.1', '13.8' 등."""
@@ -58,6 +66,11 @@ def _extract_reason_tags(text: str, park_type: str = "") -> list[str]:
 
 
 # 카테고리 필터: 프론트엔드 category 값에 따른 조건
+# 평지위주·경사 판정 키워드 (설명 전체에 포함 여부, 파생 컬럼은 키워드 역색인으로 계산)
+_FLAT_KEYWORDS = ("평지", "수변", "공원", "무장애")
+_SLOPE_KEYWORDS = ("산", "고개", "오르막", "계단")
+
+
 def _desc_for_category(c: dict) -> str:
     """코스의 설명 전체(키워드 검색용)."""
     return (c.get("description_full") or c.get("description") or "").strip()
@@ -68,7 +81,7 @@ def _is_flat_course(c: dict) -> bool:
     if (c.get("difficulty") or "").strip() == "쉬움":
         return True
     desc = _desc_for_category(c)
-    for kw in ("평지", "수변", "공원", "무장애"):
+    for kw in _FLAT_KEYWORDS:
         if kw in desc:
             return True
     return False
@@ -101,7 +114,7 @@ def _is_slope_course(c: dict) -> bool:
     if (c.get("difficulty") or "").strip() == "어려움":
         return True
     desc = _desc_for_category(c)
-    for kw in ("산", "고개", "오르막", "계단"):
+    for kw in _SLOPE_KEYWORDS:
         if kw in desc:
             return True
     return False
@@ -123,10 +136,284 @@ def _build_course_tags(c: dict) -> list[str]:
     return tags
 
 
-def init_courses() -> None:
-    """서버 시작 시 pandas로 두 CSV 읽어 전처리 후 _courses에 적재."""
-    global _courses
-    _courses = []
+# 파생 컬럼: 카테고리 비트마스크 (평지위주/단거리/장거리/경사)
+FLAG_FLAT, FLAG_SHORT, FLAG_LONG, FLAG_SLOPE = 1, 2, 4, 8
+# 난이도 순서 (difficulty_rank 컬럼: 이 튜플의 인덱스, 없는 값은 -1)
+DIFFICULTY_ORDER = ("쉬움", "보통", "어려움")
+# 진단 기수 → 선호 키워드 점수 컬럼명 (.npy 파일명으로 쓰이므로 영문)
+_PREF_COLUMNS = {"정상": "pref_normal", "1기": "pref_grade1", "3기": "pref_grade3"}
+
+
+def _keyword_mask(ds: CourseDataset, keywords, fields: tuple[str, ...]) -> np.ndarray:
+    """fields 중 하나에 keywords 중 하나라도 포함된 코스 (키워드 역색인 조회)."""
+    mask = np.zeros(len(ds), dtype=np.bool_)
+    for kw in keywords:
+        mask[ds.keyword_candidates(kw, fields)] = True
+    return mask
+
+
+def _string_values(ds: CourseDataset, field: str) -> list[str]:
+    """문자열 컬럼을 string table 값 단위로 한 번씩만 디코딩 → 코스별 문자열."""
+    col = ds.column(field)
+    uniq, inverse = np.unique(col, return_inverse=True)
+    values = [ds.string(int(u)) for u in uniq]
+    return [values[j] for j in inverse]
+
+
+def _derive_columns(ds: CourseDataset) -> dict[str, np.ndarray]:
+    """
+    요청마다 문자열을 훑지 않도록 난이도·경사·카테고리·선호 키워드 점수를 미리 계산한 컬럼.
+    키워드 조건은 부분 문자열 검사 대신 키워드 역색인(kw_*)으로 계산 (_is_*_course 와 같은 결과).
+    """
+    difficulty = [d.strip() for d in _string_values(ds, "difficulty")]
+    length = ds.column("length_km")
+    with np.errstate(invalid="ignore"):
+        short = length < 3.0
+        long = length >= 5.0
+    desc_fields = ("description_full",)
+    flat = np.array([d == "쉬움" for d in difficulty], dtype=np.bool_) | _keyword_mask(ds, _FLAT_KEYWORDS, desc_fields)
+    slope = np.array([d == "어려움" for d in difficulty], dtype=np.bool_) | _keyword_mask(ds, _SLOPE_KEYWORDS, desc_fields)
+    flags = (
+        np.where(flat, FLAG_FLAT, 0)
+        | np.where(short, FLAG_SHORT, 0)
+        | np.where(long, FLAG_LONG, 0)
+        | np.where(slope, FLAG_SLOPE, 0)
+    ).astype(np.uint8)
+    rank = {d: i for i, d in enumerate(DIFFICULTY_ORDER)}
+    columns = {
+        "difficulty_rank": np.array([rank.get(d, -1) for d in difficulty], dtype=np.int8),
+        "no_slope": np.array([v == "없음" for v in _string_values(ds, "slope")], dtype=np.bool_),
+        "category_flags": flags,
+    }
+    for grade, col in _PREF_COLUMNS.items():
+        score = np.zeros(len(ds), dtype=np.int16)
+        for kw in DIAGNOSIS_CRITERIA[grade].get("preferred_keywords") or []:
+            score[ds.keyword_candidates(kw, ("park_type", "description_full"))] += 1
+        columns[col] = score
+    return columns
+
+
+def _empty_dataset() -> CourseDataset:
+    """적재 전 자리표시용 빈 코스 테이블 (파생 컬럼 포함 → 요청 경로가 그대로 빈 결과를 반환)."""
+    columns = build_columns([])
+    columns.update({
+        "difficulty_rank": np.empty(0, dtype=np.int8),
+        "no_slope": np.empty(0, dtype=np.bool_),
+        "category_flags": np.empty(0, dtype=np.uint8),
+    })
+    columns.update({col: np.empty(0, dtype=np.int16) for col in _PREF_COLUMNS.values()})
+    return CourseDataset(columns)
+
+
+class CourseState(NamedTuple):
+    """한 시점의 코스 데이터 (교체 시 통째로 바꾸므로 요청 중에는 일관된 dataset·tiles 조합)."""
+    # 코스 테이블 (스냅샷 mmap 컬럼, 행 접근 시 dict)
+    dataset: CourseDataset
+    # 적재 출처("snapshot" | "csv"). 적재 전에는 None
+    source: str | None = None
+    # 추천 타일 (COURSE_TILES=1 이고 스냅샷에 타일이 있을 때만)
+    tiles: CourseTiles | None = None
+    # 게시 시각 (time.time())
+    loaded_at: float | None = None
+
+
+# 전역: 현재 코스 데이터. 읽기는 참조 한 번(_active)으로 끝나고, 교체는 새 CourseState를 대입 (lock 없음)
+_active = CourseState(_empty_dataset())
+# 적재·재생성(쓰기)끼리만 직렬화
+_load_lock = threading.Lock()
+# CSV 변경 감시 주기(초). 0이면 감시 안 함
+RELOAD_INTERVAL_SEC = float(os.environ.get("COURSE_RELOAD_INTERVAL", "30"))
+_watcher_stop = threading.Event()
+_watcher: threading.Thread | None = None
+# 요청 경로가 시작하는 백그라운드 적재: 한 번에 하나만, 적재 후에도 비어 있으면 재시도 간격을 두 배씩 (최대 MAX)
+LOAD_RETRY_SEC = 5.0
+LOAD_RETRY_MAX_SEC = 300.0
+_load_attempt = {"running": False, "next_at": 0.0, "delay": LOAD_RETRY_SEC}
+_load_attempt_lock = threading.Lock()
+
+
+def init_courses(background: bool = False) -> None:
+    """
+    서버 시작 시 코스 적재. CSV fingerprint와 일치하는 스냅샷이 있으면 mmap으로 바로 연결.
+    없으면 CSV 파싱 후 스냅샷 저장 (background=True면 이 과정을 백그라운드 스레드에서 수행).
+    여러 워커가 동시에 시작해도 스냅샷은 한 번만 만들고 모두 같은 파일을 읽기 전용으로 공유한다.
+    """
+    with _load_lock:
+        fingerprint = csv_fingerprint(PARK_CSV, WALK_CSV)
+        if _active.dataset and _active.dataset.fingerprint == fingerprint:
+            return
+        dataset = CourseDataset.attach(fingerprint)
+        if dataset is not None:
+            _publish(dataset, "snapshot", CourseTiles.load(dataset) if tiles_enabled() else None)
+            return
+    if background:
+        threading.Thread(
+            target=_rebuild_courses, args=(fingerprint,), name="course-snapshot", daemon=True
+        ).start()
+    else:
+        _rebuild_courses(fingerprint)
+
+
+def _publish(dataset: CourseDataset, source: str, tiles: CourseTiles | None) -> None:
+    """새 코스 데이터를 한 번의 대입으로 교체. 진행 중인 요청은 이전 CourseState를 끝까지 사용."""
+    global _active
+    _active = CourseState(dataset, source, tiles, time.time())
+
+
+def _rebuild_courses(fingerprint: str) -> None:
+    """
+    CSV 파싱 → 스냅샷 저장 → mmap 연결 → 게시. 다른 워커가 먼저 만들었으면 그 스냅샷을 연결.
+    요청 경로와 무관한 스레드에서 실행되며, 끝날 때까지 요청은 기존 데이터로 응답한다.
+    """
+    with _load_lock:
+        if _active.dataset and _active.dataset.fingerprint == fingerprint:
+            return
+        with snapshot_build_lock(fingerprint):
+            dataset = CourseDataset.attach(fingerprint)
+            source = "snapshot"
+            if dataset is None:
+                courses = _parse_courses_from_csv()
+                if not courses and _active.dataset:
+                    print("[walk_routes] Parsed 0 courses from CSV, keeping current data")
+                    return
+                columns = build_columns(courses)
+                columns.update(_derive_columns(CourseDataset(columns)))
+                source = "csv"
+                if courses:
+                    try:
+                        save_snapshot(columns, fingerprint)
+                        dataset = CourseDataset.attach(fingerprint)
+                    except OSError as e:
+                        print(f"[walk_routes] Failed to write course snapshot: {e}")
+                if dataset is None:
+                    dataset = CourseDataset(columns, fingerprint)
+            tiles = None
+            if tiles_enabled() and dataset.path is not None:
+                tiles = CourseTiles.load(dataset)
+                if tiles is None:
+                    try:
+                        tiles = build_and_save(dataset)
+                    except OSError as e:
+                        print(f"[walk_routes] Failed to write course tiles: {e}")
+        _publish(dataset, source, tiles)
+
+
+def _csv_stat() -> tuple:
+    """CSV 변경 감지용 (mtime, 크기). 파일이 없으면 None."""
+    out = []
+    for path in (PARK_CSV, WALK_CSV):
+        try:
+            st = path.stat()
+            out.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+
+def _watch_courses(interval: float) -> None:
+    """바뀐 뒤 한 주기 동안 그대로인 경우만 재생성 (복사·저장 중인 CSV를 읽지 않도록)."""
+    last = _csv_stat()
+    pending = None
+    while not _watcher_stop.wait(interval):
+        stat = _csv_stat()
+        if stat == last:
+            pending = None
+            continue
+        if stat != pending:
+            pending = stat
+            continue
+        last, pending = stat, None
+        try:
+            fingerprint = csv_fingerprint(PARK_CSV, WALK_CSV)
+            if fingerprint != _active.dataset.fingerprint:
+                print("[walk_routes] Course CSV changed, rebuilding snapshot")
+                _rebuild_courses(fingerprint)
+                print(f"[walk_routes] Course data reloaded: {course_status()}")
+        except Exception as e:
+            print(f"[walk_routes] Course reload failed, keeping current data: {e}")
+
+
+def start_course_watcher(interval: float = RELOAD_INTERVAL_SEC) -> None:
+    """CSV 변경 감시 스레드 시작 (interval초마다 mtime·크기 확인 → 바뀌었으면 백그라운드 재생성 후 교체)."""
+    global _watcher
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(target=_watch_courses, args=(interval,), name="course-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_course_watcher() -> None:
+    global _watcher
+    _watcher_stop.set()
+    if _watcher is not None:
+        _watcher.join(timeout=5)
+    _watcher = None
+
+
+def _current() -> CourseState:
+    """
+    요청 경로용 현재 코스 데이터. 절대 대기하지 않음: 적재 전이면 백그라운드 적재를 시작하고
+    빈 데이터로 응답 (재생성 중에는 이전 데이터가 그대로 유효).
+    """
+    state = _active
+    if not state.dataset:
+        _start_background_load()
+    return state
+
+
+def _start_background_load() -> None:
+    """적재 스레드가 없고 재시도 간격이 지났으면 하나 시작 (CSV가 없거나 0건이어도 요청마다 스레드를 만들지 않음)."""
+    with _load_attempt_lock:
+        if _load_attempt["running"] or _load_lock.locked() or time.monotonic() < _load_attempt["next_at"]:
+            return
+        _load_attempt["running"] = True
+    threading.Thread(target=_background_load, name="course-load", daemon=True).start()
+
+
+def _background_load() -> None:
+    try:
+        init_courses()
+    except Exception as e:
+        print(f"[walk_routes] Course load failed: {e}")
+    finally:
+        with _load_attempt_lock:
+            if _active.dataset:
+                _load_attempt["delay"] = LOAD_RETRY_SEC
+            else:
+                _load_attempt["next_at"] = time.monotonic() + _load_attempt["delay"]
+                _load_attempt["delay"] = min(_load_attempt["delay"] * 2, LOAD_RETRY_MAX_SEC)
+            _load_attempt["running"] = False
+
+
+def _ensure_courses() -> CourseDataset:
+    """요청 경로용 현재 코스 테이블 (_current 참고)."""
+    return _current().dataset
+
+
+def course_status() -> dict:
+    """/health 용 코스 데이터 상태."""
+    state = _active
+    ds = state.dataset
+    return {
+        "loaded": bool(ds),
+        "count": len(ds),
+        "source": state.source,
+        "fingerprint": ds.fingerprint[:16] if ds.fingerprint else None,
+        "loaded_at": state.loaded_at,
+        "tiles": state.tiles is not None,
+    }
+
+
+def dataset_version() -> str | None:
+    """HTTP 캐시(ETag)용 코스 데이터 버전 = CSV fingerprint. 아직 적재 전이면 None."""
+    ds = _active.dataset
+    return ds.fingerprint if ds and ds.fingerprint else None
+
+
+def _parse_courses_from_csv() -> list[dict]:
+    """pandas로 두 CSV 읽어 전처리한 코스 리스트."""
+    courses: list[dict] = []
 
     # 공원: 주소, 공원명, 길이(없음), 경사도(평지/없음), 위경도
     if PARK_CSV.is_file():
@@ -153,7 +440,7 @@ def init_courses() -> None:
                         continue
                     mcate = _str(row.get("mcate_nm"))  # 지역근린공원, 어린이공원 등
                     desc = f"{address} {name} (공원)"
-                    _courses.append({
+                    courses.append({
                         "address": address,
                         "name": name,
                         "length_km": None,
@@ -170,13 +457,15 @@ def init_courses() -> None:
         except Exception:
             pass
 
-    # 둘레길/걷기길: 주소, 코스명, 길이, 경사도(난이도→쉬움=없음)
+    # 둘레길/걷기길: 주소, 코스명, 길이, 경사도(난이도→쉬움=없음). 구간 행을 모아 코스 단위로 묶음
     if WALK_CSV.is_file():
         try:
             df = pd.read_csv(WALK_CSV, encoding="utf-8-sig")
             if not df.empty:
+                segments: list[dict] = []
                 for _, row in df.iterrows():
-                    name = _str(row.get("WLK_COURS_NM")) or _str(row.get("WLK_COURS_FLAG_NM"))
+                    flag = _str(row.get("WLK_COURS_FLAG_NM"))
+                    name = _str(row.get("WLK_COURS_NM")) or flag
                     if not name:
                         continue
                     address = _str(row.get("LNM_ADDR")) or ""
@@ -191,7 +480,8 @@ def init_courses() -> None:
                     cours_dc = _str(row.get("COURS_DC")) or ""
                     adit_dc = _str(row.get("ADIT_DC")) or ""
                     desc_full = (cours_dc + " " + adit_dc).strip() or f"{address} {name}"
-                    _courses.append({
+                    segments.append({
+                        "flag": flag,
                         "address": address,
                         "name": name,
                         "length_km": length_km,
@@ -205,8 +495,90 @@ def init_courses() -> None:
                         "park_type": "",
                         "reason_tags": _extract_reason_tags(cours_dc + " " + adit_dc),
                     })
+                courses.extend(_group_walk_segments(segments))
         except Exception:
             pass
+    _assign_course_ids(courses)
+    return courses
+
+
+def _assign_course_ids(courses: list[dict]) -> None:
+    """
+    내용 기반 코스 ID (source_해시12자리). 출처·이름·주소·좌표가 같으면 재시작·워커와 무관하게 같은 ID.
+    완전히 같은 코스가 여러 번 나오면 등장 순서대로 -2, -3 ... 을 붙임.
+    """
+    seen: dict[str, int] = {}
+    for c in courses:
+        key = "\x1f".join([c["source"], c["name"], c.get("address") or "", f"{c['lat']:.6f}", f"{c['lon']:.6f}"])
+        cid = f"{c['source']}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+        seen[cid] = seen.get(cid, 0) + 1
+        c["id"] = cid if seen[cid] == 1 else f"{cid}-{seen[cid]}"
+
+
+# 같은 WLK_COURS_FLAG_NM 안에서 시작점이 이 거리(m) 이내인 구간은 한 코스로 묶음
+SEGMENT_MERGE_TOLERANCE_M = 50.0
+
+
+def _group_walk_segments(segments: list[dict]) -> list[dict]:
+    """
+    걷기길 구간 행 → 코스 엔티티. (WLK_COURS_FLAG_NM, 시작점 ±SEGMENT_MERGE_TOLERANCE_M) 단위로 묶고
+    이름·길이·난이도가 같은 중복 구간은 하나만 남긴다.
+    대표 지점은 첫 구간 시작점, 길이·난이도·설명은 가장 쉬운 구간 기준 (구간 하나만 걸어도 되므로).
+    설명 전체·추천 사유는 모든 구간을 합치고, 구간 목록은 segments 에 보관. 순서는 CSV 첫 등장 순.
+    """
+    clusters: list[list[dict]] = []
+    by_flag: dict[str, list[list[dict]]] = {}
+    tolerance_km = SEGMENT_MERGE_TOLERANCE_M / 1000.0
+    for seg in segments:
+        candidates = by_flag.setdefault(seg["flag"] or seg["name"], [])
+        for cluster in candidates:
+            head = cluster[0]
+            if haversine_km(head["lat"], head["lon"], seg["lat"], seg["lon"]) <= tolerance_km:
+                if not any(
+                    (s["name"], s["length_km"], s["difficulty"]) == (seg["name"], seg["length_km"], seg["difficulty"])
+                    for s in cluster
+                ):
+                    cluster.append(seg)
+                break
+        else:
+            cluster = [seg]
+            candidates.append(cluster)
+            clusters.append(cluster)
+
+    rank = {d: i for i, d in enumerate(DIFFICULTY_ORDER)}
+    courses: list[dict] = []
+    for cluster in clusters:
+        head = cluster[0]
+        rep = min(cluster, key=lambda s: rank.get(s["difficulty"], len(DIFFICULTY_ORDER)))
+        tags: list[str] = []
+        for s in cluster:
+            tags.extend(t for t in s["reason_tags"] if t not in tags)
+        if len(tags) > 1 and "산책로" in tags:
+            tags.remove("산책로")
+        courses.append({
+            "address": next((s["address"] for s in cluster if s["address"]), ""),
+            "name": rep["name"] if len(cluster) == 1 else (head["flag"] or rep["name"]),
+            "length_km": rep["length_km"],
+            "slope": rep["slope"],
+            "lat": head["lat"],
+            "lon": head["lon"],
+            "description": rep["description"],
+            "description_full": " ".join(dict.fromkeys(s["description_full"] for s in cluster)),
+            "source": "walk",
+            "difficulty": rep["difficulty"],
+            "park_type": "",
+            "reason_tags": tags,
+            "segments": [
+                {
+                    "name": s["name"],
+                    "length_km": s["length_km"],
+                    "difficulty": s["difficulty"],
+                    "description": s["description"],
+                }
+                for s in cluster
+            ],
+        })
+    return courses
 
 
 def _str(v) -> str:
@@ -236,6 +608,18 @@ def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return R * c
 
 
+def haversine_km_np(lat1: float, lon1: float, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """haversine_km 벡터화: 한 점 → 여러 코스 거리(km) 배열."""
+    R = 6371.0
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlam = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
+
+
 # 진단 결과별 산책로 추천 기준 (거리·장소 유형·안내 문구)
 DIAGNOSIS_CRITERIA: dict[str, dict] = {
     "3기": {
@@ -263,25 +647,106 @@ DIAGNOSIS_CRITERIA: dict[str, dict] = {
 
 EXPAND_RADIUS_STEP_KM = 0.5
 MIN_RESULTS_TO_EXPAND = 1
+MAX_RADIUS_TRIES = 10
+# 최근접 대체 검색에서 이 반경(km)을 넘으면 전체 코스를 직접 계산
+NEAREST_FULL_SCAN_KM = 1000.0
+
+
+def get_recommendation_reason(grade: Literal["정상", "1기", "3기"]) -> str:
+    """진단 결과(기수)에 따른 추천 이유 한 줄 문구."""
+    return DIAGNOSIS_CRITERIA.get(grade, {}).get("message", "진단 결과에 맞춘 산책로를 추천합니다.")
 
 
-def _course_matches_keywords(c: dict, keywords: list[str]) -> bool:
-    """코스의 park_type 또는 description_full에 키워드가 하나라도 포함되면 True."""
-    text = ((c.get("park_type") or "") + " " + (c.get("description_full") or "")).strip()
-    return any(kw in text for kw in keywords)
+def _eligible_mask(ds: CourseDataset, idx: np.ndarray, criteria: dict) -> np.ndarray:
+    """진단 기준의 난이도 상한·경사 허용 여부를 만족하는 후보 마스크."""
+    mask = np.ones(len(idx), dtype=np.bool_)
+    max_difficulty = criteria.get("max_difficulty")
+    if max_difficulty is not None:
+        rank = ds.column("difficulty_rank")[idx]
+        mask &= (rank >= 0) & (rank <= DIFFICULTY_ORDER.index(max_difficulty))
+    if not criteria.get("allow_slope", True):
+        mask &= ds.column("no_slope")[idx]
+    return mask
 
 
-def _course_preference_score(c: dict, keywords: list[str]) -> int:
-    """키워드 매칭 수가 많을수록 높은 점수 (정렬용)."""
-    text = ((c.get("park_type") or "") + " " + (c.get("description_full") or "")).strip()
-    return sum(1 for kw in keywords if kw in text)
+def final_radius_km(grade: str) -> float:
+    """반경 확장을 끝까지 했을 때의 최대 검색 반경(km)."""
+    return DIAGNOSIS_CRITERIA[grade]["max_radius_km"] + EXPAND_RADIUS_STEP_KM * (MAX_RADIUS_TRIES - 1)
 
 
-def get_recommendation_reason(grade: Literal["정상", "1기", "3기"]) -> str:
-    """진단 결과(기수)에 따른 추천 이유 한 줄 문구."""
-    return DIAGNOSIS_CRITERIA.get(grade, {}).get("message", "진단 결과에 맞춘 산책로를 추천합니다.")
+def _select_courses(
+    ds: CourseDataset,
+    grade: str,
+    user_lat: float,
+    user_lon: float,
+    limit: int,
+    idx: np.ndarray,
+    fallback_idx: np.ndarray | None = None,
+    eligible: np.ndarray | None = None,
+    score: np.ndarray | None = None,
+) -> list[tuple[int, float]]:
+    """
+    후보 idx(오름차순 코스 인덱스) 안에서 반경을 넓혀가며 (-선호 점수, 거리) 상위 limit개 선택.
+    하나도 없으면 fallback_idx(None이면 전체 코스)에서 가장 가까운 limit개. 반환: [(코스 인덱스, 거리 km), ...]
+    eligible/score: idx 순서로 이미 계산한 값이 있으면 전달 (배치 조회용).
+    """
+    criteria = DIAGNOSIS_CRITERIA[grade]
+    dist = haversine_km_np(user_lat, user_lon, ds.lat[idx], ds.lon[idx])
+    if eligible is None:
+        eligible = _eligible_mask(ds, idx, criteria)
+    if score is None:
+        score = ds.column(_PREF_COLUMNS[grade])[idx]
 
+    selected: list[tuple[int, float]] = []
+    radius = criteria["max_radius_km"]
+    for _ in range(MAX_RADIUS_TRIES):
+        in_radius = np.flatnonzero(eligible & (dist <= radius))
+        # (-선호 점수, 거리) 순, 동점은 원래 순서 유지 (lexsort는 stable)
+        order = in_radius[np.lexsort((dist[in_radius], -score[in_radius]))]
+        selected = [(int(idx[j]), float(dist[j])) for j in order[:limit]]
+        if len(selected) >= limit or len(in_radius) >= limit:
+            break
+        radius += EXPAND_RADIUS_STEP_KM
 
+    if not selected:
+        if fallback_idx is None:
+            fallback_idx, fb_dist = _nearest_candidates(ds, user_lat, user_lon, limit, radius)
+        else:
+            fb_dist = haversine_km_np(user_lat, user_lon, ds.lat[fallback_idx], ds.lon[fallback_idx])
+        selected = [(int(fallback_idx[j]), float(fb_dist[j])) for j in _nearest(fb_dist, limit)]
+    return selected
+
+
+def _nearest_candidates(
+    ds: CourseDataset, lat: float, lon: float, limit: int, radius_km: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    가장 가까운 limit개를 모두 포함하는 후보 인덱스와 거리. 반경을 두 배씩 넓히며 공간 인덱스로 찾고,
+    반경 안 코스가 limit개 이상이면 그 밖의 코스는 더 멀므로 전체에서 찾은 결과와 같다.
+    """
+    radius = max(radius_km, 1.0)
+    while radius < NEAREST_FULL_SCAN_KM:
+        idx = ds.radius_candidates(lat, lon, radius)
+        dist = haversine_km_np(lat, lon, ds.lat[idx], ds.lon[idx])
+        if np.count_nonzero(dist <= radius) >= limit:
+            return idx, dist
+        radius *= 2
+    idx = np.arange(len(ds))
+    return idx, haversine_km_np(lat, lon, ds.lat, ds.lon)
+
+
+def _nearest(dist: np.ndarray, limit: int) -> np.ndarray:
+    """np.argsort(dist, kind="stable")[:limit] 와 같은 결과. 전체 정렬 대신 limit번째 거리 이하만 정렬."""
+    if limit <= 0 or len(dist) == 0:
+        return np.empty(0, dtype=np.int64)
+    if limit >= len(dist):
+        return np.argsort(dist, kind="stable")
+    kth = np.partition(dist, limit - 1)[limit - 1]
+    near = np.flatnonzero(dist <= kth)
+    return near[np.argsort(dist[near], kind="stable")][:limit]
+
+
+@timed("recommend")
 def recommend_walkway(
     diagnosis_result: Literal["정상", "1기", "3기"],
     user_lat: float,
@@ -291,58 +756,19 @@ def recommend_walkway(
     """
     진단 결과에 따라 거리·장소 유형 기준으로 CSV 데이터를 필터한 뒤 상위 limit개 반환.
     결과가 너무 적으면 반경을 500m씩 넓혀 재검색(장소 유형 우선순위 유지).
+    후보는 추천 타일(course_tiles, 사용 설정 시) 또는 공간 인덱스로 최대 확장 반경 안의 격자 셀만 가져와 벡터 연산.
     반환: (추천 코스 리스트, 추천 이유 한 줄 문구)
     """
-    if not _courses:
-        init_courses()
-    criteria = DIAGNOSIS_CRITERIA.get(diagnosis_result, DIAGNOSIS_CRITERIA["정상"])
-    max_radius = criteria["max_radius_km"]
-    keywords = criteria.get("preferred_keywords") or []
-    allow_slope = criteria.get("allow_slope", True)
-    max_difficulty = criteria.get("max_difficulty")
-
-    with_dist: list[dict] = []
-    for c in _courses:
-        d = haversine_km(user_lat, user_lon, c["lat"], c["lon"])
-        with_dist.append({**c, "distance_km": d})
-
-    def difficulty_ok(c: dict) -> bool:
-        if max_difficulty is None:
-            return True
-        diff = (c.get("difficulty") or "").strip()
-        order = ("쉬움", "보통", "어려움")
-        try:
-            return order.index(diff) <= order.index(max_difficulty)
-        except (ValueError, KeyError):
-            return diff == max_difficulty
-
-    def slope_ok(c: dict) -> bool:
-        if allow_slope:
-            return True
-        return (c.get("slope") or "") == "없음"
-
-    selected: list[dict] = []
-    radius = max_radius
-    max_radius_tries = 10
-    for _ in range(max_radius_tries):
-        in_radius = [x for x in with_dist if x["distance_km"] <= radius and difficulty_ok(x) and slope_ok(x)]
-        in_radius.sort(
-            key=lambda x: (
-                -_course_preference_score(x, keywords),
-                x["distance_km"],
-            )
-        )
-        selected = in_radius[:limit]
-        if len(selected) >= limit or len(in_radius) >= limit:
-            break
-        radius += EXPAND_RADIUS_STEP_KM
-
-    if not selected:
-        with_dist.sort(key=lambda x: x["distance_km"])
-        selected = with_dist[:limit]
-
+    ds, _, tiles, _ = _current()
+    grade = diagnosis_result if diagnosis_result in DIAGNOSIS_CRITERIA else "정상"
+    tile_idx = tiles.candidates(grade, user_lat, user_lon, limit) if tiles is not None else None
+    if tile_idx is not None:
+        selected = _select_courses(ds, grade, user_lat, user_lon, limit, tile_idx, fallback_idx=tile_idx)
+    else:
+        idx = ds.radius_candidates(user_lat, user_lon, final_radius_km(grade))
+        selected = _select_courses(ds, grade, user_lat, user_lon, limit, idx)
     reason = get_recommendation_reason(diagnosis_result)
-    return (selected, reason)
+    return ([{**ds.course(i), "distance_km": d} for i, d in selected], reason)
 
 
 def get_recommended_courses(
@@ -356,18 +782,69 @@ def get_recommended_courses(
     반환: [{ "name", "distance", "address", "description", "reason_tags", "lat", "lon" }, ...]
     """
     selected, _ = recommend_walkway(grade, user_lat, user_lon, limit)
-    return [
-        {
-            "name": s["name"],
-            "distance": round(s["distance_km"], 2),
-            "address": s.get("address") or "",
-            "description": s.get("description") or s["name"],
-            "reason_tags": s.get("reason_tags") or ["산책로"],
-            "lat": s["lat"],
-            "lon": s["lon"],
-        }
-        for s in selected
-    ]
+    return [_to_recommended_course(s) for s in selected]
+
+
+def _to_recommended_course(s: dict) -> dict:
+    return {
+        "name": s["name"],
+        "distance": round(s["distance_km"], 2),
+        "address": s.get("address") or "",
+        "description": s.get("description") or s["name"],
+        "reason_tags": s.get("reason_tags") or ["산책로"],
+        "lat": s["lat"],
+        "lon": s["lon"],
+    }
+
+
+@timed("recommend")
+def recommend_walkway_batch(
+    diagnosis_result: Literal["정상", "1기", "3기"],
+    points: list[tuple[float, float]],
+    limit: int = 3,
+) -> tuple[list[list[dict]], str]:
+    """
+    여러 좌표에 대한 recommend_walkway. 적합 여부·선호 점수는 전체 코스에 대해 한 번만 계산하고,
+    좌표별로는 공간 인덱스 후보에 같은 선택 로직 적용. 같은 코스는 한 번만 dict로 만든다.
+    결과는 좌표마다 recommend_walkway를 호출한 것과 동일. 반환: (좌표 순서대로 추천 리스트, 추천 이유)
+    """
+    ds, _, tiles, _ = _current()
+    grade = diagnosis_result if diagnosis_result in DIAGNOSIS_CRITERIA else "정상"
+    reason = get_recommendation_reason(diagnosis_result)
+    if not points:
+        return [], reason
+    radius = final_radius_km(grade)
+    eligible_all = _eligible_mask(ds, np.arange(len(ds)), DIAGNOSIS_CRITERIA[grade])
+    score_all = ds.column(_PREF_COLUMNS[grade])
+    courses: dict[int, dict] = {}
+    results: list[list[dict]] = []
+    for lat, lon in points:
+        lat, lon = float(lat), float(lon)
+        idx = tiles.candidates(grade, lat, lon, limit) if tiles is not None else None
+        fallback_idx = idx
+        if idx is None:
+            idx = ds.radius_candidates(lat, lon, radius)
+        selected = _select_courses(
+            ds, grade, lat, lon, limit, idx, fallback_idx=fallback_idx,
+            eligible=eligible_all[idx], score=score_all[idx],
+        )
+        row = []
+        for i, d in selected:
+            if i not in courses:
+                courses[i] = ds.course(i)
+            row.append({**courses[i], "distance_km": d})
+        results.append(row)
+    return results, reason
+
+
+def get_recommended_courses_batch(
+    points: list[tuple[float, float]],
+    grade: Literal["정상", "1기", "3기"],
+    limit: int = 3,
+) -> list[list[dict]]:
+    """get_recommended_courses의 배치 버전. 좌표 순서대로 결과 리스트."""
+    selected, _ = recommend_walkway_batch(grade, points, limit)
+    return [[_to_recommended_course(s) for s in row] for row in selected]
 
 
 # 프론트엔드 category 값 → 필터 함수 매핑 (영문/한글 모두 허용)
@@ -381,24 +858,28 @@ _CATEGORY_FILTERS: dict[str, callable] = {
     "slope": _is_slope_course,
     "경사": _is_slope_course,
 }
+# 필터 함수 → category_flags 비트
+_CATEGORY_FLAGS: dict[callable, int] = {
+    _is_flat_course: FLAG_FLAT,
+    _is_short_course: FLAG_SHORT,
+    _is_long_course: FLAG_LONG,
+    _is_slope_course: FLAG_SLOPE,
+}
 
 
-def _apply_category_filter(courses: list[dict], category: str | None) -> list[dict]:
-    """category 값에 따라 코스 목록 필터링. None/빈 문자열이면 필터 없음."""
+def _category_flag(category: str | None) -> int:
+    """category 값 → category_flags 비트. None/빈 문자열/알 수 없는 값이면 0(필터 없음)."""
     if not (category and str(category).strip()):
-        return courses
+        return 0
     raw = str(category).strip()
-    key_lower = raw.lower()
-    pred = _CATEGORY_FILTERS.get(key_lower) or _CATEGORY_FILTERS.get(raw)
-    if pred is None:
-        return courses
-    return [c for c in courses if pred(c)]
+    pred = _CATEGORY_FILTERS.get(raw.lower()) or _CATEGORY_FILTERS.get(raw)
+    return _CATEGORY_FLAGS.get(pred, 0)
 
 
 def _to_route_item(c: dict, distance_km: float | None = None) -> dict:
     """코스 dict → API 응답용 항목 (tags 포함)."""
     item = {
-        "id": f"{c.get('source', '')}_{id(c)}",
+        "id": c["id"],
         "name": c["name"],
         "region": c.get("address", "").split()[0] if c.get("address") else "",
         "difficulty": c.get("difficulty", "보통"),
@@ -410,33 +891,146 @@ def _to_route_item(c: dict, distance_km: float | None = None) -> dict:
         "lon": c["lon"],
         "source": c.get("source", "walk"),
         "tags": _build_course_tags(c),
+        "segments": [
+            {
+                "name": seg["name"],
+                "distance": f"{seg['length_km']}km" if seg.get("length_km") is not None else None,
+                "difficulty": seg.get("difficulty") or "보통",
+            }
+            for seg in c.get("segments") or []
+        ],
     }
     if distance_km is not None:
         item["distance_from_user_km"] = round(distance_km, 2)
     return item
 
 
+def search_courses(q: str, ds: CourseDataset | None = None) -> np.ndarray:
+    """
+    검색어 q의 단어(공백 구분)를 모두 이름·공원 유형·설명 전체에 포함한 코스 인덱스(오름차순).
+    키워드 역색인으로 조회하므로 공간 후보(bbox_candidates 등)와 np.intersect1d로 바로 결합 가능.
+    ds: 호출 측에서 이미 잡은 코스 테이블 (요청 중 데이터 교체와 섞이지 않도록).
+    """
+    if ds is None:
+        ds = _ensure_courses()
+    result: np.ndarray | None = None
+    for word in q.split():
+        hits = ds.keyword_candidates(word)
+        result = hits if result is None else np.intersect1d(result, hits, assume_unique=True)
+        if len(result) == 0:
+            break
+    return result if result is not None else np.arange(len(ds), dtype=np.int64)
+
+
+@timed("routes")
 def get_walk_routes(
     filter_type: str = "normal",
     limit: int = 100,
     user_lat: float | None = None,
     user_lon: float | None = None,
     category: str | None = None,
+    q: str | None = None,
 ) -> list[dict]:
     """
     공원+걷기길 필터 후 반환.
     - category: 평지위주|단거리|장거리|경사 (또는 flat|short|long|slope) → 해당 조건으로 추가 필터.
+    - q: 검색어 (공백으로 나눈 단어를 모두 이름·공원 유형·설명에 포함한 코스만).
     - 각 항목에 해당 코스 특징을 나타내는 tags 배열 포함.
     """
-    if not _courses:
-        init_courses()
-    diff_ok = {"easy": ["쉬움"], "rehab": ["쉬움"], "normal": ["쉬움", "보통"]}.get(filter_type, ["쉬움", "보통"])
-    filtered = [c for c in _courses if c.get("difficulty") in diff_ok]
-    filtered = _apply_category_filter(filtered, category)
+    ds = _ensure_courses()
+    max_rank = {"easy": 0, "rehab": 0, "normal": 1}.get(filter_type, 1)
+    rank = ds.column("difficulty_rank")
+    mask = (rank >= 0) & (rank <= max_rank)
+    flag = _category_flag(category)
+    if flag:
+        mask &= (ds.column("category_flags") & flag) != 0
+    filtered = np.flatnonzero(mask)
+    if q and q.strip():
+        filtered = np.intersect1d(filtered, search_courses(q, ds), assume_unique=True)
 
     if user_lat is not None and user_lon is not None:
-        with_dist = [(c, haversine_km(user_lat, user_lon, c["lat"], c["lon"])) for c in filtered]
-        with_dist.sort(key=lambda x: x[1])
-        return [_to_route_item(c, d_km) for c, d_km in with_dist[:limit]]
+        dist = haversine_km_np(user_lat, user_lon, ds.lat[filtered], ds.lon[filtered])
+        order = np.argsort(dist, kind="stable")[:limit]
+        return [_to_route_item(ds.course(filtered[j]), float(dist[j])) for j in order]
+
+    return [_to_route_item(ds.course(i)) for i in filtered[:limit]]
+
+
+# 뷰포트(지도 화면) 조회: 한 번에 내려보내는 최대 항목 수(코스 + 클러스터)
+VIEWPORT_MAX_ITEMS = 300
+# 이 줌 이하(넓은 화면)에서는 항상 격자 클러스터로 요약
+CLUSTER_MAX_ZOOM = 12
+# 클러스터 셀 크기: 256px 지도 타일을 4x4로 나눈 크기 (≈ 64px)
+_CLUSTER_CELLS_PER_TILE = 4
+
 
-    return [_to_route_item(c) for c in filtered[:limit]]
+@timed("routes")
+def get_walk_routes_in_viewport(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int = 14,
+    filter_type: str = "normal",
+    category: str | None = None,
+    q: str | None = None,
+) -> dict:
+    """
+    지도 화면(bbox) 안의 산책로. 공간 인덱스로 후보 셀만 조회 후 get_walk_routes와 같은 난이도·category·q 필터 적용.
+    - 줌이 CLUSTER_MAX_ZOOM 초과이고 VIEWPORT_MAX_ITEMS개 이하면 코스 전부 반환.
+    - 그 외에는 줌에 맞춘 격자로 묶어 2개 이상인 셀은 clusters(중심·개수), 1개인 셀은 routes로 반환.
+      셀 수가 VIEWPORT_MAX_ITEMS를 넘으면 코스가 많은 셀부터 잘라 truncated=True.
+    """
+    ds = _ensure_courses()
+    idx = ds.bbox_candidates(min_lat, max_lat, min_lon, max_lon)
+    if q and q.strip():
+        idx = np.intersect1d(idx, search_courses(q, ds), assume_unique=True)
+    lat = ds.lat[idx]
+    lon = ds.lon[idx]
+    mask = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+    max_rank = {"easy": 0, "rehab": 0, "normal": 1}.get(filter_type, 1)
+    rank = ds.column("difficulty_rank")[idx]
+    mask &= (rank >= 0) & (rank <= max_rank)
+    flag = _category_flag(category)
+    if flag:
+        mask &= (ds.column("category_flags")[idx] & flag) != 0
+    idx, lat, lon = idx[mask], lat[mask], lon[mask]
+    total = len(idx)
+
+    if zoom > CLUSTER_MAX_ZOOM and total <= VIEWPORT_MAX_ITEMS:
+        return {
+            "zoom": zoom,
+            "total": total,
+            "clustered": False,
+            "truncated": False,
+            "routes": [_to_route_item(ds.course(i)) for i in idx],
+            "clusters": [],
+        }
+
+    cell_deg = 360.0 / (2 ** max(0, min(zoom, 22))) / _CLUSTER_CELLS_PER_TILE
+    # bbox 기준 로컬 격자 (줌이 높아도 키가 넘치지 않도록)
+    rows = np.floor((lat - min_lat) / cell_deg).astype(np.int64)
+    cols = np.floor((lon - min_lon) / cell_deg).astype(np.int64)
+    keys = rows * (int((max_lon - min_lon) / cell_deg) + 1) + cols
+    _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    c_lat = np.bincount(inverse, weights=lat) / counts
+    c_lon = np.bincount(inverse, weights=lon) / counts
+    order = np.argsort(-counts, kind="stable")
+    truncated = len(order) > VIEWPORT_MAX_ITEMS
+    order = order[:VIEWPORT_MAX_ITEMS]
+
+    routes: list[dict] = []
+    clusters: list[dict] = []
+    for k in order:
+        if counts[k] == 1:
+            routes.append(_to_route_item(ds.course(idx[first[k]])))
+        else:
+            clusters.append({"lat": float(c_lat[k]), "lon": float(c_lon[k]), "count": int(counts[k])})
+    return {
+        "zoom": zoom,
+        "total": total,
+        "clustered": True,
+        "truncated": truncated,
+        "routes": routes,
+        "clusters": clusters,
+    }
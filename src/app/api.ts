@@ -35,6 +35,8 @@ export interface PredictResult {
   recommended_courses?: RecommendedCourse[];
   /** 진단 결과 기반 추천 이유 한 줄 (결과 리스트 상단 표시용) */
   recommendation_reason?: string;
+  /** 보관한 관절 키포인트 id (모델 교체 후 재판정용, 진단 기록 저장 시 그대로 보냄) */
+  keypoints_id?: string;
 }
 
 /** 반려견 프로필 (백엔드 저장) */
@@ -42,7 +44,8 @@ export interface PetProfile {
   name: string;
   breed: string;
   age: string;
-  photo_base64: string | null;
+  /** 사진 id (없으면 null). 이미지는 profilePhotoUrl 로 */
+  photo_id: string | null;
 }
 
 /** 진단 기록 한 건 (result 있으면 상세 결과 재조회 시 사용) */
@@ -53,16 +56,35 @@ export interface DiagnosisRecord {
   grade: string;
   score: number;
   result?: PredictResult;
+  /** 새 모델로 재판정한 결과 (원래 grade·score는 그대로) */
+  rescore?: { grade: string; score: number; model: string; changed: boolean; at: string };
 }
 
-export async function getProfile(): Promise<PetProfile> {
-  const res = await fetch(`${API_BASE}/api/profile`);
+/** 보호자·반려견 구분 (생략하면 기본 단일 프로필·기록) */
+export interface OwnerScope {
+  userId?: string;
+  petId?: string;
+}
+
+function scopeQuery(scope?: OwnerScope): string {
+  const params = new URLSearchParams();
+  if (scope?.userId) params.set("user_id", scope.userId);
+  if (scope?.petId) params.set("pet_id", scope.petId);
+  const qs = params.toString();
+  return qs ? `?${qs}` : "";
+}
+
+export async function getProfile(scope?: OwnerScope): Promise<PetProfile> {
+  const res = await fetch(`${API_BASE}/api/profile${scopeQuery(scope)}`);
   if (!res.ok) throw new Error("프로필 조회 실패");
   return res.json();
 }
 
-export async function updateProfile(updates: Partial<{ name: string; breed: string; age: string; photo_base64: string | null }>): Promise<PetProfile> {
-  const res = await fetch(`${API_BASE}/api/profile`, {
+export async function updateProfile(
+  updates: Partial<{ name: string; breed: string; age: string; photo_base64: string | null }>,
+  scope?: OwnerScope
+): Promise<PetProfile> {
+  const res = await fetch(`${API_BASE}/api/profile${scopeQuery(scope)}`, {
     method: "PUT",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(updates),
@@ -71,21 +93,81 @@ export async function updateProfile(updates: Partial<{ name: string; breed: stri
   return res.json();
 }
 
-export async function getDiagnosisHistory(): Promise<DiagnosisRecord[]> {
-  const res = await fetch(`${API_BASE}/api/diagnosis-history`);
-  if (!res.ok) return [];
+/** 프로필 사진 업로드 (원본 파일 그대로 multipart) → photo_id 가 바뀐 프로필 */
+export async function uploadProfilePhoto(file: File, scope?: OwnerScope): Promise<PetProfile> {
+  const form = new FormData();
+  form.append("file", file);
+  const res = await fetch(`${API_BASE}/api/profile/photo${scopeQuery(scope)}`, { method: "PUT", body: form });
+  if (!res.ok) throw new Error("사진 업로드 실패");
+  return res.json();
+}
+
+/** 프로필 사진 URL (photo_id 가 바뀌면 URL 도 바뀌어 브라우저 캐시 그대로 사용 가능) */
+export function profilePhotoUrl(
+  photoId: string,
+  size: "small" | "medium" | "original" = "medium",
+  scope?: OwnerScope
+): string {
+  const qs = scopeQuery(scope);
+  return `${API_BASE}/api/profile/photo/${photoId}${qs ? `${qs}&` : "?"}size=${size}`;
+}
+
+/** 진단 기록 목록 한 페이지 (next_cursor 가 null 이면 마지막 페이지) */
+export interface DiagnosisHistoryPage {
+  items: DiagnosisRecord[];
+  next_cursor: number | null;
+}
+
+/** 진단 기록 목록 (최신순). 기본은 result 제외 — 상세는 getDiagnosisRecord */
+export async function getDiagnosisHistory(
+  options: { limit?: number; cursor?: number | null; fields?: (keyof DiagnosisRecord)[] } = {},
+  scope?: OwnerScope
+): Promise<DiagnosisHistoryPage> {
+  const params = new URLSearchParams(scopeQuery(scope).slice(1));
+  if (options.limit != null) params.set("limit", String(options.limit));
+  if (options.cursor != null) params.set("cursor", String(options.cursor));
+  if (options.fields?.length) params.set("fields", options.fields.join(","));
+  const res = await fetch(`${API_BASE}/api/diagnosis-history?${params}`);
+  if (!res.ok) return { items: [], next_cursor: null };
+  return res.json();
+}
+
+/** 진단 추이 집계 (등급별 횟수, 최근 점수 이동평균, 마지막 등급 변화) */
+export interface DiagnosisTrend {
+  count: number;
+  grade_counts: Record<string, number>;
+  recent_scores: number[];
+  score_avg: number | null;
+  first_date: string | null;
+  last: Omit<DiagnosisRecord, "result"> | null;
+  last_transition: { from: string; to: string; id: number; date: string; time: string } | null;
+}
+
+export async function getDiagnosisTrend(scope?: OwnerScope): Promise<DiagnosisTrend> {
+  const res = await fetch(`${API_BASE}/api/diagnosis-trend${scopeQuery(scope)}`);
+  if (!res.ok) throw new Error("진단 추이 조회 실패");
+  return res.json();
+}
+
+/** 진단 기록 한 건 (result 포함) */
+export async function getDiagnosisRecord(id: number, scope?: OwnerScope): Promise<DiagnosisRecord> {
+  const res = await fetch(`${API_BASE}/api/diagnosis-history/${id}${scopeQuery(scope)}`);
+  if (!res.ok) throw new Error("진단 기록 조회 실패");
   return res.json();
 }
 
 export async function addDiagnosisRecord(
   record: { date: string; time: string; grade: string; score: number },
-  result?: PredictResult
-): Promise<void> {
-  await fetch(`${API_BASE}/api/diagnosis-history`, {
+  result?: PredictResult,
+  scope?: OwnerScope
+): Promise<DiagnosisRecord | null> {
+  const res = await fetch(`${API_BASE}/api/diagnosis-history${scopeQuery(scope)}`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ ...record, result: result ?? undefined }),
   });
+  if (!res.ok) return null;
+  return (await res.json()).record;
 }
 
 /** 저장된 결과가 없는 기록용 최소 PredictResult 생성 */
@@ -133,6 +215,8 @@ export interface WalkRouteItem {
   distance_from_user_km?: number;
   /** 코스 특징 태그 (예: ["평지", "단거리"]) */
   tags?: string[];
+  /** 걷기길 구간 목록 (공원은 빈 배열) */
+  segments?: { name: string; distance: string | null; difficulty: string }[];
 }
 
 /** 카테고리: 평지위주 | 단거리 | 장거리 | 경사 (영문 flat | short | long | slope) */
@@ -150,7 +234,8 @@ export async function getWalkRoutes(
   latitude?: number,
   longitude?: number,
   category?: WalkRouteCategory | null,
-  diagnosisGrade?: "정상" | "1기" | "3기" | null
+  diagnosisGrade?: "정상" | "1기" | "3기" | null,
+  q?: string | null
 ): Promise<WalkRouteItem[] | WalkRoutesRecommendResponse> {
   const params = new URLSearchParams({ filter_type: filterType, limit: String(limit) });
   if (latitude != null && longitude != null) {
@@ -163,11 +248,57 @@ export async function getWalkRoutes(
   if (diagnosisGrade != null && diagnosisGrade !== "") {
     params.set("diagnosis_grade", diagnosisGrade);
   }
+  if (q != null && q.trim() !== "") {
+    params.set("q", q.trim());
+  }
   const res = await fetch(`${API_BASE}/api/walk-routes?${params}`);
   if (!res.ok) return [];
   return res.json();
 }
 
+/** 지도 화면(bbox) 조회 시 클러스터 (낮은 줌 또는 항목이 많을 때) */
+export interface WalkRouteCluster {
+  lat: number;
+  lon: number;
+  count: number;
+}
+
+/** /api/walk-routes/viewport 응답 */
+export interface WalkRoutesViewportResponse {
+  zoom: number;
+  total: number;
+  clustered: boolean;
+  truncated: boolean;
+  routes: WalkRouteItem[];
+  clusters: WalkRouteCluster[];
+}
+
+export async function getWalkRoutesInViewport(
+  bounds: { minLat: number; minLon: number; maxLat: number; maxLon: number },
+  zoom: number,
+  filterType: "easy" | "normal" | "rehab" = "normal",
+  category?: WalkRouteCategory | null,
+  q?: string | null
+): Promise<WalkRoutesViewportResponse | null> {
+  const params = new URLSearchParams({
+    min_lat: String(bounds.minLat),
+    min_lon: String(bounds.minLon),
+    max_lat: String(bounds.maxLat),
+    max_lon: String(bounds.maxLon),
+    zoom: String(Math.round(zoom)),
+    filter_type: filterType,
+  });
+  if (category != null && category !== "") {
+    params.set("category", String(category));
+  }
+  if (q != null && q.trim() !== "") {
+    params.set("q", q.trim());
+  }
+  const res = await fetch(`${API_BASE}/api/walk-routes/viewport?${params}`);
+  if (!res.ok) return null;
+  return res.json();
+}
+
 export async function predictApi(
   file: File,
   options?: { latitude?: number; longitude?: number }
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { Video, Calendar, Activity, Pencil, ChevronRight } from "lucide-react";
-import { Link } from "react-router";
+import { Link, useNavigate } from "react-router";
 import { Card, CardContent } from "../components/ui/card";
 import { Button } from "../components/ui/button";
 import { Badge } from "../components/ui/badge";
@@ -17,7 +17,10 @@ import { Label } from "../components/ui/label";
 import {
   getProfile,
   updateProfile,
+  uploadProfilePhoto,
+  profilePhotoUrl,
   getDiagnosisHistory,
+  getDiagnosisRecord,
   buildMinimalResult,
   type PetProfile,
   type DiagnosisRecord,
@@ -51,12 +54,13 @@ export function Home() {
   const [photoFile, setPhotoFile] = useState<File | null>(null);
   const [photoPreview, setPhotoPreview] = useState<string | null>(null);
   const [saving, setSaving] = useState(false);
+  const navigate = useNavigate();
 
   const fetchData = async () => {
     try {
-      const [p, h] = await Promise.all([getProfile(), getDiagnosisHistory()]);
+      const [p, h] = await Promise.all([getProfile(), getDiagnosisHistory({ limit: 3 })]);
       setProfile(p);
-      setRecentRecords(h);
+      setRecentRecords(h.items);
       setEditName(p.name);
       setEditBreed(p.breed);
       setEditAge(p.age);
@@ -65,7 +69,7 @@ export function Home() {
         name: "복실이",
         breed: "말티즈",
         age: "3세",
-        photo_base64: null,
+        photo_id: null,
       });
       setEditName("복실이");
       setEditBreed("말티즈");
@@ -85,10 +89,30 @@ export function Home() {
       setEditBreed(profile.breed);
       setEditAge(profile.age);
       setPhotoFile(null);
-      setPhotoPreview(profile.photo_base64 ? `data:image/jpeg;base64,${profile.photo_base64}` : null);
+      setPhotoPreview(profile.photo_id ? profilePhotoUrl(profile.photo_id) : null);
     }
   };
 
+  // 목록에는 result 가 없으므로 열 때 한 건 조회
+  const openRecord = async (record: DiagnosisRecord) => {
+    let result = record.result;
+    if (!result) {
+      try {
+        result = (await getDiagnosisRecord(record.id)).result;
+      } catch {
+        result = undefined;
+      }
+    }
+    navigate("/result", {
+      state: {
+        result: result ?? buildMinimalResult(record.grade, record.score),
+        date: record.date,
+        time: record.time,
+        fromHistory: true,
+      },
+    });
+  };
+
   const handlePhotoChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0];
     if (!file || !file.type.startsWith("image/")) return;
@@ -102,24 +126,11 @@ export function Home() {
     if (!profile) return;
     setSaving(true);
     try {
-      let photo_base64: string | null = null;
-      if (photoFile) {
-        const base64 = await new Promise<string>((res, rej) => {
-          const r = new FileReader();
-          r.onload = () => {
-            const data = (r.result as string).split(",")[1];
-            res(data ?? "");
-          };
-          r.onerror = rej;
-          r.readAsDataURL(photoFile);
-        });
-        photo_base64 = base64 || null;
-      }
+      if (photoFile) await uploadProfilePhoto(photoFile);
       const updated = await updateProfile({
         name: editName.trim() || profile.name,
         breed: editBreed.trim() || profile.breed,
         age: editAge.trim() || profile.age,
-        ...(photo_base64 !== null ? { photo_base64 } : {}),
       });
       setProfile(updated);
       setEditOpen(false);
@@ -131,8 +142,8 @@ export function Home() {
   };
 
   const profileImage =
-    profile?.photo_base64
-      ? `data:image/jpeg;base64,${profile.photo_base64}`
+    profile?.photo_id
+      ? profilePhotoUrl(profile.photo_id)
       : DEFAULT_IMAGE;
 
   const getGradeBadgeStyle = (grade: string) => {
@@ -156,7 +167,7 @@ export function Home() {
     );
   }
 
-  const p = profile ?? { name: "복실이", breed: "말티즈", age: "3세", photo_base64: null };
+  const p = profile ?? { name: "복실이", breed: "말티즈", age: "3세", photo_id: null };
 
   return (
     <div className="min-h-screen bg-gradient-to-b from-[var(--patella-primary-light)] to-white">
@@ -280,12 +291,14 @@ export function Home() {
               <p className="text-sm text-gray-500 py-4">아직 진단 기록이 없어요. 진단을 진행해 보세요.</p>
             ) : (
               recentRecords.slice(0, 3).map((record) => {
-                const result = record.result ?? buildMinimalResult(record.grade, record.score);
                 return (
                   <Link
                     key={record.id}
                     to="/result"
-                    state={{ result, date: record.date, time: record.time, fromHistory: true }}
+                    onClick={(e) => {
+                      e.preventDefault();
+                      openRecord(record);
+                    }}
                   >
                     <Card className="overflow-hidden border border-gray-200 hover:shadow-md transition-shadow cursor-pointer">
                       <CardContent className="p-4 flex items-center justify-between gap-3">
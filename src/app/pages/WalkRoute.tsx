@@ -6,11 +6,22 @@ import { Button } from "../components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "../components/ui/card";
 import { Badge } from "../components/ui/badge";
 import { motion } from "motion/react";
-import { getWalkRoutes, getProfile, getDiagnosisHistory, type WalkRouteItem, type WalkRouteCategory, type WalkRoutesRecommendResponse } from "../api";
+import {
+  getWalkRoutes,
+  getWalkRoutesInViewport,
+  getProfile,
+  getDiagnosisHistory,
+  type WalkRouteItem,
+  type WalkRouteCategory,
+  type WalkRoutesRecommendResponse,
+  type WalkRoutesViewportResponse,
+} from "../api";
 
 const SEOUL_CENTER: [number, number] = [37.5665, 126.978];
 /** 반경 2km가 보이도록 하는 줌 레벨 */
 const ZOOM_2KM_RADIUS = 14;
+/** 지도 이동·확대가 멈춘 뒤 화면 안 산책로를 다시 불러오기까지 대기(ms) */
+const VIEWPORT_DEBOUNCE_MS = 250;
 
 function escapeHtml(text: string): string {
   const div = document.createElement("div");
@@ -51,20 +62,58 @@ function NaverMap({
   boundsLocations,
   userLocation,
   walkRoutes,
+  filterType,
+  category,
 }: {
   center: [number, number];
   zoom: number;
   centerOnUserWith2km: [number, number] | null;
   boundsLocations: [number, number][];
   userLocation: { lat: number; lon: number } | null;
+  /** 화면 안 산책로를 불러오지 못했을 때 대신 표시 */
   walkRoutes: WalkRouteItem[];
+  filterType: "easy" | "normal" | "rehab";
+  category: WalkRouteCategory | null;
 }) {
   const mapRef = useRef<HTMLDivElement>(null);
   const mapInstanceRef = useRef<naver.maps.Map | null>(null);
   const markersRef = useRef<naver.maps.Marker[]>([]);
   const infoWindowRef = useRef<naver.maps.InfoWindow | null>(null);
   const listenersRef = useRef<naver.maps.MapEventListener[]>([]);
+  const idleListenerRef = useRef<naver.maps.MapEventListener | null>(null);
   const [loadError, setLoadError] = useState<string | null>(null);
+  // 지도 화면(bbox·줌) 기준 산책로: 이동·확대할 때마다 화면 안 코스만 (많거나 줌이 낮으면 클러스터)
+  const [viewport, setViewport] = useState<WalkRoutesViewportResponse | null>(null);
+  const viewportQueryRef = useRef({ filterType, category });
+  viewportQueryRef.current = { filterType, category };
+  const viewportTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const viewportSeqRef = useRef(0);
+
+  const loadViewport = () => {
+    if (viewportTimerRef.current) clearTimeout(viewportTimerRef.current);
+    viewportTimerRef.current = setTimeout(() => {
+      const map = mapInstanceRef.current;
+      if (!map) return;
+      const bounds = map.getBounds();
+      const sw = bounds.getSW();
+      const ne = bounds.getNE();
+      const { filterType: ft, category: cat } = viewportQueryRef.current;
+      const seq = ++viewportSeqRef.current;
+      getWalkRoutesInViewport(
+        { minLat: sw.lat(), minLon: sw.lng(), maxLat: ne.lat(), maxLon: ne.lng() },
+        map.getZoom(),
+        ft,
+        cat
+      )
+        .then((res) => {
+          // 이동 중 먼저 보낸 요청의 응답이 늦게 와도 무시
+          if (seq === viewportSeqRef.current) setViewport(res);
+        })
+        .catch(() => {
+          if (seq === viewportSeqRef.current) setViewport(null);
+        });
+    }, VIEWPORT_DEBOUNCE_MS);
+  };
 
   useEffect(() => {
     if (!mapRef.current || !NAVER_MAP_CLIENT_ID) return;
@@ -100,6 +149,8 @@ function NaverMap({
           );
           map.fitBounds(bounds, 24);
         }
+        idleListenerRef.current = naver.maps.Event.addListener(map, "idle", loadViewport);
+        loadViewport();
       })
       .catch((err) => {
         const msg = err?.message;
@@ -110,6 +161,9 @@ function NaverMap({
       });
     return () => {
       cancelled = true;
+      if (viewportTimerRef.current) clearTimeout(viewportTimerRef.current);
+      idleListenerRef.current?.remove?.();
+      idleListenerRef.current = null;
       listenersRef.current.forEach((l) => l?.remove?.());
       listenersRef.current = [];
       if (infoWindowRef.current) {
@@ -145,6 +199,11 @@ function NaverMap({
     }
   }, [centerOnUserWith2km, boundsLocations]);
 
+  // 탭(필터)이 바뀌면 지금 화면 기준으로 다시 조회
+  useEffect(() => {
+    if (mapInstanceRef.current) loadViewport();
+  }, [filterType, category]);
+
   useEffect(() => {
     const map = mapInstanceRef.current;
     if (!map || !window.naver?.maps) return;
@@ -167,7 +226,40 @@ function NaverMap({
     }
     const infoWindow = infoWindowRef.current;
 
-    const routesWithCoords = walkRoutes.filter(
+    (viewport?.clusters ?? []).forEach((cluster) => {
+      const marker = new naver.maps.Marker({
+        position: new naver.maps.LatLng(cluster.lat, cluster.lon),
+        map,
+        title: `산책로 ${cluster.count}곳`,
+        icon: {
+          content: `
+            <div style="
+              min-width: 32px;
+              height: 32px;
+              padding: 0 8px;
+              display: flex;
+              align-items: center;
+              justify-content: center;
+              border-radius: 16px;
+              background: rgba(37, 99, 235, 0.85);
+              color: white;
+              font-size: 12px;
+              font-weight: 600;
+              box-shadow: 0 2px 6px rgba(0,0,0,0.25);
+            ">${cluster.count}</div>
+          `,
+        },
+      });
+      markersRef.current.push(marker);
+      // 클러스터를 누르면 그 위치로 확대 → idle 에서 화면 안 코스 다시 조회
+      const listener = naver.maps.Event.addListener(marker, "click", () => {
+        map.setCenter(new naver.maps.LatLng(cluster.lat, cluster.lon));
+        map.setZoom(map.getZoom() + 2);
+      });
+      listenersRef.current.push(listener);
+    });
+
+    const routesWithCoords = (viewport ? viewport.routes : walkRoutes).filter(
       (r) => r.lat != null && r.lon != null && Number.isFinite(r.lat) && Number.isFinite(r.lon)
     );
     routesWithCoords.forEach((route) => {
@@ -201,7 +293,7 @@ function NaverMap({
       });
       listenersRef.current.push(listener);
     });
-  }, [userLocation, walkRoutes]);
+  }, [userLocation, walkRoutes, viewport]);
 
   if (!NAVER_MAP_CLIENT_ID) {
     return (
@@ -301,8 +393,8 @@ export function WalkRoute() {
   // 홈바(하단 네비)에서 진입 시에도 최근 진단 기록 기반으로 추천
   useEffect(() => {
     if (diagnosisGradeFromState) return;
-    getDiagnosisHistory()
-      .then((history) => {
+    getDiagnosisHistory({ limit: 1, fields: ["grade"] })
+      .then(({ items: history }) => {
         if (history.length > 0 && ["정상", "1기", "3기"].includes(history[0].grade)) {
           setLatestDiagnosisGrade(history[0].grade);
           useDiagnosisGrade.current = true;
@@ -404,6 +496,8 @@ export function WalkRoute() {
         ? routeCoords[0]
         : SEOUL_CENTER;
   const initialZoom = userLocation ? ZOOM_2KM_RADIUS : 13;
+  const mapFilterType = diagnosisFilterType.current ?? (FILTER_MAP[activeFilter] ?? "normal");
+  const mapCategory = TAB_TO_CATEGORY[activeFilter] ?? null;
 
   return (
     <div className="min-h-screen bg-gradient-to-b from-[var(--patella-primary-light)] to-white pb-8">
@@ -432,6 +526,8 @@ export function WalkRoute() {
                 boundsLocations={boundsLocations}
                 userLocation={userLocation}
                 walkRoutes={walkRoutes}
+                filterType={mapFilterType}
+                category={mapCategory}
               />
               <div className="absolute bottom-3 right-3 z-[1000]">
                 <Button
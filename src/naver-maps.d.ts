@@ -15,6 +15,8 @@ declare namespace naver.maps {
   class LatLngBounds {
     constructor(sw?: LatLng, ne?: LatLng);
     extend(latLng: LatLng): LatLngBounds;
+    getSW(): LatLng;
+    getNE(): LatLng;
   }
   interface MapOptions {
     center?: LatLng;
@@ -31,6 +33,7 @@ declare namespace naver.maps {
     getCenter(): LatLng;
     getZoom(): number;
     fitBounds(bounds: LatLngBounds, padding?: number): void;
+    getBounds(): LatLngBounds;
   }
   interface MarkerOptions {
     position: LatLng;